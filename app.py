@@ -1,18 +1,36 @@
-from flask import Flask, request, jsonify, send_from_directory
-from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import nltk
+import time
+_import_started = time.perf_counter()
+
+import argparse
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 import sqlite3
 import json
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import os
 import logging
-import gc
-import re
+import atexit
+import csv
+import gzip
+import math
+import queue
+import uuid
+from collections import deque
 from functools import wraps
-import time
-from threading import Lock
+from threading import Lock, Thread
 from contextlib import contextmanager
+from batching import MicroBatcher
+from hf_client import HuggingFaceClient
+from inference_router import InferenceRouter, LocalBackend, Overloaded, RemoteBackend
+from job_queue import JobQueue, PriorityGate
+from metrics import MetricsRegistry
+from rate_limiting import SQLiteRateLimiter, TokenBucketLimiter, parse_rate_limits
+from result_cache import ResultCache, normalize_text
+from sentiment_model import (BACKEND, LONG_DOC_MAX_WINDOWS, LONG_DOC_OVERLAP, LONG_DOC_POOLING,
+                             MODEL_NAME, POOLING_METHODS, SENTIMENT_MAP, ModelManager, clean_text,
+                             inference_batch_size, label_summary, release_freed_memory,
+                             stage_latency)
+from word_scoring import pack_word_sentiments, unpack_word_sentiments
+from write_behind import WriteBehindQueue
 
 # Configure logging
 logging.basicConfig(
@@ -21,95 +39,224 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Download VADER lexicon
-nltk.download('vader_lexicon', quiet=True)
-
 app = Flask(__name__)
 
 # Ensure static folder exists
 if not os.path.exists('static'):
     os.makedirs('static')
 
-# Singleton pattern for model management
+# How long analysis requests wait for the background warm-up before a 503
+READY_TIMEOUT = float(os.environ.get('SENTIVIZ_READY_TIMEOUT', 30))
 
+# Micro-batching of concurrent /analyze requests
+BATCH_MAX_SIZE = int(os.environ.get('SENTIVIZ_BATCH_MAX_SIZE', 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get('SENTIVIZ_BATCH_MAX_WAIT_MS', 10))
+BATCH_QUEUE_SIZE = int(os.environ.get('SENTIVIZ_BATCH_QUEUE_SIZE', 1024))
 
-class ModelManager:
-    _instance = None
-    _lock = Lock()
+# Result cache (TTL in seconds, 0 disables expiry)
+CACHE_SIZE = int(os.environ.get('SENTIVIZ_CACHE_SIZE', 10000))
+CACHE_TTL = float(os.environ.get('SENTIVIZ_CACHE_TTL', 0))
+CACHE_PERSIST = os.environ.get('SENTIVIZ_CACHE_PERSIST', '0') == '1'
+
+# Write-behind persistence ('async' queues writes, 'sync' writes inline);
+# a failed async batch is retried DB_WRITE_RETRIES times before it is dropped
+DB_WRITE_MODE = os.environ.get('SENTIVIZ_DB_WRITE_MODE', 'async')
+DB_WRITE_QUEUE_SIZE = int(os.environ.get('SENTIVIZ_DB_WRITE_QUEUE_SIZE', 10000))
+DB_WRITE_BATCH_SIZE = int(os.environ.get('SENTIVIZ_DB_WRITE_BATCH_SIZE', 500))
+DB_WRITE_RETRIES = int(os.environ.get('SENTIVIZ_DB_WRITE_RETRIES', 3))
+
+# Rows per model call on /analyze-stream
+STREAM_CHUNK_SIZE = int(os.environ.get('SENTIVIZ_STREAM_CHUNK_SIZE', 32))
+
+# History retention (0 keeps every analysis): older rows are optionally
+# archived, then deleted, and freed pages are vacuumed incrementally
+RETENTION_DAYS = float(os.environ.get('SENTIVIZ_RETENTION_DAYS', 0))
+RETENTION_ARCHIVE_DIR = os.environ.get('SENTIVIZ_RETENTION_ARCHIVE_DIR', '')
+MAINTENANCE_INTERVAL = float(os.environ.get('SENTIVIZ_MAINTENANCE_INTERVAL', 3600))
+VACUUM_PAGES = int(os.environ.get('SENTIVIZ_VACUUM_PAGES', 0))
+
+# Time series: per-sentiment rollups are kept per minute, hour and UTC day.
+# Minute rollups are dropped after ROLLUP_MINUTE_DAYS (0 keeps them), and
+# no response has more than TIMESERIES_MAX_POINTS buckets.
+TIMESERIES_BUCKETS = {'minute': 60, 'hour': 3600, 'day': 86400}
+ROLLUP_MINUTE_DAYS = float(os.environ.get('SENTIVIZ_ROLLUP_MINUTE_DAYS', 14))
+TIMESERIES_MAX_POINTS = int(os.environ.get('SENTIVIZ_TIMESERIES_MAX_POINTS', 1000))
+
+# Token-bucket rate limits per client and endpoint, overridable with
+# "endpoint=limit/seconds,..."; the sqlite backend shares the buckets
+# between worker processes
+DEFAULT_RATE_LIMITS = {'default': (10, 60), 'analyze_batch': (3, 60), 'analyze_stream': (2, 60),
+                       'submit_job': (5, 60)}
+RATE_LIMITS = parse_rate_limits(os.environ.get('SENTIVIZ_RATE_LIMITS', ''), DEFAULT_RATE_LIMITS)
+RATE_LIMIT_BACKEND = os.environ.get('SENTIVIZ_RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_DB = os.environ.get('SENTIVIZ_RATE_LIMIT_DB', 'rate_limits.db')
+RATE_LIMIT_MAX_CLIENTS = int(os.environ.get('SENTIVIZ_RATE_LIMIT_MAX_CLIENTS', 100000))
+
+# Where classification runs: 'local' (the in-process model), 'remote' (the
+# Hugging Face Inference API; no model is loaded) or 'hybrid' (local first,
+# spilling over to the API under load and falling back to local on errors).
+# Requests beyond the pending limits are rejected with a 503.
+INFERENCE_MODES = ('local', 'remote', 'hybrid')
+INFERENCE_MODE = os.environ.get('SENTIVIZ_INFERENCE_MODE', 'local')
+if INFERENCE_MODE not in INFERENCE_MODES:
+    raise ValueError(
+        f"Unknown inference mode {INFERENCE_MODE!r}, expected one of {INFERENCE_MODES}")
+LOCAL_MAX_PENDING = int(os.environ.get('SENTIVIZ_LOCAL_MAX_PENDING', 256))
+REMOTE_MAX_PENDING = int(os.environ.get('SENTIVIZ_REMOTE_MAX_PENDING', 128))
+SPILL_DEPTH = int(os.environ.get('SENTIVIZ_SPILL_DEPTH', 32))
+SPILL_LATENCY_MS = float(os.environ.get('SENTIVIZ_SPILL_LATENCY_MS', 0))
+REMOTE_COOLDOWN = float(os.environ.get('SENTIVIZ_REMOTE_COOLDOWN', 30))
+
+# Hugging Face Inference API client for the remote and hybrid modes: read
+# timeout in seconds, retries with exponential backoff, texts per API call,
+# concurrent API calls and how long a text waits to share a call
+HF_API_URL = os.environ.get(
+    'SENTIVIZ_HF_API_URL', f"https://api-inference.huggingface.co/models/{MODEL_NAME}")
+HUGGINGFACE_TOKEN = os.environ.get('HUGGINGFACE_TOKEN', '')
+HF_TIMEOUT = float(os.environ.get('SENTIVIZ_HF_TIMEOUT', 30))
+HF_MAX_RETRIES = int(os.environ.get('SENTIVIZ_HF_MAX_RETRIES', 4))
+HF_MAX_BATCH_SIZE = int(os.environ.get('SENTIVIZ_HF_MAX_BATCH_SIZE', 16))
+HF_MAX_IN_FLIGHT = int(os.environ.get('SENTIVIZ_HF_MAX_IN_FLIGHT', 8))
+HF_BATCH_WAIT_MS = float(os.environ.get('SENTIVIZ_HF_BATCH_WAIT_MS', 10))
+
+# Background analysis jobs: worker threads per process, texts per claimed
+# chunk, texts per job, how long a chunk waits for interactive requests to
+# finish, and how long finished jobs are kept (0 keeps them)
+JOB_WORKERS = int(os.environ.get('SENTIVIZ_JOB_WORKERS', 1))
+JOB_CHUNK_SIZE = int(os.environ.get('SENTIVIZ_JOB_CHUNK_SIZE', 32))
+JOB_MAX_TEXTS = int(os.environ.get('SENTIVIZ_JOB_MAX_TEXTS', 100000))
+JOB_MAX_DEFER = float(os.environ.get('SENTIVIZ_JOB_MAX_DEFER', 2))
+JOB_RETENTION_HOURS = float(os.environ.get('SENTIVIZ_JOB_RETENTION_HOURS', 168))
+
+# Prometheus-style metrics served at /metrics
+metrics = MetricsRegistry()
+metrics.register(stage_latency)
+request_count = metrics.counter(
+    'sentiviz_requests_total', 'HTTP requests by route, method and status.',
+    ['route', 'method', 'status'])
+request_latency = metrics.histogram(
+    'sentiviz_request_seconds', 'HTTP request handling time by route.', ['route'])
+metrics.register(inference_batch_size)
 
-    def __new__(cls):
-        with cls._lock:
-            if cls._instance is None:
-                cls._instance = super(ModelManager, cls).__new__(cls)
-                cls._instance.sentiment_analyzer = None
-                cls._instance.sid = None
-                cls._instance.tokenizer = None  # Add tokenizer
-                cls._instance.initialized = False
-            return cls._instance
-
-    def initialize(self):
-        if not self.initialized:
-            logger.info("Loading sentiment analysis models...")
-            model_name = "cardiffnlp/twitter-roberta-base-sentiment"
-
-            logger.info("Falling back to standard PyTorch model")
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                model_name)  # Store tokenizer
-            model = AutoModelForSequenceClassification.from_pretrained(
-                model_name)
-            self.sentiment_analyzer = pipeline(
-                "text-classification",
-                model=model,
-                tokenizer=self.tokenizer
-            )
-            logger.info("Using standard PyTorch model")
-
-            self.sid = SentimentIntensityAnalyzer()
-            self.initialized = True
-            logger.info("Models loaded successfully")
-
-    def get_sentiment_analyzer(self):
-        self.initialize()
-        return self.sentiment_analyzer
-
-    def get_vader_analyzer(self):
-        self.initialize()
-        return self.sid
-
-    def get_tokenizer(self):
-        self.initialize()
-        return self.tokenizer
-
-    def cleanup(self):
-        if self.initialized:
-            del self.sentiment_analyzer
-            del self.sid
-            del self.tokenizer
-            self.sentiment_analyzer = None
-            self.sid = None
-            self.tokenizer = None
-            self.initialized = False
-            gc.collect()
-            logger.info("Model resources released")
 
+def plan_timeseries(start, end, bucket, max_points, minute_horizon=0):
+    """Choose the rollup granularity and bucket width in seconds for a range.
 
+    ``bucket`` names one of TIMESERIES_BUCKETS, or is 'auto' for the finest
+    one that fits ``max_points`` buckets. Minute rollups only exist after
+    ``minute_horizon`` (unix seconds), so earlier ranges are served from
+    hourly ones. The width is then multiplied as needed to stay within
+    ``max_points``, counting from ``start`` rounded down to a multiple of
+    the width, where the first bucket begins.
+    """
+    span = max(1, end - start)
+    if bucket == 'auto':
+        bucket = next((name for name, width in TIMESERIES_BUCKETS.items()
+                       if span / width <= max_points), 'day')
+    granularity = TIMESERIES_BUCKETS[bucket]
+    if granularity == TIMESERIES_BUCKETS['minute'] and start < minute_horizon:
+        granularity = TIMESERIES_BUCKETS['hour']
+    width = granularity * max(1, math.ceil(span / granularity / max_points))
+    # Aligning the start can add a partial bucket in front
+    while math.ceil((end - (start - start % width)) / width) > max_points:
+        width += granularity
+    return granularity, width
 
 
 class DatabaseManager:
     DB_PATH = 'sentiment_analysis.db'
-    _connection_pool = {}
+    POOL_SIZE = int(os.environ.get('SENTIVIZ_DB_POOL_SIZE', 8))
+    # Seconds a statement waits for another process's write lock before
+    # failing with "database is locked"; sqlite3.connect sets it, so no
+    # busy_timeout pragma may override it
+    BUSY_TIMEOUT = float(os.environ.get('SENTIVIZ_DB_BUSY_TIMEOUT', 30))
+    # WAL lets readers run alongside the single writer; NORMAL sync is
+    # durable in WAL mode except for the last commits on power loss
+    PRAGMAS = (
+        # Must come first to apply to a new file; existing files are converted
+        # by enable_incremental_vacuum()
+        'PRAGMA auto_vacuum=INCREMENTAL',
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA cache_size=-16000',
+        'PRAGMA temp_store=MEMORY'
+    )
+    _connection_pool = queue.LifoQueue()
+    _connections_created = 0
     _lock = Lock()
+    # SQLite allows one writer at a time; queueing writers here avoids
+    # busy-timeout sleeps while readers stay unblocked
+    _write_lock = Lock()
+    # /stats is served from this snapshot, kept current by store_analyses
+    RECENT_SIZE = 5
+    _stats = None
+    _stats_version = 0
+    _stats_max_id = None
+    _stats_lock = Lock()
+    _vacuum_hint_logged = False
+
+    @classmethod
+    def _connect(cls):
+        # Connections are shared between request threads through the pool;
+        # cached_statements keeps the hot INSERT/SELECT statements prepared
+        conn = sqlite3.connect(
+            cls.DB_PATH, timeout=cls.BUSY_TIMEOUT, check_same_thread=False,
+            cached_statements=128)
+        conn.row_factory = sqlite3.Row
+        for pragma in cls.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @classmethod
+    def _acquire(cls):
+        try:
+            return cls._connection_pool.get_nowait()
+        except queue.Empty:
+            pass
+        with cls._lock:
+            can_create = cls._connections_created < cls.POOL_SIZE
+            if can_create:
+                cls._connections_created += 1
+        if not can_create:
+            return cls._connection_pool.get()
+        try:
+            return cls._connect()
+        except sqlite3.Error:
+            with cls._lock:
+                cls._connections_created -= 1
+            raise
+
+    @classmethod
+    def write_lock(cls):
+        """The lock this process's writers hold around a write transaction.
+
+        Code that writes through its own pooled connections takes it too,
+        so its transactions queue here instead of in SQLite's busy wait.
+        """
+        return cls._write_lock
 
     @classmethod
     @contextmanager
     def get_connection(cls):
-        with cls._lock:
-            conn = sqlite3.connect(cls.DB_PATH)
-            conn.row_factory = sqlite3.Row
+        conn = cls._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            cls._connection_pool.put(conn)
+
+    @classmethod
+    def close_all(cls):
+        """Close idle pooled connections, e.g. before switching DB_PATH."""
+        while True:
             try:
-                yield conn
-            finally:
-                conn.close()
+                conn = cls._connection_pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with cls._lock:
+                cls._connections_created -= 1
 
     @classmethod
     def init_db(cls):
@@ -134,78 +281,530 @@ class DatabaseManager:
                 'CREATE INDEX IF NOT EXISTS idx_analyses_sentiment ON analyses(sentiment)')
             cursor.execute(
                 'CREATE INDEX IF NOT EXISTS idx_analytics_date ON analytics(date)')
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses(timestamp)')
+            # bucket is the unix time a granularity-second (UTC) bucket starts at
+            cursor.execute('''CREATE TABLE IF NOT EXISTS sentiment_rollups
+                        (granularity INTEGER NOT NULL,
+                         bucket INTEGER NOT NULL,
+                         sentiment TEXT NOT NULL,
+                         count INTEGER NOT NULL,
+                         score_sum REAL NOT NULL,
+                         positive_score_sum REAL NOT NULL,
+                         PRIMARY KEY (granularity, bucket, sentiment)) WITHOUT ROWID''')
             conn.commit()
+            cls._backfill_rollups(conn)
+
+    @classmethod
+    def _backfill_rollups(cls, conn):
+        """Build the rollups from existing analyses the first time they are created."""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if (conn.execute('SELECT 1 FROM sentiment_rollups LIMIT 1').fetchone()
+                    or not conn.execute('SELECT 1 FROM analyses LIMIT 1').fetchone()):
+                conn.rollback()
+                return
+            minute_horizon = '0000'
+            if ROLLUP_MINUTE_DAYS > 0:
+                minute_horizon = (datetime.now(timezone.utc) - timedelta(days=ROLLUP_MINUTE_DAYS)
+                                  ).strftime('%Y-%m-%d %H:%M:%S')
+            for width in TIMESERIES_BUCKETS.values():
+                conn.execute(
+                    '''INSERT INTO sentiment_rollups
+                    SELECT ?, CAST(strftime('%s', timestamp) AS INTEGER) / ? * ? AS bucket,
+                           sentiment, COUNT(*), SUM(score), SUM(positive_score)
+                    FROM analyses WHERE timestamp >= ? GROUP BY bucket, sentiment''',
+                    (width, width, width,
+                     minute_horizon if width == TIMESERIES_BUCKETS['minute'] else '0000'))
+            conn.commit()
+            logger.info("Built time-series rollups from the stored analyses")
+        except sqlite3.Error:
+            conn.rollback()
+            raise
 
     @classmethod
     def store_analysis(cls, text, sentiment, confidence, positive_score, word_sentiments):
-        with cls.get_connection() as conn:
+        return cls.store_analyses(
+            [(text, sentiment, confidence, positive_score, word_sentiments)])
+
+    @classmethod
+    def store_analyses(cls, records):
+        """Write many analyses and their per-day counters in one transaction.
+
+        ``records`` are ``(text, sentiment, confidence, positive_score,
+        word_sentiments)`` tuples.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        now = datetime.now(timezone.utc)
+        timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+        epoch = int(now.timestamp())
+        counts = {'positive': 0, 'negative': 0, 'neutral': 0}
+        # sentiment -> [count, score_sum, positive_score_sum]
+        sums = {}
+        for _, sentiment, confidence, positive_score, _ in records:
+            counts[sentiment] += 1
+            total = sums.setdefault(sentiment, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += confidence
+            total[2] += positive_score
+
+        with stage_latency.time(stage='db_write'), cls._write_lock, cls.get_connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute(
-                    '''INSERT INTO analyses (text, sentiment, score, positive_score, word_sentiments)
-                    VALUES (?, ?, ?, ?, ?)''',
-                    (text, sentiment, confidence,
-                     positive_score, json.dumps(word_sentiments))
+                cursor.executemany(
+                    '''INSERT INTO analyses
+                    (text, sentiment, score, positive_score, word_sentiments, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?)''',
+                    [(text, sentiment, confidence, positive_score,
+                      pack_word_sentiments(text, word_sentiments), timestamp)
+                     for text, sentiment, confidence, positive_score, word_sentiments in records]
                 )
-                today = datetime.now().strftime('%Y-%m-%d')
+                # Inside the write transaction, so these are the ids just assigned
+                last_id = cursor.execute('SELECT MAX(id) FROM analyses').fetchone()[0]
                 cursor.execute(
                     '''INSERT INTO analytics
                     (date, analysis_count, positive_count, negative_count, neutral_count)
-                    VALUES (?, 1, ?, ?, ?)
+                    VALUES (?, ?, ?, ?, ?)
                     ON CONFLICT(date) DO UPDATE SET
-                    analysis_count = analysis_count + 1,
-                    positive_count = positive_count + ?,
-                    negative_count = negative_count + ?,
-                    neutral_count = neutral_count + ?''',
-                    (today,
-                     1 if sentiment == 'positive' else 0,
-                     1 if sentiment == 'negative' else 0,
-                     1 if sentiment == 'neutral' else 0,
-                     1 if sentiment == 'positive' else 0,
-                     1 if sentiment == 'negative' else 0,
-                     1 if sentiment == 'neutral' else 0)
+                    analysis_count = analysis_count + excluded.analysis_count,
+                    positive_count = positive_count + excluded.positive_count,
+                    negative_count = negative_count + excluded.negative_count,
+                    neutral_count = neutral_count + excluded.neutral_count''',
+                    (today, len(records),
+                     counts['positive'], counts['negative'], counts['neutral'])
+                )
+                # The whole batch shares one timestamp, so one row per bucket and sentiment
+                cursor.executemany(
+                    '''INSERT INTO sentiment_rollups
+                    (granularity, bucket, sentiment, count, score_sum, positive_score_sum)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(granularity, bucket, sentiment) DO UPDATE SET
+                    count = count + excluded.count,
+                    score_sum = score_sum + excluded.score_sum,
+                    positive_score_sum = positive_score_sum + excluded.positive_score_sum''',
+                    [(width, epoch // width * width, sentiment, *total)
+                     for width in TIMESERIES_BUCKETS.values()
+                     for sentiment, total in sums.items()]
                 )
                 conn.commit()
-                return True
             except sqlite3.Error as e:
                 logger.error(f"Database error: {e}")
                 conn.rollback()
                 return False
+            # The batch is committed, so a failure from here on must not be
+            # reported: the write-behind queue would retry it as a duplicate
+            try:
+                cls._update_stats(counts, [
+                    cls._recent_entry(text, sentiment, confidence, timestamp)
+                    for text, sentiment, confidence, _, _ in records
+                ], last_id - len(records), last_id)
+            except Exception as e:
+                logger.error(f"Stats snapshot update failed, rebuilding it on the next read: {e}")
+                cls._invalidate_stats()
+            return True
+
+    @staticmethod
+    def _recent_entry(text, sentiment, score, timestamp):
+        return {
+            'text': text[:100] + '...' if len(text) > 100 else text,
+            'sentiment': sentiment,
+            'score': score,
+            'timestamp': timestamp
+        }
 
     @classmethod
-    def get_stats(cls):
+    def _update_stats(cls, counts, recent, previous_id, last_id):
+        # Called with _write_lock held, after the batch has been committed
+        with cls._stats_lock:
+            if cls._stats is None:
+                return
+            if cls._stats_max_id != previous_id:
+                # Another process wrote in between; rebuild on the next read
+                cls._stats = None
+                cls._stats_version += 1
+                return
+            for sentiment, count in counts.items():
+                cls._stats[sentiment] += count
+                cls._stats['total'] += count
+            cls._stats['recent'].extend(recent)
+            cls._stats_max_id = last_id
+            cls._stats_version += 1
+
+    @classmethod
+    def _invalidate_stats(cls):
+        with cls._stats_lock:
+            cls._stats = None
+            cls._stats_version += 1
+
+    @classmethod
+    def _latest_id(cls):
         with cls.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''SELECT
-                       COUNT(*) as total,
-                       SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END) as positive,
-                       SUM(CASE WHEN sentiment = 'negative' THEN 1 ELSE 0 END) as negative,
-                       SUM(CASE WHEN sentiment = 'neutral' THEN 1 ELSE 0 END) as neutral
-                       FROM analyses''')
-            counts = cursor.fetchone()
-            cursor.execute('''SELECT text, sentiment, score, timestamp
-                       FROM analyses ORDER BY id DESC LIMIT 5''')
-            recent = [
-                {
-                    'text': row['text'][:100] + '...' if len(row['text']) > 100 else row['text'],
-                    'sentiment': row['sentiment'],
-                    'score': row['score'],
-                    'timestamp': row['timestamp']
-                }
-                for row in cursor.fetchall()
-            ]
-            return {
-                'total': counts['total'] or 0,
-                'positive': counts['positive'] or 0,
-                'negative': counts['negative'] or 0,
-                'neutral': counts['neutral'] or 0,
-                'recent': recent
-            }
+            return conn.execute('SELECT MAX(id) FROM analyses').fetchone()[0] or 0
+
+    @classmethod
+    def _load_stats(cls):
+        """Build the snapshot from the per-day rollups and the newest rows.
+
+        Returns ``(stats, max_id)``, where ``max_id`` is the newest row covered.
+        """
+        with cls.get_connection() as conn:
+            # One read transaction, so the totals and rows agree under concurrent writers
+            conn.execute('BEGIN')
+            totals = conn.execute('''SELECT
+                       SUM(analysis_count) as total,
+                       SUM(positive_count) as positive,
+                       SUM(negative_count) as negative,
+                       SUM(neutral_count) as neutral
+                       FROM analytics''').fetchone()
+            rows = conn.execute(f'''SELECT id, text, sentiment, score, timestamp
+                       FROM analyses ORDER BY id DESC LIMIT {cls.RECENT_SIZE}''').fetchall()
+        recent = deque(maxlen=cls.RECENT_SIZE)
+        recent.extend(
+            cls._recent_entry(row['text'], row['sentiment'], row['score'], row['timestamp'])
+            for row in reversed(rows)
+        )
+        stats = {
+            'total': totals['total'] or 0,
+            'positive': totals['positive'] or 0,
+            'negative': totals['negative'] or 0,
+            'neutral': totals['neutral'] or 0,
+            'recent': recent
+        }
+        return stats, rows[0]['id'] if rows else 0
+
+    @classmethod
+    def get_stats_snapshot(cls):
+        """Return ``(version, stats)``; the version changes whenever stats do.
+
+        The snapshot is checked against the newest row id, so rows written
+        by other worker processes trigger a rebuild.
+        """
+        latest_id = cls._latest_id()
+        with cls._stats_lock:
+            if cls._stats is not None and cls._stats_max_id == latest_id:
+                return cls._copy_stats()
+        # Hold off writers so no batch is both loaded and applied on top
+        with cls._write_lock:
+            stats, max_id = cls._load_stats()
+            with cls._stats_lock:
+                cls._stats = stats
+                cls._stats_max_id = max_id
+                cls._stats_version += 1
+                return cls._copy_stats()
+
+    @classmethod
+    def _copy_stats(cls):
+        # Called with _stats_lock held
+        stats = dict(cls._stats)
+        stats['recent'] = list(reversed(cls._stats['recent']))
+        return cls._stats_version, stats
+
+    @classmethod
+    def get_analysis(cls, analysis_id):
+        """Return one stored analysis with its word-level results decoded, or None."""
+        with cls.get_connection() as conn:
+            row = conn.execute(
+                '''SELECT id, text, sentiment, score, positive_score, word_sentiments, timestamp
+                FROM analyses WHERE id = ?''', (analysis_id,)).fetchone()
+        if row is None:
+            return None
+        analysis = dict(row)
+        analysis['word_sentiments'] = unpack_word_sentiments(row['text'], row['word_sentiments'])
+        return analysis
+
+    @classmethod
+    def earliest_rollup(cls):
+        """Start of the first day with analyses, as unix time, or None."""
+        with cls.get_connection() as conn:
+            return conn.execute(
+                'SELECT MIN(bucket) FROM sentiment_rollups WHERE granularity = ?',
+                (TIMESERIES_BUCKETS['day'],)).fetchone()[0]
+
+    @classmethod
+    def get_timeseries(cls, granularity, width, start, end, sentiments):
+        """Sum ``granularity`` rollups into ``width``-second buckets in [start, end).
+
+        Returns ``{bucket_start: {sentiment: (count, score_sum, positive_score_sum)}}``.
+        """
+        with cls.get_connection() as conn:
+            rows = conn.execute(
+                f'''SELECT bucket / ? * ? AS t, sentiment, SUM(count), SUM(score_sum),
+                       SUM(positive_score_sum)
+                FROM sentiment_rollups
+                WHERE granularity = ? AND bucket >= ? AND bucket < ?
+                      AND sentiment IN ({', '.join('?' * len(sentiments))})
+                GROUP BY t, sentiment''',
+                (width, width, granularity, start, end, *sentiments)).fetchall()
+        series = {}
+        for t, sentiment, count, score_sum, positive_score_sum in rows:
+            series.setdefault(t, {})[sentiment] = (count, score_sum, positive_score_sum)
+        return series
+
+    @classmethod
+    def prune_rollups(cls, minute_days):
+        """Drop minute rollups older than ``minute_days``; hourly and daily ones are kept."""
+        cutoff = int(time.time() - minute_days * 86400)
+        with cls._write_lock, cls.get_connection() as conn:
+            deleted = conn.execute(
+                'DELETE FROM sentiment_rollups WHERE granularity = ? AND bucket < ?',
+                (TIMESERIES_BUCKETS['minute'], cutoff)).rowcount
+            conn.commit()
+        return deleted
+
+    @classmethod
+    def prune_history(cls, older_than_days, archive_dir=None, batch_size=5000):
+        """Delete analyses older than ``older_than_days``; returns the number removed.
+
+        ``analytics`` is updated with every write, so totals are unaffected.
+        With ``archive_dir`` the rows are first appended, decoded, to a
+        gzipped JSONL file per day. Rows go in batches of ``batch_size`` to
+        keep each write transaction short.
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)
+                  ).strftime('%Y-%m-%d %H:%M:%S')
+        pruned = 0
+        while True:
+            with cls._write_lock, cls.get_connection() as conn:
+                # Ids grow with time, so the oldest rows come first and the scan stops early
+                rows = conn.execute(
+                    '''SELECT id, text, sentiment, score, positive_score, word_sentiments, timestamp
+                    FROM analyses WHERE timestamp < ? ORDER BY id LIMIT ?''',
+                    (cutoff, batch_size)).fetchall()
+                if not rows:
+                    break
+                if archive_dir:
+                    cls._archive(rows, archive_dir)
+                conn.execute('DELETE FROM analyses WHERE id <= ? AND timestamp < ?',
+                             (rows[-1]['id'], cutoff))
+                conn.commit()
+            pruned += len(rows)
+        if pruned:
+            logger.info(f"Pruned {pruned} analyses older than {cutoff}")
+        return pruned
+
+    @staticmethod
+    def _archive(rows, archive_dir):
+        os.makedirs(archive_dir, exist_ok=True)
+        by_day = {}
+        for row in rows:
+            record = dict(row)
+            record['word_sentiments'] = unpack_word_sentiments(row['text'], row['word_sentiments'])
+            by_day.setdefault(str(row['timestamp'])[:10], []).append(record)
+        for day, records in by_day.items():
+            path = os.path.join(archive_dir, f'analyses-{day}.jsonl.gz')
+            with gzip.open(path, 'at', encoding='utf-8') as archive:
+                archive.writelines(json.dumps(record) + '\n' for record in records)
+
+    @classmethod
+    def vacuum(cls, max_pages=0):
+        """Return up to ``max_pages`` free pages (0 for all) to the filesystem.
+
+        Only works on databases in incremental auto-vacuum mode; older ones
+        must be converted with enable_incremental_vacuum() first. Returns
+        the number of pages freed.
+        """
+        with cls._write_lock, cls.get_connection() as conn:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                if not cls._vacuum_hint_logged:
+                    cls._vacuum_hint_logged = True
+                    logger.warning("Database is not in incremental auto-vacuum mode, so freed "
+                                   "pages stay in the file; convert it with "
+                                   "'python app.py --enable-incremental-vacuum'")
+                return 0
+            before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            # executescript steps the pragma to completion; execute() frees a single page
+            conn.executescript(f'PRAGMA incremental_vacuum({max(0, int(max_pages))});')
+            return before - conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+    @classmethod
+    def enable_incremental_vacuum(cls):
+        """Convert an existing database to incremental auto-vacuum.
+
+        This rewrites the whole file with a full VACUUM, which blocks every
+        writer (in all processes) until it is done, so it is only run on
+        request. Returns False if the database was already converted.
+        """
+        with cls._write_lock, cls.get_connection() as conn:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+                return False
+            logger.info("Converting the database to incremental auto-vacuum (full VACUUM)")
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('VACUUM')
+            return True
+
+    @classmethod
+    def reset_stats(cls):
+        """Drop the snapshot so it is rebuilt from the database on next read."""
+        with cls._write_lock, cls._stats_lock:
+            cls._stats = None
+            cls._stats_version += 1
+
+    @classmethod
+    def get_stats(cls):
+        return cls.get_stats_snapshot()[1]
 
 
 # Initialize the database
 DatabaseManager.init_db()
 model_manager = ModelManager()
+inference_batcher = MicroBatcher(
+    model_manager.classify_ids,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    max_queue_size=BATCH_QUEUE_SIZE
+)
+hf_client = None
+local_backend = remote_backend = None
+if INFERENCE_MODE != 'remote':
+    local_backend = LocalBackend(model_manager, inference_batcher, max_pending=LOCAL_MAX_PENDING)
+if INFERENCE_MODE != 'local':
+    hf_client = HuggingFaceClient(
+        HF_API_URL,
+        token=HUGGINGFACE_TOKEN,
+        timeout=(3.05, HF_TIMEOUT),
+        max_retries=HF_MAX_RETRIES,
+        max_batch_size=HF_MAX_BATCH_SIZE,
+        max_in_flight=HF_MAX_IN_FLIGHT
+    )
+    # Concurrent requests share API calls; a large batch is split into up
+    # to HF_MAX_IN_FLIGHT parallel calls by the client
+    remote_backend = RemoteBackend(
+        hf_client,
+        MicroBatcher(hf_client.classify,
+                     max_batch_size=HF_MAX_BATCH_SIZE * HF_MAX_IN_FLIGHT,
+                     max_wait_ms=HF_BATCH_WAIT_MS),
+        max_pending=REMOTE_MAX_PENDING
+    )
+inference_router = InferenceRouter(
+    local_backend,
+    remote_backend,
+    spill_depth=SPILL_DEPTH,
+    spill_latency_ms=SPILL_LATENCY_MS,
+    cooldown=REMOTE_COOLDOWN
+)
+# Each backend's results are cached under its own model ID, so API scores
+# never stand in for the local model's; the first one is preferred
+CACHE_MODEL_IDS = {}
+if local_backend is not None:
+    CACHE_MODEL_IDS[local_backend.name] = f"{MODEL_NAME}:{BACKEND}"
+if remote_backend is not None:
+    CACHE_MODEL_IDS[remote_backend.name] = f"api:{HF_API_URL}"
+PREFERRED_BACKEND = next(iter(CACHE_MODEL_IDS))
+result_cache = ResultCache(
+    CACHE_MODEL_IDS[PREFERRED_BACKEND],
+    max_size=CACHE_SIZE,
+    ttl=CACHE_TTL,
+    connection_factory=DatabaseManager.get_connection if CACHE_PERSIST else None,
+    write_lock=DatabaseManager.write_lock(),
+    other_model_ids=list(CACHE_MODEL_IDS.values())[1:]
+)
+result_cache.init_store()
+model_manager.add_pressure_handler(lambda: result_cache.clear(persistent=False))
+model_manager.add_pressure_handler(
+    lambda: model_manager.word_scorer and model_manager.word_scorer.clear_memo())
+write_queue = WriteBehindQueue(
+    DatabaseManager.store_analyses,
+    max_queue_size=DB_WRITE_QUEUE_SIZE,
+    max_batch_size=DB_WRITE_BATCH_SIZE,
+    synchronous=DB_WRITE_MODE == 'sync',
+    max_retries=DB_WRITE_RETRIES
+)
+atexit.register(write_queue.close)
+if RATE_LIMIT_BACKEND == 'sqlite':
+    rate_limiter = SQLiteRateLimiter(
+        RATE_LIMIT_DB, max_idle=max(window for _, window in RATE_LIMITS.values()))
+else:
+    rate_limiter = TokenBucketLimiter(max_clients=RATE_LIMIT_MAX_CLIENTS)
+
+metrics.collected(
+    'sentiviz_model_loaded', 'Whether the models are currently loaded.',
+    lambda: int(model_manager.initialized))
+metrics.collected(
+    'sentiviz_model_load_seconds', 'Duration of the last model load.',
+    lambda: model_manager.timings.get('load_seconds'))
+metrics.collected(
+    'sentiviz_model_warmup_seconds', 'Duration of the last model warm-up.',
+    lambda: model_manager.timings.get('warmup_seconds'))
+metrics.collected(
+    'sentiviz_cache_lookups_total', 'Result cache lookups by outcome.',
+    lambda: {(outcome,): result_cache.stats()[counter] for outcome, counter in (
+        ('memory_hit', 'memory_hits'), ('persistent_hit', 'persistent_hits'), ('miss', 'misses'))},
+    kind='counter', labelnames=['result'])
+metrics.collected(
+    'sentiviz_cache_hit_ratio', 'Share of result cache lookups that were hits.',
+    lambda: result_cache.stats()['hit_rate'])
+metrics.collected(
+    'sentiviz_queue_depth', 'Items waiting in the inference and write queues.',
+    lambda: {('inference',): inference_batcher.stats()['queue_depth'],
+             ('write',): write_queue.stats()['queue_depth']},
+    labelnames=['queue'])
+metrics.collected(
+    'sentiviz_inference_routed_total', 'Texts sent to each inference backend.',
+    lambda: {(name,): count for name, count in inference_router.stats()['routed'].items()},
+    kind='counter', labelnames=['backend'])
+metrics.collected(
+    'sentiviz_inference_shed_total',
+    'Requests rejected because every inference backend was at capacity.',
+    lambda: inference_router.stats()['shed'], kind='counter')
+
+# Request metrics
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_count.inc(route=route, method=request.method, status=response.status_code)
+    started = g.get('request_started')
+    if started is None:
+        return response
+    if response.is_streamed:
+        # The body is generated while it is sent, so time until it is closed
+        response.call_on_close(
+            lambda: request_latency.observe(time.perf_counter() - started, route=route))
+    else:
+        request_latency.observe(time.perf_counter() - started, route=route)
+    return response
+
+# Database maintenance
+
+
+def run_db_maintenance():
+    """Apply the retention policy and vacuum the freed pages."""
+    started = time.perf_counter()
+    pruned = 0
+    if RETENTION_DAYS > 0:
+        pruned = DatabaseManager.prune_history(RETENTION_DAYS, RETENTION_ARCHIVE_DIR or None)
+    jobs_pruned = job_queue.prune(JOB_RETENTION_HOURS * 3600) if JOB_RETENTION_HOURS > 0 else 0
+    if ROLLUP_MINUTE_DAYS > 0:
+        DatabaseManager.prune_rollups(ROLLUP_MINUTE_DAYS)
+    cache_pruned = result_cache.prune()
+    freed_pages = DatabaseManager.vacuum(VACUUM_PAGES)
+    return {
+        'pruned': pruned,
+        'jobs_pruned': jobs_pruned,
+        'cache_pruned': cache_pruned,
+        'freed_pages': freed_pages,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def start_db_maintenance(interval=MAINTENANCE_INTERVAL):
+    """Run run_db_maintenance every ``interval`` seconds in a daemon thread."""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                run_db_maintenance()
+            except Exception as e:
+                logger.error(f"Database maintenance error: {e}")
+
+    if interval > 0:
+        Thread(target=loop, name='db-maintenance', daemon=True).start()
 
 # Decorators
 
@@ -216,11 +815,10 @@ def sanitize_input(func):
         if request.is_json:
             data = request.get_json(force=True, silent=True) or {}
             if 'text' in data and isinstance(data['text'], str):
-                data['text'] = re.sub(r'[^\w\s.,!?\'"-]', '', data['text'])
+                data['text'] = clean_text(data['text'])
             if 'texts' in data and isinstance(data['texts'], list):
                 data['texts'] = [
-                    re.sub(r'[^\w\s.,!?\'"-]', '',
-                           text) if isinstance(text, str) else ""
+                    clean_text(text) if isinstance(text, str) else ""
                     for text in data['texts']
                 ]
             request.data = json.dumps(data).encode('utf-8')
@@ -228,28 +826,282 @@ def sanitize_input(func):
     return wrapped
 
 
-request_history = {}
-RATE_LIMIT = 10
-TIME_WINDOW = 60
+def not_ready_response():
+    status = model_manager.status()
+    if status['status'] == 'failed':
+        response = jsonify({'error': 'Models failed to load.',
+                            'detail': status['error']})
+        retry_after = max(1, math.ceil(status['retry_in']))
+    else:
+        response = jsonify({
+            'error': 'Models are still loading. Please try again shortly.'})
+        retry_after = 5
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 503
+
+
+def require_ready(func):
+    """Wait (bounded) for the background warm-up instead of loading models inline."""
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        if not inference_router.needs_tokens:
+            # Remote inference only needs the word scorer
+            model_manager.initialize_words()
+            return func(*args, **kwargs)
+        if not model_manager.ready.is_set() and inference_router.remote_available():
+            # Hybrid mode: the API serves while the local model warms up
+            model_manager.start_warmup()
+            model_manager.initialize_words()
+            return func(*args, **kwargs)
+        if not model_manager.wait_until_ready(READY_TIMEOUT):
+            return not_ready_response()
+        return func(*args, **kwargs)
+    return wrapped
 
 
 def rate_limit(func):
+    """Apply the endpoint's limit (or the default one) per client address."""
     @wraps(func)
     def wrapped(*args, **kwargs):
-        client_ip = request.remote_addr
-        current_time = time.time()
-        request_history[client_ip] = [
-            timestamp for timestamp in request_history.get(client_ip, [])
-            if timestamp > current_time - TIME_WINDOW
-        ]
-        if len(request_history.get(client_ip, [])) >= RATE_LIMIT:
-            return jsonify({'error': 'Rate limit exceeded. Please try again later.'}), 429
-        if client_ip not in request_history:
-            request_history[client_ip] = []
-        request_history[client_ip].append(current_time)
+        limit, window = RATE_LIMITS.get(request.endpoint) or RATE_LIMITS.get('default', (0, 0))
+        if limit > 0:
+            allowed, retry_after = rate_limiter.hit(
+                f"{request.endpoint}:{request.remote_addr}", limit, window)
+            if not allowed:
+                response = jsonify({'error': 'Rate limit exceeded. Please try again later.'})
+                response.headers['Retry-After'] = str(math.ceil(retry_after))
+                return response, 429
         return func(*args, **kwargs)
     return wrapped
 
+
+def interactive(func):
+    """Have background jobs hold off their next chunk while this request runs."""
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        with priority_gate.interactive():
+            return func(*args, **kwargs)
+    return wrapped
+
+
+def overloaded_response(error):
+    response = jsonify({'error': 'Server busy. Please try again later.'})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+# Analysis helpers
+
+
+def _prepared(text, tokens, truncated):
+    if truncated:
+        text = model_manager.get_tokenizer().decode(tokens, skip_special_tokens=True)
+    return text, tokens, result_cache.key(normalize_text(text))
+
+
+def prepare_text(text):
+    """Tokenize and truncate text, returning ``(analysis_text, token_ids, cache_key)``.
+
+    Without local inference, or while the local model is still loading in
+    hybrid mode, the text is left to the remote API as it is, and
+    ``token_ids`` is None.
+    """
+    if not inference_router.wants_tokens():
+        return text, None, result_cache.key(normalize_text(text))
+    return _prepared(text, *model_manager.encode(text))
+
+
+def prepare_texts(texts):
+    """Batch version of prepare_text with a single tokenizer call."""
+    if not inference_router.wants_tokens():
+        return [(text, None, result_cache.key(normalize_text(text))) for text in texts]
+    return [
+        _prepared(text, tokens, truncated)
+        for text, (tokens, truncated) in zip(texts, model_manager.encode_many(texts))
+    ]
+
+
+def remote_cache_keys(prepared):
+    """Map prepared cache keys to the same texts' keys for remote results.
+
+    Only needed in hybrid mode, where prepare_text() returns the local
+    model's key and API scores are cached separately.
+    """
+    if PREFERRED_BACKEND == 'remote' or 'remote' not in CACHE_MODEL_IDS:
+        return {}
+    return {key: result_cache.key(normalize_text(text), CACHE_MODEL_IDS['remote'])
+            for text, _, key in prepared}
+
+
+def cached_results(prepared, remote_keys):
+    """Look up prepared texts, returning ``({key: value}, {key: backend_name})``."""
+    found = result_cache.get_many([key for _, _, key in prepared], remote_keys)
+    results, sources = {}, {}
+    for _, _, key in prepared:
+        if key in found:
+            results[key], sources[key] = found[key], PREFERRED_BACKEND
+        elif remote_keys.get(key) in found:
+            results[key], sources[key] = found[remote_keys[key]], 'remote'
+    return results, sources
+
+
+def cache_results(results, sources, remote_keys):
+    """Store ``{key: value}`` under the model ID of the backend that scored each text."""
+    for source in set(sources[key] for key in results):
+        result_cache.set_many(
+            {(key if source == PREFERRED_BACKEND else remote_keys[key]): value
+             for key, value in results.items() if sources[key] == source},
+            model_id=CACHE_MODEL_IDS[source])
+
+
+def long_document_key(text, pooling):
+    """Cache key for long-document results, which depend on the window settings."""
+    return result_cache.key(
+        f"long:{pooling}:{LONG_DOC_OVERLAP}:{LONG_DOC_MAX_WINDOWS}\0{normalize_text(text)}")
+
+
+def score_words(text):
+    scorer = model_manager.get_word_scorer()
+    with stage_latency.time(stage='word_scoring'):
+        return scorer.score_text(text)
+
+
+def analyze_texts(texts, with_words=False):
+    """Analyze many texts, sending only distinct cache misses to the model.
+
+    Returns one dict per text with the (possibly truncated) ``text``,
+    ``sentiment``, ``score`` and ``positive_score``, plus
+    ``word_sentiments`` when ``with_words`` is set.
+    """
+    prepared = prepare_texts(texts)
+    remote_keys = remote_cache_keys(prepared)
+    results, sources = cached_results(prepared, remote_keys)
+
+    misses = {key: (text, tokens) for text, tokens, key in prepared if key not in results}
+    if misses:
+        miss_keys = list(misses)
+        source, miss_scores = inference_router.route(
+            [misses[key][0] for key in miss_keys],
+            [misses[key][1] for key in miss_keys])
+        computed = {key: {'scores': scores}
+                    for key, scores in zip(miss_keys, miss_scores)}
+        sources.update(dict.fromkeys(miss_keys, source))
+        cache_results(computed, sources, remote_keys)
+        results.update(computed)
+
+    if with_words:
+        scored = {}
+        for text, _, key in prepared:
+            if 'word_sentiments' not in results[key] and key not in scored:
+                scored[key] = {**results[key], 'word_sentiments': score_words(text)}
+        if scored:
+            cache_results(scored, sources, remote_keys)
+            results.update(scored)
+
+    analyzed = []
+    for text, _, key in prepared:
+        sentiment, confidence, positive_score = label_summary(results[key]['scores'])
+        result = {
+            'text': text,
+            'sentiment': sentiment,
+            'score': confidence,
+            'positive_score': positive_score
+        }
+        if with_words:
+            result['word_sentiments'] = results[key]['word_sentiments']
+        analyzed.append(result)
+    return analyzed
+
+
+def iter_stream_rows(stream, fmt):
+    """Yield ``(line_number, row_id, text, error)`` from an NDJSON or CSV body."""
+    lines = (raw.decode('utf-8', errors='replace') for raw in stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        if not reader.fieldnames or 'text' not in reader.fieldnames:
+            yield 1, None, None, "CSV input needs a 'text' column"
+            return
+        for row in reader:
+            yield reader.line_num, row.get('id'), row.get('text') or '', None
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, None, f"Invalid JSON: {e}"
+            continue
+        if isinstance(row, str):
+            row = {'text': row}
+        if not isinstance(row, dict) or not isinstance(row.get('text'), str):
+            yield line_number, None, None, "Expected an object with a 'text' string"
+            continue
+        yield line_number, row.get('id'), row['text'], None
+
+# 9999-12-31T23:59:59Z, the last second datetime can format
+MAX_TIMESTAMP = 253402300799
+
+
+def parse_timestamp(value, default):
+    """Parse unix seconds or an ISO 8601 date/time (UTC unless it has an offset).
+
+    Raises ValueError for anything else, including times before 1970 or
+    after 9999 and non-finite numbers.
+    """
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        try:
+            seconds = parsed.timestamp()
+        except OverflowError as e:
+            raise ValueError(str(e)) from e
+    # Also false for NaN
+    if not 0 <= seconds <= MAX_TIMESTAMP:
+        raise ValueError(f"timestamp out of range: {value}")
+    return seconds
+
+
+def isoformat_utc(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+# Analysis jobs
+
+
+def run_job_chunk(texts, options):
+    """Analyze one claimed chunk of a job, storing the analyses if the job asked to."""
+    persist = options.get('persist', False)
+    results = analyze_texts(texts, with_words=persist)
+    if persist and not DatabaseManager.store_analyses([
+            (result['text'], result['sentiment'], result['score'],
+             result['positive_score'], result['word_sentiments'])
+            for result in results]):
+        raise sqlite3.Error('bulk insert failed')
+    return results
+
+
+priority_gate = PriorityGate()
+job_queue = JobQueue(
+    DatabaseManager.get_connection,
+    run_job_chunk,
+    workers=JOB_WORKERS,
+    chunk_size=JOB_CHUNK_SIZE,
+    gate=priority_gate,
+    max_defer=JOB_MAX_DEFER,
+    retryable=(Overloaded,),
+    write_lock=DatabaseManager.write_lock()
+)
+job_queue.init_store()
+atexit.register(job_queue.close)
+metrics.collected(
+    'sentiviz_job_items_pending', 'Job texts waiting to be analyzed.',
+    lambda: job_queue.stats()['pending_items'])
+
 # Routes
 
 
@@ -263,91 +1115,274 @@ def serve_static(path):
     return send_from_directory('static', path)
 
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({'status': 'ok'})
+
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    if not inference_router.needs_tokens:
+        return jsonify({'status': 'ready', 'inference': INFERENCE_MODE,
+                        'import_seconds': IMPORT_SECONDS})
+    model_manager.start_warmup()
+    status = model_manager.status()
+    status['import_seconds'] = IMPORT_SECONDS
+    return jsonify(status), 200 if status['status'] == 'ready' else 503
+
+
 @app.route('/analyze', methods=['POST'])
 @sanitize_input
 @rate_limit
+@require_ready
+@interactive
 def analyze():
     data = request.json
     text = data.get('text', '').strip()
+    mode = data.get('mode', 'standard')
+    pooling = data.get('pooling', LONG_DOC_POOLING)
 
     if not text:
         return jsonify({'error': 'No text provided'}), 400
+    if mode not in ('standard', 'long'):
+        return jsonify({'error': "mode must be 'standard' or 'long'"}), 400
+    if pooling not in POOLING_METHODS:
+        return jsonify({'error': f"pooling must be one of {', '.join(POOLING_METHODS)}"}), 400
+    if mode == 'long' and not inference_router.needs_tokens:
+        return jsonify({'error': "mode 'long' needs local inference"}), 400
+    if mode == 'long' and not model_manager.wait_until_ready(READY_TIMEOUT):
+        # Hybrid mode lets requests through during warm-up, but only
+        # standard mode can go to the API
+        return not_ready_response()
 
     try:
-        sentiment_analyzer = model_manager.get_sentiment_analyzer()
-        sid = model_manager.get_vader_analyzer()
-        tokenizer = model_manager.get_tokenizer()  # Get tokenizer
-
-        # Truncate text to 512 tokens
-        tokens = tokenizer.encode(text, add_special_tokens=True)
-        if len(tokens) > 512:
-            tokens = tokens[:510] + tokens[-2:]
-            text = tokenizer.decode(tokens, skip_special_tokens=True)
-
-        result = sentiment_analyzer(text)[0]
-        logger.info(f"Result type: {type(result)}, content: {result}")
-
-        sentiment_map = {'LABEL_0': 'negative',
-                         'LABEL_1': 'neutral', 'LABEL_2': 'positive'}
-        sentiment = sentiment_map[result['label']]
-        confidence = result['score']
-
-        all_scores = sentiment_analyzer(text, top_k=None)[0]
-        logger.info(
-            f"All scores type: {type(all_scores)}, content: {all_scores}")
-        if isinstance(all_scores, dict):
-            scores = {all_scores['label']: all_scores['score']}
+        remote_keys = {}
+        if mode == 'long':
+            # Every window of the full text is scored in one call on the local
+            # backend, which counts them as pending and sheds them when full
+            key, source = long_document_key(text, pooling), 'local'
+            cached = result_cache.get(key)
+            if cached is None:
+                scores, chunks = model_manager.classify_long(
+                    text, pooling,
+                    lambda windows: inference_router.classify_local([text] * len(windows), windows))
+                cached = {'scores': scores, 'chunks': chunks}
         else:
-            scores = {item['label']: item['score'] for item in all_scores}
-        positive_score = scores.get('LABEL_2', 0)
-
-        words = text.split()
-        word_sentiments = []
-        if len(words) < 500:
-            word_sentiments = [
-                {
-                    'text': word,
-                    'sentiment': 'positive' if (score := sid.polarity_scores(word)['compound']) > 0
-                    else 'negative' if score < 0 else 'neutral',
-                    'score': abs(score)
-                }
-                for word in words if len(word) > 2
-            ]
-
-        success = DatabaseManager.store_analysis(
-            text, sentiment, confidence, positive_score, word_sentiments
+            # Tokenize once (truncated to 512 tokens); on a cache miss the router
+            # picks a backend, where the call is shared with other requests in
+            # the same batching window
+            prepared = prepare_text(text)
+            text, tokens, key = prepared
+            remote_keys = remote_cache_keys([prepared])
+            found, sources = cached_results([prepared], remote_keys)
+            cached, source = found.get(key), sources.get(key)
+            if cached is None:
+                source, scores = inference_router.route([text], [tokens])
+                cached = {'scores': scores[0]}
+        if 'word_sentiments' not in cached:
+            cached = {**cached, 'word_sentiments': score_words(text)}
+            cache_results({key: cached}, {key: source}, remote_keys)
+        scores = cached['scores']
+        word_sentiments = cached['word_sentiments']
+        logger.debug("All scores: %s", scores)
+
+        sentiment, confidence, positive_score = label_summary(scores)
+
+        queued = write_queue.submit(
+            (text, sentiment, confidence, positive_score, word_sentiments)
         )
-        if not success:
-            return jsonify({'error': 'Database error occurred'}), 500
+        if not queued:
+            if write_queue.synchronous:
+                return jsonify({'error': 'Database error occurred'}), 500
+            return jsonify({'error': 'Server busy. Please try again later.'}), 503
 
-        return jsonify({
+        response = {
             'sentiment': sentiment,
             'score': confidence,
             'positive_score': positive_score,
             'word_sentiments': word_sentiments
-        })
+        }
+        if mode == 'long':
+            response['pooling'] = pooling
+            response['chunks'] = []
+            for chunk in cached['chunks']:
+                chunk = dict(chunk)
+                chunk_sentiment, chunk_score, chunk_positive = label_summary(chunk.pop('scores'))
+                response['chunks'].append({
+                    **chunk,
+                    'sentiment': chunk_sentiment,
+                    'score': chunk_score,
+                    'positive_score': chunk_positive
+                })
+        with stage_latency.time(stage='serialize'):
+            return jsonify(response)
 
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
         return jsonify({'error': 'An error occurred during analysis'}), 500
 
 
+# Distinguishes snapshot versions of different server runs in ETags
+STATS_ETAG_PREFIX = uuid.uuid4().hex[:8]
+
+
 @app.route('/stats', methods=['GET'])
 @rate_limit
 def get_stats():
     try:
-        stats = DatabaseManager.get_stats()
-        return jsonify(stats)
+        version, stats = DatabaseManager.get_stats_snapshot()
+        etag = f'{STATS_ETAG_PREFIX}-{version}'
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = jsonify(stats)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         logger.error(f"Stats error: {str(e)}")
         return jsonify({'error': 'An error occurred while fetching statistics'}), 500
 
 
+@app.route('/stats/timeseries', methods=['GET'])
+@rate_limit
+def stats_timeseries():
+    """Analysis counts and average scores per time bucket, from the rollup tables.
+
+    Query parameters: ``start`` and ``end`` (unix seconds or ISO 8601,
+    default the last 30 days), ``bucket`` ('minute', 'hour', 'day' or
+    'auto'), ``sentiment`` (comma-separated) and ``max_points``. Ranges
+    that would need more than ``max_points`` buckets are downsampled to
+    wider ones, and empty buckets are returned as zeros.
+    """
+    now = time.time()
+    try:
+        end = int(parse_timestamp(request.args.get('end'), now))
+        start = int(parse_timestamp(request.args.get('start'), end - 30 * 86400))
+    except ValueError:
+        return jsonify({'error': 'start and end must be unix seconds or ISO 8601 times '
+                                 'between 1970 and 9999'}), 400
+    bucket = request.args.get('bucket', 'auto')
+    if bucket != 'auto' and bucket not in TIMESERIES_BUCKETS:
+        return jsonify({'error': f"bucket must be 'auto' or one of {', '.join(TIMESERIES_BUCKETS)}"}), 400
+    sentiments = [s.strip() for s in request.args.get('sentiment', 'positive,neutral,negative').split(',')]
+    if not sentiments or not set(sentiments) <= set(SENTIMENT_MAP.values()):
+        return jsonify({'error': 'sentiment must list positive, neutral and/or negative'}), 400
+    max_points = max(1, min(request.args.get('max_points', 200, type=int), TIMESERIES_MAX_POINTS))
+    if start >= end:
+        return jsonify({'error': 'start must be before end'}), 400
+
+    try:
+        # Nothing is stored before the first analysis, so "all time" starts
+        # there; a range that ends before it has no points at all
+        earliest = DatabaseManager.earliest_rollup()
+        has_data = earliest is not None and earliest < end
+        if has_data:
+            start = max(start, earliest)
+        minute_horizon = now - ROLLUP_MINUTE_DAYS * 86400 if ROLLUP_MINUTE_DAYS > 0 else 0
+        granularity, width = plan_timeseries(start, end, bucket, max_points, minute_horizon)
+        start -= start % width
+        series = (DatabaseManager.get_timeseries(granularity, width, start, end, sentiments)
+                  if has_data else {})
+
+        points = []
+        for t in range(start, end if has_data else start, width):
+            buckets = series.get(t, {})
+            point = {'t': isoformat_utc(t)}
+            count = score_sum = positive_score_sum = 0
+            for sentiment in sentiments:
+                n, scores, positive_scores = buckets.get(sentiment, (0, 0.0, 0.0))
+                point[sentiment] = n
+                count += n
+                score_sum += scores
+                positive_score_sum += positive_scores
+            point['count'] = count
+            point['avg_score'] = score_sum / count if count else None
+            point['avg_positive_score'] = positive_score_sum / count if count else None
+            points.append(point)
+        with stage_latency.time(stage='serialize'):
+            return jsonify({
+                'start': isoformat_utc(start),
+                'end': isoformat_utc(end),
+                'bucket_seconds': width,
+                'granularity': next(name for name, seconds in TIMESERIES_BUCKETS.items()
+                                    if seconds == granularity),
+                'downsampled': width > TIMESERIES_BUCKETS.get(bucket, granularity),
+                'sentiments': sentiments,
+                'points': points
+            })
+    except sqlite3.Error as e:
+        logger.error(f"Time series error: {str(e)}")
+        return jsonify({'error': 'An error occurred while fetching the time series'}), 500
+
+
+@app.route('/inference-stats', methods=['GET'])
+def inference_stats():
+    return jsonify(inference_batcher.stats())
+
+
+@app.route('/routing-stats', methods=['GET'])
+def routing_stats():
+    return jsonify({'mode': INFERENCE_MODE, **inference_router.stats()})
+
+
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+
+@app.route('/write-stats', methods=['GET'])
+def write_stats():
+    return jsonify(write_queue.stats())
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype=None, content_type=MetricsRegistry.CONTENT_TYPE)
+
+
+@app.route('/rate-limit-stats', methods=['GET'])
+def rate_limit_stats():
+    return jsonify({
+        **rate_limiter.stats(),
+        'limits': {endpoint: {'limit': limit, 'window_seconds': window}
+                   for endpoint, (limit, window) in RATE_LIMITS.items()}
+    })
+
+
+@app.route('/analyses/<int:analysis_id>', methods=['GET'])
+def get_analysis(analysis_id):
+    try:
+        analysis = DatabaseManager.get_analysis(analysis_id)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Error reading analysis {analysis_id}: {e}")
+        return jsonify({'error': 'Failed to read analysis'}), 500
+    if analysis is None:
+        return jsonify({'error': 'Analysis not found'}), 404
+    return jsonify(analysis)
+
+
+@app.route('/db-maintenance', methods=['POST'])
+def db_maintenance():
+    try:
+        return jsonify({'success': True, **run_db_maintenance()})
+    except sqlite3.Error as e:
+        logger.error(f"Database maintenance error: {e}")
+        return jsonify({'error': 'Database maintenance failed'}), 500
+
+
+@app.route('/memory-stats', methods=['GET'])
+def memory_stats():
+    return jsonify(model_manager.memory_stats())
+
+
 @app.route('/memory-cleanup', methods=['POST'])
 def memory_cleanup():
     try:
-        model_manager.cleanup()
-        collected = gc.collect()
+        model_manager.unload()
+        collected = release_freed_memory()
         return jsonify({
             'success': True,
             'collected_objects': collected
@@ -360,6 +1395,8 @@ def memory_cleanup():
 @app.route('/analyze-batch', methods=['POST'])
 @sanitize_input
 @rate_limit
+@require_ready
+@interactive
 def analyze_batch():
     data = request.json
     texts = data.get('texts', [])
@@ -368,28 +1405,233 @@ def analyze_batch():
     if len(texts) > 50:
         return jsonify({'error': 'Batch size too large. Maximum 50 texts per request.'}), 400
     try:
-        sentiment_analyzer = model_manager.get_sentiment_analyzer()
-        results = sentiment_analyzer(texts, top_k=None)
-        processed_results = []
-        for i, result_scores in enumerate(results):
-            max_score = max(result_scores, key=lambda x: x['score'])
-            sentiment_map = {'LABEL_0': 'negative',
-                             'LABEL_1': 'neutral', 'LABEL_2': 'positive'}
-            sentiment = sentiment_map[max_score['label']]
-            confidence = max_score['score']
-            positive_score = next(
-                (item['score'] for item in result_scores if item['label'] == 'LABEL_2'), 0)
-            processed_results.append({
-                'text': texts[i],
-                'sentiment': sentiment,
-                'score': confidence,
-                'positive_score': positive_score
-            })
-        return jsonify({'results': processed_results})
+        processed_results = [
+            {**result, 'text': text}
+            for text, result in zip(texts, analyze_texts(texts))
+        ]
+        with stage_latency.time(stage='serialize'):
+            return jsonify({'results': processed_results})
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"Batch analysis error: {str(e)}")
         return jsonify({'error': 'An error occurred during batch analysis'}), 500
 
 
+@app.route('/analyze-stream', methods=['POST'])
+@rate_limit
+@require_ready
+def analyze_stream():
+    """Analyze an NDJSON or CSV body of any size, streaming NDJSON results.
+
+    Input rows are ``{"id": ..., "text": ...}`` objects (or CSV with a
+    ``text`` and optional ``id`` column). Rows are analyzed in chunks of
+    ``chunk_size`` as they arrive; after each chunk a ``progress`` record
+    with its timing is emitted, and a ``summary`` record closes the stream.
+    Pass ``persist=1`` to store the analyses in bulk.
+    """
+    fmt = request.args.get('format')
+    if fmt is None:
+        fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': "format must be 'ndjson' or 'csv'"}), 400
+    persist = request.args.get('persist', '0') == '1'
+    chunk_size = max(1, min(request.args.get('chunk_size', STREAM_CHUNK_SIZE, type=int), 256))
+    stream = request.stream
+
+    def emit(record):
+        return json.dumps(record) + '\n'
+
+    def process(chunk):
+        """Analyze a chunk's valid rows; returns its records in input order."""
+        started = time.perf_counter()
+        texts = [text for _, _, text, error in chunk if error is None]
+        results = analyze_texts(texts, with_words=persist) if texts else []
+        if persist and results:
+            stored = DatabaseManager.store_analyses([
+                (result['text'], result['sentiment'], result['score'],
+                 result['positive_score'], result['word_sentiments'])
+                for result in results
+            ])
+            if not stored:
+                raise sqlite3.Error('bulk insert failed')
+        lines = []
+        results = iter(results)
+        for line_number, row_id, _, error in chunk:
+            if error is not None:
+                lines.append(emit({'type': 'error', 'line': line_number, 'id': row_id, 'error': error}))
+                continue
+            result = next(results)
+            result.pop('word_sentiments', None)
+            lines.append(emit({'type': 'result', 'line': line_number, 'id': row_id, **result}))
+        return lines, len(texts), (time.perf_counter() - started) * 1000
+
+    def generate():
+        started = time.perf_counter()
+        processed = errors = chunks = 0
+        chunk = []
+        rows = iter_stream_rows(stream, fmt)
+        while True:
+            row = next(rows, None)
+            if row is not None:
+                line_number, row_id, text, error = row
+                text = clean_text(text).strip() if error is None else ''
+                if error is None and not text:
+                    error = 'No text provided'
+                if error is not None:
+                    errors += 1
+                # Bad rows wait in the chunk too, so every record comes out in input order
+                chunk.append((line_number, row_id, text, error))
+            if chunk and (row is None or len(chunk) >= chunk_size):
+                try:
+                    lines, analyzed, chunk_ms = process(chunk)
+                except Overloaded:
+                    yield emit({'type': 'error', 'error': 'Server busy. Please try again later.'})
+                    return
+                except Exception as e:
+                    logger.error(f"Stream analysis error: {str(e)}")
+                    yield emit({'type': 'error', 'error': 'An error occurred during analysis'})
+                    return
+                processed += analyzed
+                chunks += 1
+                yield ''.join(lines)
+                elapsed = time.perf_counter() - started
+                yield emit({
+                    'type': 'progress',
+                    'chunk': chunks,
+                    'chunk_rows': analyzed,
+                    'chunk_ms': round(chunk_ms, 2),
+                    'processed': processed,
+                    'errors': errors,
+                    'rows_per_sec': round(processed / elapsed, 1) if elapsed else 0
+                })
+                chunk = []
+            if row is None:
+                break
+        elapsed = time.perf_counter() - started
+        yield emit({
+            'type': 'summary',
+            'processed': processed,
+            'errors': errors,
+            'chunks': chunks,
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'rows_per_sec': round(processed / elapsed, 1) if elapsed else 0,
+            'persisted': persist
+        })
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/jobs', methods=['POST'])
+@sanitize_input
+@rate_limit
+def submit_job():
+    """Queue texts for background analysis and return the job with a 202.
+
+    The body is ``{"texts": [...], "persist": false}`` JSON, or NDJSON or
+    CSV rows as accepted by /analyze-stream, with ``persist=1`` as a query
+    parameter. Progress is at ``/jobs/<id>``, and results are at
+    ``/jobs/<id>/results``.
+    """
+    if request.is_json:
+        data = request.json or {}
+        texts = data.get('texts')
+        if not isinstance(texts, list):
+            return jsonify({'error': 'No texts provided'}), 400
+        if len(texts) > JOB_MAX_TEXTS:
+            return jsonify({'error': f'Too many texts. Maximum {JOB_MAX_TEXTS} per job.'}), 400
+        persist = data.get('persist', False)
+        if not isinstance(persist, bool):
+            return jsonify({'error': 'persist must be true or false'}), 400
+        rows = [(None, text.strip(), None if text.strip() else 'No text provided')
+                for text in texts]
+    else:
+        fmt = request.args.get('format')
+        if fmt is None:
+            fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+        if fmt not in ('ndjson', 'csv'):
+            return jsonify({'error': "format must be 'ndjson' or 'csv'"}), 400
+        persist = request.args.get('persist', '0') == '1'
+        rows = []
+        for _, row_id, text, error in iter_stream_rows(request.stream, fmt):
+            text = clean_text(text).strip() if error is None else ''
+            if error is None and not text:
+                error = 'No text provided'
+            rows.append((row_id, text, error))
+            if len(rows) > JOB_MAX_TEXTS:
+                return jsonify({'error': f'Too many texts. Maximum {JOB_MAX_TEXTS} per job.'}), 400
+    if not rows:
+        return jsonify({'error': 'No texts provided'}), 400
+
+    try:
+        job_id = job_queue.submit(rows, {'persist': persist})
+    except sqlite3.Error as e:
+        logger.error(f"Job submission error: {str(e)}")
+        return jsonify({'error': 'Could not queue the job'}), 500
+    response = jsonify(job_queue.get(job_id))
+    response.headers['Location'] = f'/jobs/{job_id}'
+    return response, 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if not job_queue.cancel(job_id):
+        return jsonify({'error': 'Job has already finished'}), 409
+    return jsonify(job_queue.get(job_id))
+
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def get_job_results(job_id):
+    """Page through a job's items in input order.
+
+    Pass the returned ``next_after`` as ``after`` to get the next page.
+    Items that are not finished yet have the status ``pending`` or ``running``.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    after = request.args.get('after', -1, type=int)
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    results = job_queue.results(job_id, after, limit)
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'],
+        'results': results,
+        'next_after': results[-1]['index'] if len(results) == limit else None
+    })
+
+
+@app.route('/job-stats', methods=['GET'])
+def job_stats():
+    return jsonify(job_queue.stats())
+
+
+IMPORT_SECONDS = round(time.perf_counter() - _import_started, 3)
+logger.info(f"App imported in {IMPORT_SECONDS}s")
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the SentiViz development server.')
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help='convert the database to incremental auto-vacuum with a one-off '
+                             'full VACUUM, then exit; stop the server first')
+    if parser.parse_args().enable_incremental_vacuum:
+        started = time.perf_counter()
+        converted = DatabaseManager.enable_incremental_vacuum()
+        logger.info(f"Converted in {time.perf_counter() - started:.1f}s" if converted
+                    else "The database already uses incremental auto-vacuum")
+        raise SystemExit(0)
+    if inference_router.needs_tokens:
+        model_manager.start_warmup()
+    job_queue.start()
+    start_db_maintenance()
     app.run(host='0.0.0.0', port=5000, debug=False)
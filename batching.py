@@ -0,0 +1,103 @@
+import logging
+import queue
+import time
+from collections import Counter
+from concurrent.futures import Future
+from threading import Lock, Thread
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Groups concurrent inference requests into padded batches.
+
+    Callers submit one item at a time and block on the result. A single
+    background worker collects items until either ``max_batch_size`` items
+    are waiting or ``max_wait_ms`` has passed since the first item of the
+    batch arrived, then runs ``infer_fn`` once over the whole batch.
+    """
+
+    def __init__(self, infer_fn, max_batch_size=16, max_wait_ms=10, max_queue_size=1024):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._worker = None
+        self._start_lock = Lock()
+        self._stats_lock = Lock()
+        self._batch_sizes = Counter()
+        self._items = 0
+        self._batches = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._errors = 0
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._start_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = Thread(
+                        target=self._run, name='inference-batcher', daemon=True)
+                    self._worker.start()
+
+    def submit(self, item, timeout=None):
+        """Queue ``item`` for the next batch and wait for its result."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()), timeout=timeout)
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.infer_fn(items)
+            except Exception as e:
+                logger.error(f"Batched inference error: {e}")
+                with self._stats_lock:
+                    self._errors += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            self._record(batch, started)
+
+    def _record(self, batch, started):
+        waits = [started - enqueued for _, _, enqueued in batch]
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes[len(batch)] += 1
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self._batches,
+                'items': self._items,
+                'errors': self._errors,
+                'avg_batch_size': self._items / self._batches if self._batches else 0,
+                'batch_size_histogram': dict(sorted(self._batch_sizes.items())),
+                'avg_queue_wait_ms': self._wait_total / self._items * 1000 if self._items else 0,
+                'max_queue_wait_ms': self._wait_max * 1000
+            }
@@ -0,0 +1,101 @@
+"""Check label parity and compare CPU latency/throughput across inference backends.
+
+Run from the repository root:
+
+    python -m benchmarks.backends --backends pytorch onnx onnx-int8 --threads 4
+
+Label parity is always measured against PyTorch, the reference backend;
+it is loaded for that even when it is not one of ``--backends``.
+"""
+import argparse
+import sys
+import time
+
+from transformers import AutoTokenizer
+
+from benchmarks.harness import add_baseline_arguments, measure, report
+from sentiment_model import (BACKENDS, MAX_TOKENS, MODEL_NAME, load_sequence_classifier,
+                             predict_scores)
+
+REFERENCE_BACKEND = 'pytorch'
+SAMPLE_TEXTS = [
+    "I love this phone, the camera is amazing!",
+    "Worst customer service I have ever dealt with.",
+    "The package arrived on Tuesday.",
+    "Not bad at all, though the battery could be better.",
+    "I can't believe how slow the checkout was, never again.",
+    "Thanks for the quick reply, that fixed it.",
+    "The meeting has been moved to 3pm.",
+    "Absolutely terrible, it broke after two days.",
+]
+
+
+def encode_all(tokenizer, texts):
+    batch = []
+    for text in texts:
+        token_ids = tokenizer.encode(text, add_special_tokens=True)
+        if len(token_ids) > MAX_TOKENS:
+            token_ids = token_ids[:MAX_TOKENS - 2] + token_ids[-2:]
+        batch.append(token_ids)
+    return batch
+
+
+def top_labels(results):
+    return [max(scores, key=scores.get) for scores in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--threads', type=int, default=0,
+                        help='intra-op threads per backend (0 = runtime default)')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--copies', type=int, default=8,
+                        help='repeat the sample texts to build a larger workload')
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    sample_ids = encode_all(tokenizer, SAMPLE_TEXTS)
+    batch_ids = encode_all(tokenizer, SAMPLE_TEXTS * args.copies)
+    batches = [batch_ids[i:i + args.batch_size] for i in range(0, len(batch_ids), args.batch_size)]
+
+    backends = sorted(set(args.backends), key=BACKENDS.index)
+    reference = None
+    if REFERENCE_BACKEND not in backends:
+        reference_model = load_sequence_classifier(MODEL_NAME, REFERENCE_BACKEND,
+                                                   intra_op_threads=args.threads)
+        reference = top_labels(predict_scores(reference_model, tokenizer, sample_ids))
+        del reference_model
+
+    # PyTorch runs first so the other backends are checked against its labels
+    results = {}
+    for backend in backends:
+        start = time.perf_counter()
+        model = load_sequence_classifier(MODEL_NAME, backend, intra_op_threads=args.threads)
+        load_time = time.perf_counter() - start
+
+        labels = top_labels(predict_scores(model, tokenizer, sample_ids))
+        if reference is None:
+            reference = labels
+        agreement = sum(a == b for a, b in zip(labels, reference)) / len(reference)
+
+        def workload(i):
+            for batch in batches:
+                predict_scores(model, tokenizer, batch)
+
+        result = measure(workload, args.repeat, warmup=1, items_per_call=len(batch_ids))
+        result['load_s'] = round(load_time, 3)
+        result['label_parity'] = round(agreement, 4)
+        results[backend] = result
+        print(f"{backend:<10} load={load_time:6.2f} s  label_parity={agreement:6.1%} "
+              f"vs {REFERENCE_BACKEND}  throughput={result['items_per_sec']:8.1f} texts/s")
+
+    settings = {'backends': backends, 'threads': args.threads, 'batch_size': args.batch_size,
+                'repeat': args.repeat, 'copies': args.copies, 'model': MODEL_NAME}
+    return report(results, args, settings)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
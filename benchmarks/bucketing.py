@@ -0,0 +1,63 @@
+"""Compare one padded batch with length-bucketed batches on mixed-length inputs.
+
+Run from the repository root:
+
+    python -m benchmarks.bucketing --texts 50 --repeat 5 --save bucketing.json
+"""
+import argparse
+import random
+import sys
+
+from app import BACKEND, MODEL_NAME, model_manager
+from benchmarks.harness import add_baseline_arguments, measure, report
+from sentiment_model import predict_scores
+
+WORDS = ("the service was great but the delivery took forever and the box "
+         "arrived damaged so I am not sure I would order again").split()
+
+
+def mixed_texts(count, seed):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        # Mostly short posts with the occasional long review
+        length = rng.choice([8, 12, 20, 30]) if rng.random() < 0.8 else rng.randint(200, 600)
+        texts.append(' '.join(rng.choice(WORDS) for _ in range(length)))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--texts', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=13)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    model_manager.initialize()
+    batch_ids = [ids for ids, _ in model_manager.encode_many(mixed_texts(args.texts, args.seed))]
+    lengths = [len(ids) for ids in batch_ids]
+    print(f"{len(batch_ids)} texts, {min(lengths)}-{max(lengths)} tokens "
+          f"(padded single batch: {len(lengths) * max(lengths)} tokens, real: {sum(lengths)})")
+
+    def single():
+        return predict_scores(model_manager.model, model_manager.tokenizer, batch_ids)
+
+    def bucketed():
+        return model_manager.classify_ids(batch_ids)
+
+    drift = max(abs(a[label] - b[label])
+                for a, b in zip(single(), bucketed()) for label in a)
+    print(f"max score difference between strategies: {drift:.2e}")
+
+    results = {
+        name: measure(lambda i: func(), args.repeat, warmup=1, items_per_call=len(batch_ids))
+        for name, func in (('single_batch', single), ('bucketed', bucketed))
+    }
+    settings = {'texts': args.texts, 'repeat': args.repeat, 'seed': args.seed,
+                'backend': BACKEND, 'model': MODEL_NAME}
+    return report(results, args, settings)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Compare the pooled WAL database layer with the old lock-and-connect one.
+
+Mixed store_analysis/get_stats traffic runs from many threads against a
+temporary database. Run from the repository root:
+
+    python -m benchmarks.db_concurrency --threads 16 --operations 2000 --save db.json
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+from contextlib import contextmanager
+from threading import Lock
+
+from app import DatabaseManager
+from benchmarks.harness import add_baseline_arguments, measure, report
+
+WORDS = [{'text': 'great', 'sentiment': 'positive', 'score': 0.6249}]
+_legacy_lock = Lock()
+
+
+@contextmanager
+def legacy_connection():
+    """The pre-pool behaviour: one process-wide lock around a fresh connection."""
+    with _legacy_lock:
+        conn = sqlite3.connect(DatabaseManager.DB_PATH)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def seed(rows):
+    with DatabaseManager.get_connection() as conn:
+        conn.executemany(
+            '''INSERT INTO analyses (text, sentiment, score, positive_score, word_sentiments)
+            VALUES (?, ?, ?, ?, ?)''',
+            [(f'seed text {i}', random.choice(['positive', 'negative', 'neutral']),
+              0.9, 0.5, '[]') for i in range(rows)]
+        )
+        conn.commit()
+
+
+def run(threads, operations, stats_ratio):
+    def operation(i):
+        if random.random() < stats_ratio:
+            DatabaseManager.get_stats()
+        else:
+            DatabaseManager.store_analysis(f'text {i}', 'positive', 0.9, 0.8, WORDS)
+
+    return measure(operation, operations, threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--stats-ratio', type=float, default=0.2)
+    parser.add_argument('--seed-rows', type=int, default=10000)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    pooled_connection = DatabaseManager.get_connection
+    results = {}
+    for name in ('legacy', 'pooled'):
+        with tempfile.TemporaryDirectory() as tmp:
+            DatabaseManager.close_all()
+            DatabaseManager.DB_PATH = os.path.join(tmp, 'bench.db')
+            DatabaseManager.get_connection = pooled_connection
+            DatabaseManager.init_db()
+            seed(args.seed_rows)
+            if name == 'legacy':
+                DatabaseManager.close_all()
+                conn = sqlite3.connect(DatabaseManager.DB_PATH)
+                conn.execute('PRAGMA journal_mode=DELETE')
+                conn.close()
+                DatabaseManager.get_connection = legacy_connection
+            results[name] = run(args.threads, args.operations, args.stats_ratio)
+            DatabaseManager.get_connection = pooled_connection
+            DatabaseManager.close_all()
+
+    settings = {'threads': args.threads, 'operations': args.operations,
+                'stats_ratio': args.stats_ratio, 'seed_rows': args.seed_rows}
+    return report(results, args, settings)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Shared timing, reporting and baseline helpers for the benchmark suite."""
+import json
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed, items_per_call=1):
+    """Turn per-call latencies (seconds) into the numbers we track."""
+    return {
+        'calls': len(latencies),
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0,
+        'items_per_sec': round(len(latencies) * items_per_call / elapsed, 2) if elapsed else 0,
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3)
+    }
+
+
+def measure(func, iterations, concurrency=1, warmup=3, items_per_call=1):
+    """Call ``func(i)`` ``iterations`` times from ``concurrency`` threads."""
+    for i in range(warmup):
+        func(i)
+
+    def timed(i):
+        started = time.perf_counter()
+        func(i)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        latencies = [timed(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(concurrency) as executor:
+            latencies = list(executor.map(timed, range(iterations)))
+    return summarize(latencies, time.perf_counter() - started, items_per_call)
+
+
+def print_results(results):
+    print(f"{'benchmark':<32} {'rps':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<32} {result['rps']:>10.1f} {result['p50_ms']:>10.3f} "
+              f"{result['p95_ms']:>10.3f} {result['p99_ms']:>10.3f}")
+
+
+def save_baseline(path, results, settings):
+    document = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'settings': settings,
+        'results': results
+    }
+    with open(path, 'w') as handle:
+        json.dump(document, handle, indent=2)
+    print(f"Saved baseline to {path}")
+
+
+def compare(results, baseline_path, tolerance):
+    """Print changes against a saved baseline; return the names that regressed.
+
+    A benchmark regresses when its throughput drops or its p95 latency
+    grows by more than ``tolerance`` (a fraction).
+    """
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)['results']
+    regressions = []
+    print(f"\nCompared with {baseline_path}:")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<32} (new)")
+            continue
+        rps_change = result['rps'] / before['rps'] - 1 if before['rps'] else 0
+        p95_change = result['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0
+        regressed = rps_change < -tolerance or p95_change > tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<32} rps {rps_change:+7.1%}  p95 {p95_change:+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def add_baseline_arguments(parser):
+    parser.add_argument('--save', metavar='PATH', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='allowed slowdown before a benchmark counts as a regression')
+
+
+def report(results, args, settings):
+    """Print, save and compare results; returns the process exit code."""
+    print_results(results)
+    if args.save:
+        save_baseline(args.save, results, settings)
+    if args.compare:
+        return 1 if compare(results, args.compare, args.tolerance) else 0
+    return 0
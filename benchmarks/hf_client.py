@@ -0,0 +1,85 @@
+"""Compare the pooled, batching API client with one requests.post per text.
+
+Both run against the local mock Inference API, so no network or token is
+needed. Run from the repository root:
+
+    python -m benchmarks.hf_client --texts 400 --concurrency 32 --latency-ms 40 --save hf.json
+
+The mock answers over loopback without TLS, so opening a connection costs
+far less than it does against the real API; the number of API calls each
+variant makes is the figure that carries over.
+"""
+import argparse
+import sys
+import time
+
+import requests
+
+from batching import MicroBatcher
+from benchmarks.harness import add_baseline_arguments, measure, report
+from benchmarks.mock_hf_api import serve_in_thread
+from hf_client import HFAPIError, HuggingFaceClient
+
+
+def unpooled(api_url):
+    """The previous app_api.query(): a new connection per call, no timeout."""
+    def classify(text):
+        output = requests.post(api_url, json={'inputs': text}).json()
+        return {item['label']: item['score'] for item in output[0]}
+    return classify
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--texts', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--latency-ms', type=float, default=40)
+    parser.add_argument('--per-item-ms', type=float, default=2)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--in-flight', type=int, default=8)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    server, api_url = serve_in_thread(latency_ms=args.latency_ms, per_item_ms=args.per_item_ms)
+    texts = [f"sample review number {i}, mostly positive" for i in range(args.texts)]
+
+    client = HuggingFaceClient(api_url, max_batch_size=args.batch_size,
+                               max_in_flight=args.in_flight)
+    batcher = MicroBatcher(client.classify, max_batch_size=args.batch_size * args.in_flight,
+                           max_wait_ms=10)
+    variants = {
+        'unpooled': unpooled(api_url),
+        'pooled': lambda text: client.classify([text])[0],
+        'pooled+batched': batcher.submit
+    }
+    results, calls = {}, {}
+    for name, classify in variants.items():
+        before = server.app.config['calls']
+        # No warm-up calls, so the API call counts cover exactly these texts
+        results[name] = measure(lambda i: classify(texts[i]), len(texts), args.concurrency,
+                                warmup=0)
+        calls[name] = server.app.config['calls'] - before
+    for name, count in calls.items():
+        print(f"{name}: {count} API calls for {len(texts)} texts")
+    server.shutdown()
+
+    # A model that is still loading: the client should wait it out
+    server, api_url = serve_in_thread(latency_ms=args.latency_ms, cold_start=2)
+    client = HuggingFaceClient(api_url, backoff=0.2)
+    started = time.perf_counter()
+    try:
+        client.classify(['cold start'])
+        print(f"cold start: succeeded after {client.stats()['retries']} retries "
+              f"in {time.perf_counter() - started:.1f}s")
+    except HFAPIError as e:
+        print(f"cold start: failed ({e})")
+    server.shutdown()
+
+    settings = {'texts': args.texts, 'concurrency': args.concurrency,
+                'latency_ms': args.latency_ms, 'per_item_ms': args.per_item_ms,
+                'batch_size': args.batch_size, 'in_flight': args.in_flight}
+    return report(results, args, settings)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""In-process load generator for /analyze, /analyze-batch and /stats.
+
+Requests go through Flask's test client from a pool of threads, so the
+whole request path (decorators, caching, batching, persistence) is
+exercised without a network in between. The rate limiter is lifted and a
+temporary database is used. Run from the repository root:
+
+    python -m benchmarks.load --concurrency 1,8,32 --requests 500 --save load.json
+    python -m benchmarks.load --concurrency 1,8,32 --compare load.json
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+
+import app
+from app import DatabaseManager, model_manager
+from benchmarks.harness import add_baseline_arguments, measure, report
+
+SCENARIOS = ('analyze', 'analyze-batch', 'stats')
+WORDS = ("the service was great but delivery took forever and the box arrived "
+         "damaged so I am not sure I would order again lovely staff though").split()
+
+
+def make_texts(count, seed):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 40)))
+            for _ in range(count)]
+
+
+def run_scenario(scenario, concurrency, requests, texts, batch_size):
+    local = threading.local()
+    failures = []
+
+    def call(i):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.app.test_client()
+        if scenario == 'analyze':
+            response = client.post('/analyze', json={'text': texts[i % len(texts)]})
+        elif scenario == 'analyze-batch':
+            start = i * batch_size % len(texts)
+            batch = texts[start:start + batch_size] or texts[:batch_size]
+            response = client.post('/analyze-batch', json={'texts': batch})
+        else:
+            response = client.get('/stats')
+        if response.status_code != 200:
+            failures.append(response.status_code)
+
+    items = batch_size if scenario == 'analyze-batch' else 1
+    result = measure(call, requests, concurrency, items_per_call=items)
+    result['errors'] = len(failures)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument('--concurrency', default='1,8,32',
+                        help='comma-separated client thread counts')
+    parser.add_argument('--requests', type=int, default=500, help='requests per run')
+    parser.add_argument('--batch-size', type=int, default=20, help='texts per /analyze-batch call')
+    parser.add_argument('--distinct-texts', type=int, default=0,
+                        help='size of the text pool (default: one text per request, so no cache hits)')
+    parser.add_argument('--seed', type=int, default=16)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    scenarios = args.scenarios.split(',')
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    app.RATE_LIMITS = {}
+    model_manager.warm_up()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        DatabaseManager.close_all()
+        DatabaseManager.DB_PATH = os.path.join(tmp, 'load.db')
+        DatabaseManager.init_db()
+        DatabaseManager.reset_stats()
+        for scenario in scenarios:
+            for level in levels:
+                # A fresh text pool per run keeps the result cache from carrying over
+                pool_size = args.distinct_texts or args.requests * args.batch_size
+                texts = make_texts(pool_size, f'{args.seed}-{scenario}-{level}')
+                name = f'{scenario}@{level}'
+                results[name] = run_scenario(scenario, level, args.requests, texts, args.batch_size)
+                if results[name]['errors']:
+                    print(f"{name}: {results[name]['errors']} requests failed")
+        app.write_queue.flush(timeout=30)
+        DatabaseManager.close_all()
+
+    settings = {'requests': args.requests, 'batch_size': args.batch_size,
+                'distinct_texts': args.distinct_texts, 'backend': app.BACKEND,
+                'model': app.MODEL_NAME}
+    return report(results, args, settings)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Micro-benchmarks for the building blocks behind /analyze and /stats.
+
+Covers model inference at several batch sizes, VADER word scoring,
+store_analysis and get_stats against a pre-seeded database, and
+sanitize_input. Run from the repository root:
+
+    python -m benchmarks.micro --rows 1000000 --db bench.db --save baseline.json
+    python -m benchmarks.micro --db bench.db --compare baseline.json
+
+Seeding a million rows takes a while, so pass ``--db`` to keep the seeded
+database between runs; it is reused when it already has ``--rows`` rows.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+import app
+from app import DatabaseManager, model_manager, sanitize_input
+from benchmarks.harness import add_baseline_arguments, measure, report
+
+SAMPLE_TEXT = ("The delivery was late but the support team sorted it out quickly, "
+               "and honestly the product itself is fantastic value for money!")
+WORDS = [{'text': 'fantastic', 'sentiment': 'positive', 'score': 0.5574}]
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+
+def seed_database(path, rows, seed):
+    """Fill ``path`` with ``rows`` analyses and matching per-day rollups."""
+    DatabaseManager.close_all()
+    DatabaseManager.DB_PATH = path
+    DatabaseManager.init_db()
+    with DatabaseManager.get_connection() as conn:
+        existing = conn.execute('SELECT COUNT(*) FROM analyses').fetchone()[0]
+        if existing >= rows:
+            print(f"Reusing {path} ({existing} rows)")
+        else:
+            print(f"Seeding {rows - existing} rows into {path}...")
+            rng = random.Random(seed)
+            days = {}
+
+            def generate():
+                for i in range(existing, rows):
+                    sentiment = rng.choice(SENTIMENTS)
+                    day = f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}"
+                    counts = days.setdefault(day, dict.fromkeys(SENTIMENTS, 0))
+                    counts[sentiment] += 1
+                    yield (f'seeded review {i}', sentiment, rng.random(), rng.random(),
+                           json.dumps(WORDS), f'{day} 12:00:00')
+
+            conn.executemany(
+                '''INSERT INTO analyses
+                (text, sentiment, score, positive_score, word_sentiments, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?)''', generate())
+            conn.executemany(
+                '''INSERT INTO analytics
+                (date, analysis_count, positive_count, negative_count, neutral_count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(date) DO UPDATE SET
+                analysis_count = analysis_count + excluded.analysis_count,
+                positive_count = positive_count + excluded.positive_count,
+                negative_count = negative_count + excluded.negative_count,
+                neutral_count = neutral_count + excluded.neutral_count''',
+                [(day, sum(counts.values()), counts['positive'], counts['negative'],
+                  counts['neutral']) for day, counts in days.items()])
+            conn.commit()
+    DatabaseManager.reset_stats()
+
+
+def inference_benchmarks(batch_sizes, iterations):
+    token_ids, _ = model_manager.encode(SAMPLE_TEXT)
+    results = {}
+    for size in batch_sizes:
+        batch = [token_ids] * size
+        results[f'inference_batch_{size}'] = measure(
+            lambda i: model_manager.classify_ids(batch), iterations, items_per_call=size)
+    return results
+
+
+def word_scoring_benchmark(iterations):
+    scorer = model_manager.get_word_scorer()
+    return {'word_scoring': measure(lambda i: scorer.score_text(SAMPLE_TEXT), iterations)}
+
+
+def database_benchmarks(iterations):
+    return {
+        'store_analysis': measure(
+            lambda i: DatabaseManager.store_analysis(
+                f'benchmark text {i}', 'positive', 0.9, 0.8, WORDS), iterations),
+        'get_stats': measure(lambda i: DatabaseManager.get_stats(), iterations),
+        # A snapshot rebuild is what the first /stats after a restart pays
+        'get_stats_cold': measure(
+            lambda i: (DatabaseManager.reset_stats(), DatabaseManager.get_stats()),
+            max(1, iterations // 10))
+    }
+
+
+def sanitize_benchmark(iterations):
+    @sanitize_input
+    def view():
+        return None
+
+    body = json.dumps({'text': SAMPLE_TEXT * 4, 'texts': [SAMPLE_TEXT] * 10})
+
+    def call(i):
+        with app.app.test_request_context(
+                '/analyze', method='POST', data=body, content_type='application/json'):
+            view()
+
+    return {'sanitize_input': measure(call, iterations)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--batch-sizes', default='1,8,32',
+                        help='comma-separated inference batch sizes')
+    parser.add_argument('--rows', type=int, default=1000000,
+                        help='rows in the seeded database')
+    parser.add_argument('--db', help='seeded database to create or reuse (default: temporary)')
+    parser.add_argument('--seed', type=int, default=16)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    model_manager.initialize()
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+    results = {}
+    results.update(inference_benchmarks(batch_sizes, max(1, args.iterations // 4)))
+    results.update(word_scoring_benchmark(args.iterations * 10))
+    results.update(sanitize_benchmark(args.iterations * 10))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_database(args.db or os.path.join(tmp, 'bench.db'), args.rows, args.seed)
+        results.update(database_benchmarks(args.iterations))
+        DatabaseManager.close_all()
+
+    settings = {'iterations': args.iterations, 'batch_sizes': batch_sizes,
+                'rows': args.rows, 'backend': app.BACKEND, 'model': app.MODEL_NAME}
+    return report(results, args, settings)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""Measure throughput and tail latency of micro-batched inference.
+
+Run from the repository root:
+
+    python -m benchmarks.micro_batching --concurrency 16 --batch-size 16 --wait-ms 10
+"""
+import argparse
+import sys
+
+from app import BACKEND, MODEL_NAME, model_manager
+from batching import MicroBatcher
+from benchmarks.harness import add_baseline_arguments, measure, report
+
+SAMPLE_TEXT = "The delivery was late but the support team sorted it out quickly."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--wait-ms', type=float, default=10)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    model_manager.initialize()
+    tokens, _ = model_manager.encode(SAMPLE_TEXT)
+    batcher = MicroBatcher(model_manager.classify_ids,
+                           max_batch_size=args.batch_size, max_wait_ms=args.wait_ms)
+
+    results = {
+        'unbatched': measure(lambda i: model_manager.classify_ids([tokens]),
+                             args.requests, args.concurrency),
+        'batched': measure(lambda i: batcher.submit(tokens), args.requests, args.concurrency)
+    }
+    print(f"batcher stats: {batcher.stats()}")
+    settings = {'requests': args.requests, 'concurrency': args.concurrency,
+                'batch_size': args.batch_size, 'wait_ms': args.wait_ms,
+                'backend': BACKEND, 'model': MODEL_NAME}
+    return report(results, args, settings)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
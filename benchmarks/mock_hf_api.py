@@ -0,0 +1,102 @@
+"""A local stand-in for the Hugging Face Inference API.
+
+Answers text-classification calls in the API's format with deterministic
+scores, after a configurable delay. It can simulate a model that is still
+loading (503 with ``estimated_time``) and random server errors, so the
+API client can be tested and benchmarked without network access:
+
+    python -m benchmarks.mock_hf_api --port 8008 --latency-ms 40 --cold-start 5
+    SENTIVIZ_HF_API_URL=http://localhost:8008/models/mock python app_api.py
+"""
+import argparse
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+LABELS = ('LABEL_0', 'LABEL_1', 'LABEL_2')
+
+
+class KeepAliveHandler(WSGIRequestHandler):
+    # HTTP/1.1 so clients can reuse connections, as they can with the real API
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; don't hold the body for an ACK
+    disable_nagle_algorithm = True
+
+
+def mock_scores(text):
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+    logits = [digest[i] / 64 for i in range(len(LABELS))]
+    total = sum(math.exp(logit) for logit in logits)
+    scores = [{'label': label, 'score': math.exp(logit) / total}
+              for label, logit in zip(LABELS, logits)]
+    return sorted(scores, key=lambda item: item['score'], reverse=True)
+
+
+def create_app(latency_ms=40, per_item_ms=2, cold_start=0, failure_rate=0.0, seed=20):
+    mock = Flask(__name__)
+    started = time.monotonic()
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    mock.config['calls'] = 0
+
+    @mock.route('/models/<path:model>', methods=['POST'])
+    def classify(model):
+        mock.config['calls'] += 1
+        # Always read the body, or it is parsed as the next keep-alive request
+        inputs = (request.get_json(silent=True) or {}).get('inputs')
+        loading_for = cold_start - (time.monotonic() - started)
+        if loading_for > 0:
+            return jsonify({'error': f"Model {model} is currently loading",
+                            'estimated_time': round(loading_for, 2)}), 503
+        with rng_lock:
+            failed = rng.random() < failure_rate
+        if failed:
+            return jsonify({'error': 'Internal server error'}), 500
+
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if not isinstance(inputs, list) or not inputs:
+            return jsonify({'error': "'inputs' must be a string or a list of strings"}), 400
+        time.sleep((latency_ms + per_item_ms * len(inputs)) / 1000)
+        return jsonify([mock_scores(text) for text in inputs])
+
+    return mock
+
+
+def serve_in_thread(port=0, **options):
+    """Start the mock on a daemon thread; returns ``(server, api_url)``."""
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', port, create_app(**options), threaded=True,
+                         request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, name='mock-hf-api', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.port}/models/mock"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8008)
+    parser.add_argument('--latency-ms', type=float, default=40,
+                        help='fixed delay per API call')
+    parser.add_argument('--per-item-ms', type=float, default=2,
+                        help='extra delay per input in a batched call')
+    parser.add_argument('--cold-start', type=float, default=0,
+                        help='seconds of 503 "model loading" responses after start')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='share of calls answered with a 500')
+    args = parser.parse_args()
+
+    server = make_server('127.0.0.1', args.port, create_app(
+        args.latency_ms, args.per_item_ms, args.cold_start, args.failure_rate),
+        threaded=True, request_handler=KeepAliveHandler)
+    print(f"Mock Inference API on http://127.0.0.1:{args.port}/models/<name>")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Compare the old two-pass /analyze inference with the single-pass path.
+
+Run from the repository root:
+
+    python -m benchmarks.single_pass --repeat 50 --save single-pass.json
+"""
+import argparse
+import sys
+
+from app import BACKEND, MODEL_NAME, model_manager
+from benchmarks.harness import add_baseline_arguments, measure, report
+from sentiment_model import MAX_TOKENS
+
+SAMPLE_TEXT = (
+    "The new update is fantastic, the app feels faster and the battery lasts "
+    "longer, although the settings menu is still a bit confusing. "
+)
+
+
+def two_pass(text):
+    """The pre-refactor path: encode/decode, then two pipeline calls."""
+    tokenizer = model_manager.get_tokenizer()
+    sentiment_analyzer = model_manager.get_sentiment_analyzer()
+    tokens = tokenizer.encode(text, add_special_tokens=True)
+    if len(tokens) > MAX_TOKENS:
+        tokens = tokens[:MAX_TOKENS - 2] + tokens[-2:]
+        text = tokenizer.decode(tokens, skip_special_tokens=True)
+    sentiment_analyzer(text)
+    sentiment_analyzer(text, top_k=None)
+
+
+def single_pass(text):
+    model_manager.classify(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--multiplier', type=int, default=1,
+                        help='repeat the sample text to build longer inputs')
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    text = SAMPLE_TEXT * args.multiplier
+    model_manager.initialize()
+    results = {name: measure(lambda i: func(text), args.repeat, warmup=1)
+               for name, func in (('two_pass', two_pass), ('single_pass', single_pass))}
+    settings = {'repeat': args.repeat, 'multiplier': args.multiplier,
+                'backend': BACKEND, 'model': MODEL_NAME}
+    return report(results, args, settings)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
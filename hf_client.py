@@ -0,0 +1,145 @@
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Worth retrying: rate limiting, "model is loading" and gateway errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HFAPIError(Exception):
+    """The Inference API call failed, after any retries."""
+
+
+class HuggingFaceClient:
+    """Pooled, retrying client for the Hugging Face Inference API.
+
+    One ``requests.Session`` keeps connections alive across calls, and
+    every call runs on a pool of ``max_in_flight`` threads, so that many
+    requests are in flight at most and waiting callers are served in
+    order. ``classify`` sends up to ``max_batch_size`` texts per API
+    call. Connection errors, timeouts and retryable statuses are retried
+    with jittered exponential backoff; for a loading model the API's
+    ``estimated_time`` is used as the delay (capped at ``max_backoff``).
+    """
+
+    def __init__(self, api_url, token=None, timeout=(3.05, 30), max_retries=4,
+                 backoff=0.5, max_backoff=20.0, max_batch_size=16, max_in_flight=8):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_in_flight = max(1, max_in_flight)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"
+
+        self._executor = None
+        self._executor_lock = Lock()
+        self._stats_lock = Lock()
+        self._calls = 0
+        self._items = 0
+        self._retries = 0
+        self._failures = 0
+        self._seconds = 0.0
+
+    def _delay(self, attempt, hint=None):
+        if hint is not None:
+            return min(self.max_backoff, max(self.backoff, hint))
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _hint(response):
+        """Server-suggested wait from a loading model's body or Retry-After."""
+        try:
+            estimated = response.json().get('estimated_time')
+            if estimated is not None:
+                return float(estimated)
+        except (ValueError, AttributeError):
+            pass
+        try:
+            return float(response.headers['Retry-After'])
+        except (KeyError, ValueError):
+            return None
+
+    def _post(self, inputs):
+        payload = {'inputs': inputs, 'options': {'wait_for_model': False}}
+        for attempt in range(self.max_retries + 1):
+            hint = None
+            started = time.perf_counter()
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if response.status_code == 200:
+                    with self._stats_lock:
+                        self._calls += 1
+                        self._items += len(inputs)
+                        self._seconds += time.perf_counter() - started
+                    return response.json()
+                error = f"HTTP {response.status_code}: {response.text[:200].strip()}"
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                hint = self._hint(response)
+            if attempt == self.max_retries:
+                break
+            delay = self._delay(attempt, hint)
+            with self._stats_lock:
+                self._retries += 1
+            logger.warning(f"Inference API call failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+        with self._stats_lock:
+            self._failures += 1
+        raise HFAPIError(error)
+
+    def _classify_batch(self, texts):
+        output = self._post(list(texts))
+        if not isinstance(output, list) or len(output) != len(texts):
+            raise HFAPIError(f"Unexpected API response: {str(output)[:200]}")
+        return [{item['label']: item['score'] for item in row} for row in output]
+
+    def classify(self, texts):
+        """Return one ``{label: score}`` dict per text, in input order."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_in_flight, thread_name_prefix='hf-client')
+        futures = [self._executor.submit(self._classify_batch, texts[i:i + self.max_batch_size])
+                   for i in range(0, len(texts), self.max_batch_size)]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'api_url': self.api_url,
+                'calls': self._calls,
+                'items': self._items,
+                'retries': self._retries,
+                'failures': self._failures,
+                'avg_batch_size': self._items / self._calls if self._calls else 0,
+                'avg_call_ms': self._seconds / self._calls * 1000 if self._calls else 0,
+                'max_in_flight': self.max_in_flight,
+                'max_batch_size': self.max_batch_size
+            }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.session.close()
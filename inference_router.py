@@ -0,0 +1,256 @@
+import logging
+import time
+from collections import Counter
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """No inference backend has room for the request; callers should shed it."""
+
+    def __init__(self, retry_after=1):
+        super().__init__('All inference backends are at capacity')
+        self.retry_after = retry_after
+
+
+class InferenceBackend:
+    """Something the router can send classification work to.
+
+    Subclasses implement ``_classify(texts, token_ids)`` and return one
+    ``{label: score}`` dict per text. The base class counts the texts in
+    flight and keeps a moving average of call latency, which the router
+    reads to decide where new work goes. ``max_pending`` of 0 means no cap.
+    """
+
+    name = None
+    # Local inference scores token IDs, so texts must be tokenized first
+    needs_tokens = False
+
+    def __init__(self, max_pending=0, smoothing=0.2):
+        self.max_pending = max_pending
+        self.smoothing = smoothing
+        self._lock = Lock()
+        self.pending = 0
+        self.latency_ms = None
+        self._calls = 0
+        self._items = 0
+        self._failures = 0
+
+    def saturated(self):
+        return bool(self.max_pending) and self.pending >= self.max_pending
+
+    def ready(self):
+        """Whether work sent here runs at once, without loading anything first."""
+        return True
+
+    def classify(self, texts, token_ids=None):
+        with self._lock:
+            self.pending += len(texts)
+        started = time.perf_counter()
+        try:
+            results = self._classify(texts, token_ids)
+        except Exception:
+            with self._lock:
+                self._failures += 1
+            raise
+        finally:
+            with self._lock:
+                self.pending -= len(texts)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._calls += 1
+            self._items += len(texts)
+            if self.latency_ms is None:
+                self.latency_ms = elapsed_ms
+            else:
+                self.latency_ms += self.smoothing * (elapsed_ms - self.latency_ms)
+        return results
+
+    def _classify(self, texts, token_ids):
+        raise NotImplementedError
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': self.pending,
+                'max_pending': self.max_pending,
+                'calls': self._calls,
+                'items': self._items,
+                'failures': self._failures,
+                'avg_latency_ms': round(self.latency_ms, 2) if self.latency_ms is not None else None
+            }
+
+
+class LocalBackend(InferenceBackend):
+    """The in-process model; single texts share forward passes through ``batcher``."""
+
+    name = 'local'
+    needs_tokens = True
+
+    def __init__(self, model_manager, batcher, max_pending=0):
+        super().__init__(max_pending)
+        self.model_manager = model_manager
+        self.batcher = batcher
+
+    def ready(self):
+        return self.model_manager.ready.is_set()
+
+    def _classify(self, texts, token_ids):
+        if len(token_ids) == 1:
+            return [self.batcher.submit(token_ids[0])]
+        return self.model_manager.classify_ids(token_ids)
+
+    def stats(self):
+        return {**super().stats(), 'batching': self.batcher.stats()}
+
+
+class RemoteBackend(InferenceBackend):
+    """The Hugging Face Inference API; single texts share calls through ``batcher``."""
+
+    name = 'remote'
+
+    def __init__(self, client, batcher, max_pending=0):
+        super().__init__(max_pending)
+        self.client = client
+        self.batcher = batcher
+
+    def _classify(self, texts, token_ids):
+        if len(texts) == 1:
+            return [self.batcher.submit(texts[0])]
+        return self.client.classify(list(texts))
+
+    def stats(self):
+        return {**super().stats(), 'client': self.client.stats(), 'batching': self.batcher.stats()}
+
+
+class InferenceRouter:
+    """Sends each classification to the local model or the remote API.
+
+    Local inference is preferred until ``spill_depth`` texts are pending
+    there, or its average latency passes ``spill_latency_ms`` while work is
+    pending; new work then spills to the remote backend if it has room.
+    While the local model is still loading, work goes remote as well, and
+    callers can skip tokenizing it (see ``wants_tokens()``). A
+    failed remote call is retried locally, and the remote backend is left
+    out for ``cooldown`` seconds. When no backend has room, ``Overloaded``
+    is raised so the request can be rejected at once instead of queueing.
+    """
+
+    def __init__(self, local=None, remote=None, spill_depth=32, spill_latency_ms=0, cooldown=30):
+        if local is None and remote is None:
+            raise ValueError('InferenceRouter needs at least one backend')
+        self.local = local
+        self.remote = remote
+        self.spill_depth = spill_depth
+        self.spill_latency_ms = spill_latency_ms
+        self.cooldown = cooldown
+        self._remote_down_until = 0.0
+        self._lock = Lock()
+        self._routed = Counter()
+        self._fallbacks = 0
+        self._shed = 0
+
+    @property
+    def needs_tokens(self):
+        return self.local is not None
+
+    def _local_busy(self):
+        local = self.local
+        if local.pending >= self.spill_depth:
+            return True
+        return bool(self.spill_latency_ms and local.pending and local.latency_ms
+                    and local.latency_ms > self.spill_latency_ms)
+
+    def remote_available(self):
+        """Whether the remote backend can take work now (not full, not cooling down)."""
+        return (self.remote is not None and not self.remote.saturated()
+                and time.monotonic() >= self._remote_down_until)
+
+    def wants_tokens(self):
+        """Whether to tokenize texts for the next call.
+
+        Not while the local model is still loading and the remote backend
+        can take the work instead.
+        """
+        return self.local is not None and (self.local.ready() or not self.remote_available())
+
+    def choose(self, use_local=True):
+        """Pick the backend for the next request, or raise Overloaded."""
+        local = self.local if use_local else None
+        if local is not None and not local.saturated() and local.ready() and (
+                self.remote is None or not self._local_busy()):
+            return local
+        if self.remote_available():
+            return self.remote
+        if local is not None and not local.saturated():
+            return local
+        with self._lock:
+            self._shed += 1
+        raise Overloaded()
+
+    def classify(self, texts, token_ids=None):
+        """Return one ``{label: score}`` dict per text, in input order.
+
+        Without ``token_ids`` only the remote backend is used.
+        """
+        return self.route(texts, token_ids)[1]
+
+    def route(self, texts, token_ids=None):
+        """Like classify(), but returns ``(backend_name, results)``.
+
+        The name is that of the backend whose scores were returned, after
+        any fallback, so callers can keep results of different models apart.
+        """
+        backend = self.choose(use_local=token_ids is not None)
+        with self._lock:
+            self._routed[backend.name] += len(texts)
+        try:
+            return backend.name, backend.classify(texts, token_ids)
+        except Exception as e:
+            if backend is not self.remote or self.local is None or token_ids is None:
+                raise
+            now = time.monotonic()
+            if now >= self._remote_down_until:
+                logger.warning(f"Remote inference failed ({e}), using local inference "
+                               f"for the next {self.cooldown:.0f}s")
+            self._remote_down_until = now + self.cooldown
+            if self.local.saturated():
+                with self._lock:
+                    self._shed += 1
+                raise Overloaded() from e
+            with self._lock:
+                self._fallbacks += len(texts)
+            return self.local.name, self.local.classify(texts, token_ids)
+
+    def classify_local(self, texts, token_ids):
+        """Classify on the local backend only, for work the API cannot do.
+
+        Counted like routed work, and shed with ``Overloaded`` when the local
+        backend is full rather than spilled.
+        """
+        if self.local is None:
+            raise ValueError('No local inference backend')
+        if self.local.saturated():
+            with self._lock:
+                self._shed += 1
+            raise Overloaded()
+        with self._lock:
+            self._routed[self.local.name] += len(texts)
+        return self.local.classify(texts, token_ids)
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'routed': dict(self._routed),
+                'fallbacks': self._fallbacks,
+                'shed': self._shed,
+                'spill_depth': self.spill_depth,
+                'spill_latency_ms': self.spill_latency_ms,
+                'remote_cooldown_remaining': round(
+                    max(0.0, self._remote_down_until - time.monotonic()), 1)
+            }
+        for backend in (self.local, self.remote):
+            if backend is not None:
+                stats[backend.name] = backend.stats()
+        return stats
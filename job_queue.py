@@ -0,0 +1,359 @@
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from threading import Condition, Event, Lock, Thread
+
+logger = logging.getLogger(__name__)
+
+# job_items.state values
+PENDING, CLAIMED, DONE, FAILED = range(4)
+ITEM_STATES = {PENDING: 'pending', CLAIMED: 'running', DONE: 'done', FAILED: 'failed'}
+
+
+class PriorityGate:
+    """Counts interactive requests in flight so background work can yield to them."""
+
+    def __init__(self):
+        self._condition = Condition()
+        self._active = 0
+
+    @contextmanager
+    def interactive(self):
+        with self._condition:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                if not self._active:
+                    self._condition.notify_all()
+
+    def wait_idle(self, timeout):
+        """Block until no interactive request is running; False if ``timeout`` passed first."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._active, timeout)
+
+    @property
+    def active(self):
+        return self._active
+
+
+class JobQueue:
+    """Persistent queue of bulk analysis jobs, worked off by background threads.
+
+    Each job's texts are rows of ``job_items`` in the database reached
+    through ``connection_factory``. Workers claim them ``chunk_size`` at a
+    time, oldest job first, and pass the texts and the job's options to
+    ``process_fn``, which returns one result dict per text. Claims are
+    made in ``BEGIN IMMEDIATE`` transactions, so worker processes can
+    share the queue, and a claim left unfinished for ``claim_timeout``
+    seconds (its worker died) is handed out again.
+
+    Before each chunk a worker waits up to ``max_defer`` seconds for
+    ``gate`` to report no interactive requests, so those keep priority
+    while the queue still advances. Exceptions listed in ``retryable``
+    put the chunk back for a later attempt; any other error marks its
+    items failed.
+    """
+
+    def __init__(self, connection_factory, process_fn, workers=1, chunk_size=32,
+                 claim_timeout=300, poll_interval=1.0, gate=None, max_defer=2.0,
+                 retryable=(), write_lock=None):
+        self.connection_factory = connection_factory
+        self.process_fn = process_fn
+        self.workers = max(0, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.claim_timeout = claim_timeout
+        self.poll_interval = poll_interval
+        self.gate = gate
+        self.max_defer = max_defer
+        self.retryable = tuple(retryable)
+        self._write_lock = write_lock or Lock()
+        self._threads = []
+        self._start_lock = Lock()
+        self._wakeup = Event()
+        self._stopping = Event()
+        self._stats_lock = Lock()
+        self._chunks = 0
+        self._items = 0
+        self._retries = 0
+        self._deferred_seconds = 0.0
+
+    def init_store(self):
+        with self.connection_factory() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS jobs
+                        (id TEXT PRIMARY KEY,
+                         status TEXT NOT NULL,
+                         total INTEGER NOT NULL,
+                         processed INTEGER NOT NULL DEFAULT 0,
+                         failed INTEGER NOT NULL DEFAULT 0,
+                         options TEXT NOT NULL,
+                         created_at REAL NOT NULL,
+                         started_at REAL,
+                         finished_at REAL)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS job_items
+                        (job_id TEXT NOT NULL,
+                         idx INTEGER NOT NULL,
+                         row_id TEXT,
+                         text TEXT NOT NULL,
+                         state INTEGER NOT NULL,
+                         claimed_at REAL,
+                         sentiment TEXT,
+                         score REAL,
+                         positive_score REAL,
+                         error TEXT,
+                         PRIMARY KEY (job_id, idx)) WITHOUT ROWID''')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)')
+            # Only unfinished items are indexed, so claiming stays cheap on large tables
+            conn.execute(f'''CREATE INDEX IF NOT EXISTS idx_job_items_open
+                        ON job_items(job_id, state, idx) WHERE state < {DONE}''')
+            conn.execute(f'''CREATE INDEX IF NOT EXISTS idx_job_items_claimed
+                        ON job_items(claimed_at) WHERE state = {CLAIMED}''')
+            conn.commit()
+
+    def start(self):
+        """Start the worker threads; safe to call repeatedly."""
+        with self._start_lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = Thread(target=self._run, name=f'job-worker-{len(self._threads)}',
+                                daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def close(self, timeout=10.0):
+        """Stop the workers after their current chunk."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def submit(self, rows, options=None):
+        """Queue a job of ``(row_id, text, error)`` rows; returns its id.
+
+        Rows that already carry an ``error`` are stored as failed items, so
+        results keep one entry per input row.
+        """
+        job_id = uuid.uuid4().hex
+        failed = sum(1 for _, _, error in rows if error is not None)
+        now = time.time()
+        with self._write_lock, self.connection_factory() as conn:
+            try:
+                conn.execute(
+                    '''INSERT INTO jobs (id, status, total, processed, failed, options, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                    (job_id, 'queued' if failed < len(rows) else 'done', len(rows), failed,
+                     failed, json.dumps(options or {}), now))
+                conn.executemany(
+                    '''INSERT INTO job_items (job_id, idx, row_id, text, state, error)
+                    VALUES (?, ?, ?, ?, ?, ?)''',
+                    ((job_id, idx, None if row_id is None else str(row_id), text or '',
+                      PENDING if error is None else FAILED, error)
+                     for idx, (row_id, text, error) in enumerate(rows)))
+                if failed == len(rows):
+                    conn.execute('UPDATE jobs SET finished_at = ? WHERE id = ?', (now, job_id))
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def _claim(self):
+        """Claim the next chunk; returns ``(job_id, options, [(idx, text), ...])`` or None."""
+        now = time.time()
+        with self._write_lock, self.connection_factory() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute(
+                    f'UPDATE job_items SET state = {PENDING}, claimed_at = NULL '
+                    f'WHERE state = {CLAIMED} AND claimed_at < ?', (now - self.claim_timeout,))
+                jobs = conn.execute(
+                    '''SELECT id, options FROM jobs WHERE status IN ('queued', 'running')
+                    ORDER BY created_at''').fetchall()
+                for job in jobs:
+                    items = conn.execute(
+                        f'''SELECT idx, text FROM job_items
+                        WHERE job_id = ? AND state = {PENDING} ORDER BY idx LIMIT ?''',
+                        (job['id'], self.chunk_size)).fetchall()
+                    if not items:
+                        continue
+                    conn.execute(
+                        f'''UPDATE job_items SET state = {CLAIMED}, claimed_at = ?
+                        WHERE job_id = ? AND state = {PENDING} AND idx BETWEEN ? AND ?''',
+                        (now, job['id'], items[0]['idx'], items[-1]['idx']))
+                    conn.execute(
+                        '''UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?)
+                        WHERE id = ?''', (now, job['id']))
+                    conn.commit()
+                    return job['id'], json.loads(job['options']), [
+                        (item['idx'], item['text']) for item in items]
+                conn.commit()
+                return None
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+    def _release(self, job_id, items):
+        with self._write_lock, self.connection_factory() as conn:
+            conn.executemany(
+                f'''UPDATE job_items SET state = {PENDING}, claimed_at = NULL
+                WHERE job_id = ? AND idx = ? AND state = {CLAIMED}''',
+                [(job_id, idx) for idx, _ in items])
+            conn.commit()
+
+    def _complete(self, job_id, items, results, error=None):
+        if error is None:
+            updates = [(DONE, result['sentiment'], result['score'], result['positive_score'],
+                        None, job_id, idx) for (idx, _), result in zip(items, results)]
+        else:
+            updates = [(FAILED, None, None, None, error, job_id, idx) for idx, _ in items]
+        now = time.time()
+        with self._write_lock, self.connection_factory() as conn:
+            try:
+                cursor = conn.executemany(
+                    f'''UPDATE job_items SET state = ?, sentiment = ?, score = ?,
+                    positive_score = ?, error = ?, claimed_at = NULL
+                    WHERE job_id = ? AND idx = ? AND state = {CLAIMED}''', updates)
+                # A stale claim finished by another worker is not counted twice
+                finished = cursor.rowcount
+                conn.execute(
+                    'UPDATE jobs SET processed = processed + ?, failed = failed + ? WHERE id = ?',
+                    (finished, finished if error is not None else 0, job_id))
+                conn.execute(
+                    f'''UPDATE jobs SET status = 'done', finished_at = ?
+                    WHERE id = ? AND status = 'running' AND NOT EXISTS (
+                        SELECT 1 FROM job_items WHERE job_id = ? AND state < {DONE})''',
+                    (now, job_id, job_id))
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+    def _process(self, job_id, options, items):
+        try:
+            results = self.process_fn([text for _, text in items], options)
+        except self.retryable as e:
+            logger.warning(f"Job {job_id}: chunk postponed ({type(e).__name__})")
+            self._release(job_id, items)
+            with self._stats_lock:
+                self._retries += 1
+            return False
+        except Exception as e:
+            logger.error(f"Job {job_id}: chunk of {len(items)} failed: {e}")
+            self._complete(job_id, items, None, error='Analysis failed')
+            return True
+        self._complete(job_id, items, results)
+        return True
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                if self.gate is not None:
+                    started = time.perf_counter()
+                    self.gate.wait_idle(self.max_defer)
+                    with self._stats_lock:
+                        self._deferred_seconds += time.perf_counter() - started
+                claimed = self._claim()
+                if claimed is None:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+                if self._process(*claimed):
+                    with self._stats_lock:
+                        self._chunks += 1
+                        self._items += len(claimed[2])
+                else:
+                    self._stopping.wait(self.poll_interval)
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+                self._stopping.wait(self.poll_interval)
+
+    def get(self, job_id):
+        """Return a job's status and progress, or None if there is no such job."""
+        with self.connection_factory() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {key: row[key] for key in (
+            'id', 'status', 'total', 'processed', 'failed', 'created_at', 'started_at',
+            'finished_at')}
+        job['options'] = json.loads(row['options'])
+        job['progress'] = round(row['processed'] / row['total'], 4) if row['total'] else 1.0
+        if row['started_at']:
+            elapsed = (row['finished_at'] or time.time()) - row['started_at']
+            job['rows_per_sec'] = round(row['processed'] / elapsed, 1) if elapsed > 0 else None
+        return job
+
+    def results(self, job_id, after=-1, limit=100):
+        """Return up to ``limit`` items with an index above ``after``, in input order."""
+        with self.connection_factory() as conn:
+            rows = conn.execute(
+                '''SELECT idx, row_id, text, state, sentiment, score, positive_score, error
+                FROM job_items WHERE job_id = ? AND idx > ? ORDER BY idx LIMIT ?''',
+                (job_id, after, limit)).fetchall()
+        items = []
+        for row in rows:
+            item = {'index': row['idx'], 'id': row['row_id'], 'text': row['text'],
+                    'status': ITEM_STATES[row['state']]}
+            if row['state'] == DONE:
+                item.update(sentiment=row['sentiment'], score=row['score'],
+                            positive_score=row['positive_score'])
+            elif row['state'] == FAILED:
+                item['error'] = row['error']
+            items.append(item)
+        return items
+
+    def cancel(self, job_id):
+        """Drop a job's pending items; returns False if it had already finished."""
+        now = time.time()
+        with self._write_lock, self.connection_factory() as conn:
+            cursor = conn.execute(
+                '''UPDATE jobs SET status = 'cancelled', finished_at = ?
+                WHERE id = ? AND status IN ('queued', 'running')''', (now, job_id))
+            if cursor.rowcount:
+                conn.execute(f'DELETE FROM job_items WHERE job_id = ? AND state = {PENDING}',
+                             (job_id,))
+                conn.execute(
+                    'UPDATE jobs SET total = (SELECT COUNT(*) FROM job_items WHERE job_id = ?) '
+                    'WHERE id = ?', (job_id, job_id))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def prune(self, older_than_seconds):
+        """Delete jobs that finished more than ``older_than_seconds`` ago; returns how many."""
+        cutoff = time.time() - older_than_seconds
+        with self._write_lock, self.connection_factory() as conn:
+            job_ids = [row['id'] for row in conn.execute(
+                '''SELECT id FROM jobs WHERE status IN ('done', 'cancelled')
+                AND finished_at < ?''', (cutoff,))]
+            for job_id in job_ids:
+                conn.execute('DELETE FROM job_items WHERE job_id = ?', (job_id,))
+                conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+            conn.commit()
+        return len(job_ids)
+
+    def stats(self):
+        with self.connection_factory() as conn:
+            counts = dict(conn.execute(
+                'SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+            pending = conn.execute(
+                f'SELECT COUNT(*) FROM job_items WHERE state < {DONE}').fetchone()[0]
+        with self._stats_lock:
+            return {
+                'workers': sum(1 for thread in self._threads if thread.is_alive()),
+                'chunk_size': self.chunk_size,
+                'jobs': counts,
+                'pending_items': pending,
+                'chunks': self._chunks,
+                'items': self._items,
+                'retries': self._retries,
+                'deferred_seconds': round(self._deferred_seconds, 3),
+                'interactive_in_flight': self.gate.active if self.gate is not None else None
+            }
@@ -0,0 +1,170 @@
+import logging
+import math
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rate_limits(spec, defaults):
+    """Parse ``"endpoint=limit/seconds,..."`` into ``{endpoint: (limit, seconds)}``.
+
+    Entries override ``defaults``; the ``default`` entry applies to
+    endpoints without their own limit, and a limit of 0 disables limiting.
+    Negative limits and windows that are not a positive, finite number of
+    seconds are rejected.
+    """
+    limits = dict(defaults)
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            endpoint, rule = item.split('=')
+            limit, seconds = rule.split('/')
+            limit, seconds = int(limit), float(seconds)
+            if limit < 0 or not 0 < seconds < math.inf:
+                raise ValueError
+            limits[endpoint.strip()] = (limit, seconds)
+        except ValueError:
+            raise ValueError(f"Invalid rate limit '{item}', expected endpoint=limit/seconds") from None
+    return limits
+
+
+def _refill(tokens, updated, now, limit, window):
+    if tokens is None:
+        return float(limit)
+    return min(float(limit), tokens + max(0.0, now - updated) * limit / window)
+
+
+def _retry_after(tokens, cost, limit, window):
+    return (cost - tokens) * window / limit
+
+
+class TokenBucketLimiter:
+    """In-process token buckets with constant-time checks and bounded memory.
+
+    Each key holds ``limit`` tokens that refill evenly over ``window``
+    seconds. Buckets are spread over ``stripes`` independently locked LRU
+    maps, so concurrent requests rarely contend, and the least recently
+    seen clients are evicted once ``max_clients`` is reached.
+    """
+
+    def __init__(self, max_clients=100000, stripes=16):
+        # Each stripe: (lock, buckets, {'evictions': n, 'rejections': n})
+        self._stripes = [
+            (Lock(), OrderedDict(), {'evictions': 0, 'rejections': 0})
+            for _ in range(max(1, stripes))
+        ]
+        self._per_stripe = max(1, max_clients // len(self._stripes))
+
+    def hit(self, key, limit, window, cost=1):
+        """Take ``cost`` tokens for ``key``; returns ``(allowed, retry_after_seconds)``."""
+        now = time.monotonic()
+        lock, buckets, counters = self._stripes[hash(key) % len(self._stripes)]
+        with lock:
+            tokens, updated = buckets.get(key, (None, now))
+            tokens = _refill(tokens, updated, now, limit, window)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            else:
+                counters['rejections'] += 1
+            buckets[key] = (tokens, now)
+            buckets.move_to_end(key)
+            if len(buckets) > self._per_stripe:
+                buckets.popitem(last=False)
+                counters['evictions'] += 1
+        return allowed, 0.0 if allowed else _retry_after(tokens, cost, limit, window)
+
+    def stats(self):
+        stats = {'backend': 'memory', 'clients': 0,
+                 'max_clients': self._per_stripe * len(self._stripes),
+                 'evictions': 0, 'rejections': 0}
+        for lock, buckets, counters in self._stripes:
+            with lock:
+                stats['clients'] += len(buckets)
+                stats['evictions'] += counters['evictions']
+                stats['rejections'] += counters['rejections']
+        return stats
+
+
+class SQLiteRateLimiter:
+    """Token buckets in a SQLite file, shared by every process that opens it.
+
+    Each check is one short ``BEGIN IMMEDIATE`` transaction. Rows idle for
+    longer than ``max_idle`` seconds describe full buckets, so they are
+    deleted every ``cleanup_every`` checks without changing any outcome.
+    If the database is unavailable, requests are allowed and the error is
+    logged.
+    """
+
+    def __init__(self, path, max_idle=3600, cleanup_every=1000):
+        self.path = path
+        self.max_idle = max_idle
+        self.cleanup_every = max(1, cleanup_every)
+        self._conn = None
+        self._lock = Lock()
+        self._checks = 0
+        self._rejections = 0
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS rate_limits
+                        (key TEXT PRIMARY KEY,
+                         tokens REAL NOT NULL,
+                         updated REAL NOT NULL)''')
+            self._conn = conn
+        return self._conn
+
+    def hit(self, key, limit, window, cost=1):
+        """Take ``cost`` tokens for ``key``; returns ``(allowed, retry_after_seconds)``."""
+        # Wall-clock time, since the buckets are shared between processes
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    row = conn.execute(
+                        'SELECT tokens, updated FROM rate_limits WHERE key = ?', (key,)
+                    ).fetchone()
+                    tokens, updated = row if row else (None, now)
+                    tokens = _refill(tokens, updated, now, limit, window)
+                    allowed = tokens >= cost
+                    if allowed:
+                        tokens -= cost
+                    conn.execute(
+                        'INSERT OR REPLACE INTO rate_limits (key, tokens, updated) VALUES (?, ?, ?)',
+                        (key, tokens, now))
+                    self._checks += 1
+                    if self._checks % self.cleanup_every == 0:
+                        conn.execute(
+                            'DELETE FROM rate_limits WHERE updated < ?', (now - self.max_idle,))
+                    conn.execute('COMMIT')
+                except sqlite3.Error:
+                    conn.execute('ROLLBACK')
+                    raise
+            except sqlite3.Error as e:
+                logger.error(f"Rate limit store error, allowing request: {e}")
+                return True, 0.0
+            if not allowed:
+                self._rejections += 1
+        return allowed, 0.0 if allowed else _retry_after(tokens, cost, limit, window)
+
+    def stats(self):
+        with self._lock:
+            try:
+                clients = self._connection().execute(
+                    'SELECT COUNT(*) FROM rate_limits').fetchone()[0]
+            except sqlite3.Error:
+                clients = None
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'clients': clients,
+                'rejections': self._rejections
+            }
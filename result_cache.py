@@ -0,0 +1,224 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """Collapse runs of whitespace so trivially different submissions share a key."""
+    return ' '.join(text.split())
+
+
+def cache_key(text, model_id):
+    return hashlib.sha256(f"{model_id}\0{text}".encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache of analysis results keyed on text and model ID.
+
+    The first tier is a bounded in-memory LRU. The optional second tier is
+    an ``analysis_cache`` table reached through ``connection_factory`` (a
+    context manager yielding a sqlite3 connection), so results survive
+    restarts. Writes to it hold ``write_lock``, so they queue behind the
+    application's other writers. Entries older than ``ttl`` seconds are
+    treated as misses; ``ttl=0`` disables expiry. ``prune()`` deletes
+    expired rows and keeps the table to ``max_size`` rows.
+
+    Results of several models can share the cache: ``model_id`` is the
+    default, ``other_model_ids`` are kept alongside it, and entries of any
+    other model are dropped by ``init_store()``.
+    """
+
+    def __init__(self, model_id, max_size=10000, ttl=0, connection_factory=None,
+                 write_lock=None, other_model_ids=()):
+        self.model_id = model_id
+        self.model_ids = (model_id, *other_model_ids)
+        self.max_size = max(0, max_size)
+        self.ttl = ttl
+        self.connection_factory = connection_factory
+        self._write_lock = write_lock or Lock()
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._counters = {
+            'memory_hits': 0,
+            'persistent_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0
+        }
+
+    def init_store(self):
+        """Create the persistent table and drop entries from other models."""
+        if self.connection_factory is None:
+            return
+        with self._write_lock, self.connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''CREATE TABLE IF NOT EXISTS analysis_cache
+                        (key TEXT PRIMARY KEY,
+                         model_id TEXT NOT NULL,
+                         value TEXT NOT NULL,
+                         created_at REAL NOT NULL)''')
+            cursor.execute('''CREATE INDEX IF NOT EXISTS idx_analysis_cache_created
+                        ON analysis_cache(created_at)''')
+            placeholders = ','.join('?' * len(self.model_ids))
+            cursor.execute(
+                f'DELETE FROM analysis_cache WHERE model_id NOT IN ({placeholders})',
+                self.model_ids)
+            if cursor.rowcount:
+                logger.info(
+                    f"Invalidated {cursor.rowcount} cached results from previous models")
+            conn.commit()
+
+    def key(self, text, model_id=None):
+        return cache_key(text, model_id or self.model_id)
+
+    def _expired(self, created_at):
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _remember(self, key, value, created_at):
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def get_many(self, keys, alternates=None):
+        """Return ``{key: value}`` for every key found in either tier.
+
+        ``alternates`` maps a key to the same text's key under another model
+        ID, looked up only when the key itself misses. Hits there are
+        returned under the alternate key.
+        """
+        found = self._fetch(keys)
+        missing = set(keys) - set(found)
+        if alternates:
+            retry = [alternates[key] for key in missing if key in alternates]
+            if retry:
+                found.update(self._fetch(retry))
+                missing = {key for key in missing if alternates.get(key) not in found}
+        self._count('misses', len(missing))
+        return found
+
+    def _fetch(self, keys):
+        found = {}
+        pending = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    pending.append(key)
+                elif self._expired(entry[1]):
+                    del self._entries[key]
+                    self._counters['expirations'] += 1
+                    pending.append(key)
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[0]
+                    self._counters['memory_hits'] += 1
+
+        if pending and self.connection_factory is not None:
+            for key, value, created_at in self._load(pending):
+                if self._expired(created_at):
+                    self._count('expirations')
+                    continue
+                found[key] = value
+                self._remember(key, value, created_at)
+                self._count('persistent_hits')
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def _load(self, keys):
+        placeholders = ','.join('?' * len(keys))
+        try:
+            with self.connection_factory() as conn:
+                rows = conn.execute(
+                    f'''SELECT key, value, created_at FROM analysis_cache
+                    WHERE key IN ({placeholders})''',
+                    keys
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Cache read error: {e}")
+            return []
+        return [(row[0], json.loads(row[1]), row[2]) for row in rows]
+
+    def set_many(self, items, model_id=None):
+        """Store ``{key: value}`` pairs in both tiers, as results of ``model_id``."""
+        model_id = model_id or self.model_id
+        now = time.time()
+        for key, value in items.items():
+            self._remember(key, value, now)
+        if self.connection_factory is None or not items:
+            return
+        try:
+            with self._write_lock, self.connection_factory() as conn:
+                conn.executemany(
+                    '''INSERT OR REPLACE INTO analysis_cache (key, model_id, value, created_at)
+                    VALUES (?, ?, ?, ?)''',
+                    [(key, model_id, json.dumps(value), now)
+                     for key, value in items.items()]
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Cache write error: {e}")
+
+    def set(self, key, value, model_id=None):
+        self.set_many({key: value}, model_id)
+
+    def clear(self, persistent=True):
+        with self._lock:
+            self._entries.clear()
+        if persistent and self.connection_factory is not None:
+            with self._write_lock, self.connection_factory() as conn:
+                conn.execute('DELETE FROM analysis_cache')
+                conn.commit()
+
+    def prune(self):
+        """Delete expired persistent entries and the oldest ones beyond ``max_size``.
+
+        Returns the number of rows deleted.
+        """
+        if self.connection_factory is None:
+            return 0
+        deleted = 0
+        with self._write_lock, self.connection_factory() as conn:
+            if self.ttl > 0:
+                deleted += conn.execute('DELETE FROM analysis_cache WHERE created_at < ?',
+                                        (time.time() - self.ttl,)).rowcount
+            # INSERT OR REPLACE gives every write a new, higher rowid
+            deleted += conn.execute(
+                '''DELETE FROM analysis_cache WHERE rowid <=
+                (SELECT rowid FROM analysis_cache ORDER BY rowid DESC LIMIT 1 OFFSET ?)''',
+                (self.max_size,)).rowcount
+            conn.commit()
+        if deleted:
+            logger.info(f"Pruned {deleted} persistent cache entries")
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        hits = counters['memory_hits'] + counters['persistent_hits']
+        lookups = hits + counters['misses']
+        return {
+            **counters,
+            'size': size,
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'persistent': self.connection_factory is not None,
+            'hit_rate': hits / lookups if lookups else 0
+        }
@@ -0,0 +1,274 @@
+"""Score CSV, JSONL or Parquet files offline with the SentiViz models.
+
+Each input is read in chunks that are fanned out to worker processes. A
+worker loads the model once and writes every scored chunk to its own part
+file, so an interrupted run picks up where it stopped when started again
+with the same arguments:
+
+    python score_files.py reviews.csv tweets.jsonl --output scored/ --workers 4
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('score_files')
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+CHECKPOINT_FILE = 'checkpoint.json'
+
+# Set in each worker process by _init_worker
+_model = None
+_manager = None
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension in ('parquet', 'pq'):
+        return 'parquet'
+    return 'csv'
+
+
+def iter_rows(path, fmt, text_column, id_column):
+    """Yield ``(row_id, text, error)``; rows without an id are numbered.
+
+    ``error`` is None unless the row could not be read, in which case it
+    is reported in the output instead of stopping the run.
+    """
+    if fmt == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Reading Parquet files requires pyarrow (pip install pyarrow)")
+        parquet_file = pq.ParquetFile(path)
+        columns = [text_column]
+        if id_column in parquet_file.schema_arrow.names:
+            columns.append(id_column)
+        index = 0
+        for batch in parquet_file.iter_batches(columns=columns):
+            data = batch.to_pydict()
+            ids = data.get(id_column, [None] * batch.num_rows)
+            for row_id, text in zip(ids, data[text_column]):
+                yield row_id if row_id is not None else index, text, None
+                index += 1
+        return
+
+    with open(path, newline='', encoding='utf-8') as handle:
+        if fmt == 'csv':
+            reader = csv.DictReader(handle)
+            if text_column not in (reader.fieldnames or []):
+                sys.exit(f"{path}: no '{text_column}' column")
+            for index, row in enumerate(reader):
+                yield row.get(id_column) or index, row[text_column], None
+        else:
+            for index, line in enumerate(handle):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield index, None, f"Invalid JSON on line {index + 1}: {e}"
+                    continue
+                if not isinstance(row, dict):
+                    yield index, None, f"Line {index + 1} is not a JSON object"
+                    continue
+                text = row.get(text_column)
+                if text is not None and not isinstance(text, str):
+                    yield row.get(id_column, index), None, f"'{text_column}' is not a string"
+                    continue
+                yield row.get(id_column, index), text, None
+
+
+def iter_chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker(threads, backend):
+    """Pin thread pools and load the models once per worker process.
+
+    Only sentiment_model is imported, not the web app: workers open no
+    database and always score with the local model, whatever
+    SENTIVIZ_INFERENCE_MODE is set to.
+    """
+    global _model, _manager
+    if threads:
+        for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'SENTIVIZ_INTRA_OP_THREADS'):
+            os.environ[variable] = str(threads)
+        os.environ['SENTIVIZ_INTER_OP_THREADS'] = '1'
+    if backend:
+        os.environ['SENTIVIZ_BACKEND'] = backend
+    import sentiment_model
+    _model = sentiment_model
+    _manager = sentiment_model.ModelManager()
+    _manager.initialize()
+
+
+def _score_texts(texts, with_words):
+    """Classify texts in one model call, truncated to the model's limit like /analyze."""
+    encoded = _manager.encode_many(texts)
+    all_scores = _manager.classify_ids([token_ids for token_ids, _ in encoded])
+    results = []
+    for text, (token_ids, truncated), scores in zip(texts, encoded, all_scores):
+        if truncated:
+            text = _manager.tokenizer.decode(token_ids, skip_special_tokens=True)
+        sentiment, confidence, positive_score = _model.label_summary(scores)
+        result = {
+            'text': text,
+            'sentiment': sentiment,
+            'score': confidence,
+            'positive_score': positive_score
+        }
+        if with_words:
+            result['word_sentiments'] = _manager.word_scorer.score_text(text)
+        results.append(result)
+    return results
+
+
+def _score_chunk(rows, part_path, with_words):
+    started = time.perf_counter()
+    texts = [_model.clean_text(text or '').strip() for _, text, _ in rows]
+    valid = [i for i, text in enumerate(texts) if text]
+    results = dict(zip(valid, _score_texts(
+        [texts[i] for i in valid], with_words))) if valid else {}
+
+    tmp_path = part_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        for i, (row_id, _, error) in enumerate(rows):
+            if i in results:
+                record = {'id': row_id, **results[i]}
+            else:
+                record = {'id': row_id, 'error': error or 'No text provided'}
+            handle.write(json.dumps(record) + '\n')
+    os.replace(tmp_path, part_path)
+    return len(rows), time.perf_counter() - started
+
+
+def _check_checkpoint(output_dir, chunk_size):
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if os.path.exists(path):
+        with open(path) as handle:
+            previous = json.load(handle)
+        if previous.get('chunk_size') != chunk_size:
+            sys.exit(f"{output_dir} was written with --chunk-size "
+                     f"{previous.get('chunk_size')}; use it again to resume")
+    else:
+        with open(path, 'w') as handle:
+            json.dump({'chunk_size': chunk_size}, handle)
+
+
+def merge_parts(part_dir, destination):
+    parts = sorted(name for name in os.listdir(part_dir) if name.endswith('.jsonl'))
+    with open(destination, 'w', encoding='utf-8') as out:
+        for name in parts:
+            with open(os.path.join(part_dir, name), encoding='utf-8') as handle:
+                out.write(handle.read())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help='CSV, JSONL or Parquet files')
+    parser.add_argument('--output', required=True, help='directory for scored parts')
+    parser.add_argument('--format', choices=FORMATS,
+                        help='input format (default: from the file extension)')
+    parser.add_argument('--text-column', default='text')
+    parser.add_argument('--id-column', default='id')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--threads-per-worker', type=int, default=0,
+                        help='torch/ONNX threads per worker (default: cores / workers)')
+    parser.add_argument('--backend', choices=('pytorch', 'onnx', 'onnx-int8'))
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--words', action='store_true',
+                        help='include the word-level VADER breakdown')
+    parser.add_argument('--merge', action='store_true',
+                        help='concatenate the parts of each input into one JSONL file')
+    args = parser.parse_args(argv)
+    # Outputs are named after the input's file name, so two inputs with the
+    # same one would share (and on resume, mix) their parts
+    names = [os.path.basename(path) for path in args.inputs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        parser.error(f"inputs must have distinct file names, got more than one {', '.join(duplicates)}")
+
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+    os.makedirs(args.output, exist_ok=True)
+    _check_checkpoint(args.output, args.chunk_size)
+
+    backend = args.backend or os.environ.get('SENTIVIZ_BACKEND', 'pytorch')
+    if backend != 'pytorch':
+        # Export the ONNX graph once here instead of in every worker at once
+        from sentiment_model import MODEL_NAME, export_onnx
+        export_onnx(MODEL_NAME, backend == 'onnx-int8')
+
+    started = time.perf_counter()
+    counts = {'rows': 0, 'skipped': 0, 'failed': 0}
+
+    def collect(futures):
+        for future in futures:
+            try:
+                rows, chunk_seconds = future.result()
+            except Exception as e:
+                logger.error(f"Chunk failed: {e}")
+                counts['failed'] += 1
+                continue
+            counts['rows'] += rows
+            elapsed = time.perf_counter() - started
+            logger.info(f"{counts['rows']} rows scored (chunk {chunk_seconds * 1000:.0f} ms), "
+                        f"{counts['rows'] / elapsed:.1f} rows/sec overall")
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(args.workers, mp_context=context, initializer=_init_worker,
+                             initargs=(threads, args.backend)) as executor:
+        for path in args.inputs:
+            # Keyed on the full file name so reviews.csv and reviews.jsonl don't collide
+            name = os.path.basename(path)
+            part_dir = os.path.join(args.output, name + '.parts')
+            os.makedirs(part_dir, exist_ok=True)
+            fmt = args.format or detect_format(path)
+            logger.info(f"Scoring {path} ({fmt}) into {part_dir}")
+
+            failed_before = counts['failed']
+            pending = set()
+            chunks = iter_chunks(
+                iter_rows(path, fmt, args.text_column, args.id_column), args.chunk_size)
+            for index, chunk in enumerate(chunks):
+                part_path = os.path.join(part_dir, f'part-{index:06d}.jsonl')
+                if os.path.exists(part_path):
+                    counts['skipped'] += 1
+                    continue
+                # Keep a bounded number of chunks in flight so memory stays flat
+                if len(pending) >= args.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(_score_chunk, chunk, part_path, args.words))
+            collect(wait(pending).done)
+
+            if args.merge and counts['failed'] == failed_before:
+                merge_parts(part_dir, os.path.join(args.output, name + '.scored.jsonl'))
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Scored {counts['rows']} rows in {elapsed:.1f}s "
+                f"({counts['rows'] / elapsed if elapsed else 0:.1f} rows/sec); "
+                f"{counts['skipped']} chunks already done, {counts['failed']} failed")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,693 @@
+"""The sentiment model, its runtime backends and the text helpers around it.
+
+Importing this module has no side effects: nothing is loaded and no
+database is touched until a ModelManager is initialized. app.py serves
+it over HTTP, and score_files.py uses it directly for offline scoring.
+"""
+import ctypes
+import gc
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from threading import Condition, Event, Lock, Thread
+
+import nltk
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+from metrics import Histogram
+from word_scoring import WordScorer
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
+MAX_TOKENS = 512
+SENTIMENT_MAP = {'LABEL_0': 'negative',
+                 'LABEL_1': 'neutral', 'LABEL_2': 'positive'}
+
+# Inference backend: 'pytorch', 'onnx' or 'onnx-int8' (dynamically quantized).
+# Thread counts of 0 leave the runtime defaults in place.
+BACKENDS = ('pytorch', 'onnx', 'onnx-int8')
+BACKEND = os.environ.get('SENTIVIZ_BACKEND', 'pytorch')
+ONNX_DIR = os.environ.get('SENTIVIZ_ONNX_DIR', 'onnx_models')
+INTRA_OP_THREADS = int(os.environ.get('SENTIVIZ_INTRA_OP_THREADS', 0))
+INTER_OP_THREADS = int(os.environ.get('SENTIVIZ_INTER_OP_THREADS', 0))
+
+# Delay before a failed warm-up is retried (doubling per failure)
+WARMUP_RETRY_SECONDS = float(os.environ.get('SENTIVIZ_WARMUP_RETRY_SECONDS', 5))
+WARMUP_RETRY_MAX_SECONDS = 300
+
+# Automatic model unloading (0 disables): after this many idle seconds, or
+# when resident memory exceeds the budget
+MODEL_IDLE_TIMEOUT = float(os.environ.get('SENTIVIZ_MODEL_IDLE_TIMEOUT', 0))
+MEMORY_BUDGET_MB = float(os.environ.get('SENTIVIZ_MEMORY_BUDGET_MB', 0))
+MEMORY_CHECK_INTERVAL = float(os.environ.get('SENTIVIZ_MEMORY_CHECK_INTERVAL', 10))
+
+# Inputs of one model call are sorted by length and split so that no
+# padded sub-batch exceeds these limits
+INFER_MAX_BATCH_SIZE = int(os.environ.get('SENTIVIZ_INFER_MAX_BATCH_SIZE', 32))
+INFER_MAX_BATCH_TOKENS = int(os.environ.get('SENTIVIZ_INFER_MAX_BATCH_TOKENS', 8192))
+
+# Long-document mode: overlapping MAX_TOKENS windows whose label
+# distributions are pooled ('mean' is length-weighted, 'max' per label)
+POOLING_METHODS = ('mean', 'max')
+LONG_DOC_OVERLAP = int(os.environ.get('SENTIVIZ_LONG_DOC_OVERLAP', 64))
+LONG_DOC_MAX_WINDOWS = int(os.environ.get('SENTIVIZ_LONG_DOC_MAX_WINDOWS', 16))
+LONG_DOC_POOLING = os.environ.get('SENTIVIZ_LONG_DOC_POOLING', 'mean')
+
+# Registered with the /metrics registry by app.py
+stage_latency = Histogram(
+    'sentiviz_stage_seconds', 'Time spent in each analysis stage.', ['stage'])
+inference_batch_size = Histogram(
+    'sentiviz_inference_batch_size', 'Inputs per model forward pass.',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+
+
+@contextmanager
+def _staged_dir(final_dir, file_name):
+    """Yield a scratch directory that is renamed to ``final_dir`` on success.
+
+    Processes exporting at the same time each write their own copy, and
+    the first rename wins; the others drop theirs. Readers therefore never
+    see a half-written ``final_dir``.
+    """
+    parent = os.path.dirname(final_dir) or '.'
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=parent)
+    try:
+        yield staging
+        try:
+            os.replace(staging, final_dir)
+        except OSError:
+            if not os.path.exists(os.path.join(final_dir, file_name)):
+                raise
+            logger.info(f"{final_dir} was written by another process meanwhile")
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def export_onnx(model_name, quantize):
+    """Export (and optionally quantize) the model once, returning its cache directory."""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    export_dir = os.path.join(ONNX_DIR, model_name.replace('/', '--'))
+    if not os.path.exists(os.path.join(export_dir, 'model.onnx')):
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+        with _staged_dir(export_dir, 'model.onnx') as staging:
+            ORTModelForSequenceClassification.from_pretrained(
+                model_name, export=True).save_pretrained(staging)
+    if not quantize:
+        return export_dir, 'model.onnx'
+
+    quantized_dir = export_dir + '-int8'
+    if not os.path.exists(os.path.join(quantized_dir, 'model_quantized.onnx')):
+        logger.info(f"Quantizing ONNX model to int8 in {quantized_dir}")
+        quantizer = ORTQuantizer.from_pretrained(export_dir)
+        with _staged_dir(quantized_dir, 'model_quantized.onnx') as staging:
+            quantizer.quantize(
+                save_dir=staging,
+                quantization_config=AutoQuantizationConfig.avx2(
+                    is_static=False, per_channel=False)
+            )
+    return quantized_dir, 'model_quantized.onnx'
+
+
+def load_sequence_classifier(model_name=MODEL_NAME, backend=BACKEND,
+                             intra_op_threads=INTRA_OP_THREADS,
+                             inter_op_threads=INTER_OP_THREADS):
+    """Load the sentiment model for ``backend``.
+
+    ONNX graphs are exported to ``ONNX_DIR`` on first use and reused after.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+
+    if backend == 'pytorch':
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        if intra_op_threads:
+            torch.set_num_threads(intra_op_threads)
+        if inter_op_threads:
+            try:
+                torch.set_num_interop_threads(inter_op_threads)
+            except RuntimeError as e:
+                logger.warning(f"Could not set inter-op threads: {e}")
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        return model
+
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    model_dir, file_name = export_onnx(model_name, backend == 'onnx-int8')
+    session_options = onnxruntime.SessionOptions()
+    session_options.intra_op_num_threads = intra_op_threads
+    session_options.inter_op_num_threads = inter_op_threads
+    return ORTModelForSequenceClassification.from_pretrained(
+        model_dir,
+        file_name=file_name,
+        session_options=session_options,
+        provider='CPUExecutionProvider'
+    )
+
+
+def predict_scores(model, tokenizer, batch_ids):
+    """Run one forward pass over pre-tokenized inputs.
+
+    Returns one ``{label: score}`` dict per input covering every label.
+    """
+    import torch
+
+    encoded = tokenizer.pad({'input_ids': batch_ids}, return_tensors='pt')
+    with torch.inference_mode():
+        logits = model(**encoded).logits
+    probabilities = torch.softmax(logits, dim=-1).tolist()
+    id2label = model.config.id2label
+    return [
+        {id2label[i]: score for i, score in enumerate(row)}
+        for row in probabilities
+    ]
+
+
+def current_rss_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def process_memory(pid='self'):
+    """RSS, PSS, shared and private bytes of a process from /proc/<pid>/smaps_rollup.
+
+    PSS divides shared pages between the processes mapping them, so summed
+    over pre-forked workers it shows whether the model weights are really
+    shared. Values are None where smaps_rollup is unavailable.
+    """
+    memory = dict.fromkeys(('rss_bytes', 'pss_bytes', 'shared_bytes', 'private_bytes'))
+    values = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as rollup:
+            for line in rollup:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    values[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    except (OSError, ValueError):
+        return memory
+    memory['rss_bytes'] = values.get('Rss')
+    memory['pss_bytes'] = values.get('Pss')
+    memory['shared_bytes'] = values.get('Shared_Clean', 0) + values.get('Shared_Dirty', 0)
+    memory['private_bytes'] = values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    return memory
+
+
+def release_freed_memory():
+    """Collect garbage and hand freed heap pages back to the OS where glibc allows."""
+    collected = gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    return collected
+
+
+def length_buckets(lengths, max_batch_size=INFER_MAX_BATCH_SIZE,
+                   max_batch_tokens=INFER_MAX_BATCH_TOKENS):
+    """Group input indices by token length so each padded batch stays small.
+
+    Indices are sorted by length and cut into buckets of at most
+    ``max_batch_size`` items whose padded size (items x longest) stays
+    within ``max_batch_tokens``.
+    """
+    buckets = []
+    current = []
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Sorted ascending, so the new item is the longest in the bucket
+        padded = (len(current) + 1) * lengths[index]
+        if current and (len(current) >= max_batch_size or padded > max_batch_tokens):
+            buckets.append(current)
+            current = []
+        current.append(index)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def sliding_windows(token_ids, window=MAX_TOKENS, overlap=LONG_DOC_OVERLAP,
+                    max_windows=LONG_DOC_MAX_WINDOWS):
+    """Split special-token-wrapped ids into overlapping windows of ``window`` tokens.
+
+    Returns ``(start, end, window_ids)`` tuples, where ``start`` and ``end``
+    index the content tokens between the leading and trailing special
+    token. The first window starts at the beginning and the last one ends
+    at the end of the text, with the others evenly spaced in between. As
+    many windows are used as it takes to share at least ``overlap`` tokens
+    between neighbours, up to ``max_windows``. Past that cap the windows
+    no longer meet, and the tokens between them are not scored: the text
+    is sampled rather than covered.
+    """
+    head, content, tail = token_ids[:1], token_ids[1:-1], token_ids[-1:]
+    size = window - 2
+    if len(content) <= size:
+        return [(0, len(content), token_ids)]
+    span = len(content) - size
+    step = max(1, size - overlap)
+    count = min(-(-span // step) + 1, max(1, max_windows))
+    starts = [round(i * span / (count - 1)) for i in range(count)] if count > 1 else [0]
+    return [(start, start + size, head + content[start:start + size] + tail)
+            for start in starts]
+
+
+def pool_scores(window_scores, weights, method=LONG_DOC_POOLING):
+    """Combine per-window label distributions into one distribution.
+
+    ``mean`` averages them weighted by ``weights`` (the windows' token
+    counts); ``max`` keeps each label's highest probability and renormalizes.
+    """
+    labels = window_scores[0]
+    if method == 'max':
+        pooled = {label: max(scores[label] for scores in window_scores) for label in labels}
+    else:
+        pooled = {
+            label: sum(scores[label] * weight for scores, weight in zip(window_scores, weights))
+            for label in labels
+        }
+    total = sum(pooled.values())
+    return {label: value / total for label, value in pooled.items()}
+
+
+def clean_text(text):
+    return re.sub(r'[^\w\s.,!?\'"-]', '', text)
+
+
+def label_summary(scores):
+    """Return ``(sentiment, confidence, positive_score)`` for a label distribution."""
+    top_label = max(scores, key=scores.get)
+    return SENTIMENT_MAP[top_label], scores[top_label], scores.get('LABEL_2', 0)
+
+
+def ensure_vader_lexicon():
+    """Download the VADER lexicon if it is not installed yet."""
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        logger.info("Downloading VADER lexicon")
+        nltk.download('vader_lexicon', quiet=True)
+
+# Singleton pattern for model management
+
+
+class ModelManager:
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(ModelManager, cls).__new__(cls)
+                cls._instance.sentiment_analyzer = None
+                cls._instance.sid = None
+                cls._instance.word_scorer = None
+                cls._instance.tokenizer = None  # Add tokenizer
+                cls._instance.model = None
+                cls._instance.backend = BACKEND
+                cls._instance.initialized = False
+                cls._instance.ready = Event()
+                # Set whenever a warm-up attempt ends, whether it succeeded or not
+                cls._instance.attempt_done = Event()
+                cls._instance.warmup_thread = None
+                cls._instance.warmup_error = None
+                cls._instance.warmup_failures = 0
+                cls._instance.retry_at = 0.0
+                cls._instance.timings = {}
+                cls._instance._load_lock = Lock()
+                # The tokenizer and VADER load quickly, so they have their own
+                # lock instead of waiting behind a model load
+                cls._instance._light_lock = Lock()
+                # In-flight users of the models; unload waits for them
+                cls._instance._usage = Condition()
+                cls._instance._active = 0
+                cls._instance._unloading = False
+                cls._instance.last_used = time.monotonic()
+                cls._instance.load_count = 0
+                cls._instance.unload_count = 0
+                cls._instance.pressure_events = 0
+                cls._instance.pressure_handlers = []
+                cls._instance.monitor_thread = None
+            return cls._instance
+
+    @contextmanager
+    def in_use(self):
+        """Mark the models as busy so they cannot be unloaded underneath a caller."""
+        with self._usage:
+            while self._unloading:
+                self._usage.wait()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._usage:
+                self._active -= 1
+                self.last_used = time.monotonic()
+                self._usage.notify_all()
+
+    def initialize(self):
+        if self.initialized:
+            return
+        with self._load_lock:
+            if self.initialized:
+                return
+            logger.info("Loading sentiment analysis models...")
+            started = time.perf_counter()
+
+            self.initialize_tokenizer()
+            self.model = load_sequence_classifier(MODEL_NAME, self.backend)
+            logger.info(f"Using {self.backend} backend")
+
+            self.initialize_words()
+            self.timings['load_seconds'] = round(time.perf_counter() - started, 3)
+            self.load_count += 1
+            self.last_used = time.monotonic()
+            self.initialized = True
+            logger.info(
+                f"Models loaded successfully in {self.timings['load_seconds']}s")
+
+    def initialize_tokenizer(self):
+        """Load only the tokenizer, which takes far less time than the model."""
+        if self.tokenizer is not None:
+            return
+        with self._light_lock:
+            if self.tokenizer is None:
+                from transformers import AutoTokenizer
+
+                self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+
+    def initialize_words(self):
+        """Load only VADER and the word scorer, without the sentiment model."""
+        if self.word_scorer is not None:
+            return
+        with self._light_lock:
+            if self.word_scorer is None:
+                ensure_vader_lexicon()
+                self.sid = SentimentIntensityAnalyzer()
+                self.word_scorer = WordScorer(self.sid)
+
+    def warm_up(self):
+        """Load the models and run a dummy inference to prime the kernels."""
+        try:
+            self.initialize()
+            started = time.perf_counter()
+            self.classify("Warming up the sentiment model.")
+            self.word_scorer.score_text("Warming up the word scorer.")
+            self.timings['warmup_seconds'] = round(time.perf_counter() - started, 3)
+            self.warmup_error = None
+            self.warmup_failures = 0
+            self.retry_at = 0.0
+            self.ready.set()
+            logger.info(f"Models warmed up in {self.timings['warmup_seconds']}s")
+        except Exception as e:
+            self.warmup_error = str(e)
+            self.warmup_failures += 1
+            delay = min(WARMUP_RETRY_SECONDS * 2 ** (self.warmup_failures - 1),
+                        WARMUP_RETRY_MAX_SECONDS)
+            self.retry_at = time.monotonic() + delay
+            logger.error(f"Model warm-up failed: {e}; retrying in {delay:.0f}s at the earliest")
+        finally:
+            self.attempt_done.set()
+
+    def start_warmup(self):
+        """Warm up in a background thread; safe to call repeatedly.
+
+        After a failed attempt no new one starts until its backoff has
+        passed. Returns False in that case, True if the models are ready
+        or an attempt is running.
+        """
+        with self._lock:
+            self._start_monitor()
+            if self.ready.is_set() or (self.warmup_thread and self.warmup_thread.is_alive()):
+                return True
+            if time.monotonic() < self.retry_at:
+                return False
+            self.attempt_done.clear()
+            self.warmup_thread = Thread(
+                target=self.warm_up, name='model-warmup', daemon=True)
+            self.warmup_thread.start()
+            return True
+
+    def _start_monitor(self):
+        if not (MODEL_IDLE_TIMEOUT or MEMORY_BUDGET_MB):
+            return
+        if self.monitor_thread is None or not self.monitor_thread.is_alive():
+            self.monitor_thread = Thread(
+                target=self._monitor, name='model-memory-monitor', daemon=True)
+            self.monitor_thread.start()
+
+    def add_pressure_handler(self, handler):
+        """Register a callable that frees memory (e.g. caches) when over budget."""
+        self.pressure_handlers.append(handler)
+
+    def _monitor(self):
+        while True:
+            time.sleep(MEMORY_CHECK_INTERVAL)
+            try:
+                self.check_memory()
+            except Exception as e:
+                logger.error(f"Memory monitor error: {e}")
+
+    def check_memory(self):
+        """Unload idle models, and shed caches or models when over the RSS budget."""
+        if not self.initialized:
+            return
+        with self._usage:
+            idle_for = time.monotonic() - self.last_used
+            busy = self._active > 0
+        if MODEL_IDLE_TIMEOUT and not busy and idle_for > MODEL_IDLE_TIMEOUT:
+            if self.unload(min_idle=MODEL_IDLE_TIMEOUT):
+                logger.info(f"Unloaded models after {idle_for:.0f}s idle")
+            return
+
+        budget = MEMORY_BUDGET_MB * 1024 * 1024
+        if not budget or current_rss_bytes() <= budget:
+            return
+        self.pressure_events += 1
+        for handler in self.pressure_handlers:
+            handler()
+        release_freed_memory()
+        rss = current_rss_bytes()
+        if rss > budget and not busy:
+            logger.warning(
+                f"RSS {rss / 2**20:.0f} MB over the {MEMORY_BUDGET_MB:.0f} MB budget, unloading models")
+            self.unload()
+
+    def wait_until_ready(self, timeout):
+        """Wait up to ``timeout`` seconds for a running warm-up attempt to end.
+
+        Returns at once while a failed attempt is backing off.
+        """
+        if self.ready.is_set():
+            return True
+        if self.start_warmup():
+            self.attempt_done.wait(timeout)
+        return self.ready.is_set()
+
+    def status(self):
+        if self.ready.is_set():
+            state = 'ready'
+        elif self.warmup_thread and self.warmup_thread.is_alive():
+            state = 'warming'
+        elif self.warmup_error:
+            state = 'failed'
+        else:
+            state = 'idle'
+        status = {'status': state, 'backend': self.backend, **self.timings}
+        if state == 'failed':
+            status['error'] = self.warmup_error
+            status['retry_in'] = round(max(0.0, self.retry_at - time.monotonic()), 1)
+        return status
+
+    def get_sentiment_analyzer(self):
+        """Build the transformers pipeline on first use; /analyze does not need it."""
+        self.initialize()
+        if self.sentiment_analyzer is None:
+            if self.backend == 'pytorch':
+                from transformers import pipeline
+            else:
+                from optimum.pipelines import pipeline
+            kwargs = {} if self.backend == 'pytorch' else {'accelerator': 'ort'}
+            self.sentiment_analyzer = pipeline(
+                "text-classification",
+                model=self.model,
+                tokenizer=self.tokenizer,
+                **kwargs
+            )
+        return self.sentiment_analyzer
+
+    def get_vader_analyzer(self):
+        with self.in_use():
+            self.initialize_words()
+            return self.sid
+
+    def get_tokenizer(self):
+        with self.in_use():
+            self.initialize_tokenizer()
+            return self.tokenizer
+
+    def get_word_scorer(self):
+        with self.in_use():
+            self.initialize_words()
+            return self.word_scorer
+
+    @staticmethod
+    def _truncate(token_ids):
+        if len(token_ids) > MAX_TOKENS:
+            return token_ids[:MAX_TOKENS - 2] + token_ids[-2:], True
+        return token_ids, False
+
+    def encode(self, text):
+        """Tokenize text once, keeping the first 510 and last 2 tokens of long inputs."""
+        tokenizer = self.get_tokenizer()  # holds its own reference if unloaded meanwhile
+        with stage_latency.time(stage='tokenize'):
+            return self._truncate(tokenizer.encode(text, add_special_tokens=True))
+
+    def encode_many(self, texts):
+        """Tokenize a list of texts in one tokenizer call, truncated like encode()."""
+        if not texts:
+            return []
+        tokenizer = self.get_tokenizer()
+        with stage_latency.time(stage='tokenize'):
+            encoded = tokenizer(list(texts), add_special_tokens=True)['input_ids']
+            return [self._truncate(token_ids) for token_ids in encoded]
+
+    def classify_ids(self, batch_ids):
+        """Score pre-tokenized inputs in length-bucketed forward passes.
+
+        Results are returned in input order.
+        """
+        results = [None] * len(batch_ids)
+        with self.in_use():
+            self.initialize()
+            for bucket in length_buckets([len(ids) for ids in batch_ids]):
+                inference_batch_size.observe(len(bucket))
+                with stage_latency.time(stage='inference'):
+                    scores = predict_scores(
+                        self.model, self.tokenizer, [batch_ids[i] for i in bucket])
+                for index, item in zip(bucket, scores):
+                    results[index] = item
+        return results
+
+    def classify_long(self, text, pooling=LONG_DOC_POOLING, classify_ids=None):
+        """Classify text of any length over overlapping windows.
+
+        All windows go through classify_ids together, or through the
+        ``classify_ids`` callable when one is given. Returns
+        ``(scores, chunks)``: the pooled label distribution and, per window,
+        its content token span, character span (fast tokenizers only) and
+        ``scores``.
+        """
+        tokenizer = self.get_tokenizer()
+        with_offsets = getattr(tokenizer, 'is_fast', False)
+        with stage_latency.time(stage='tokenize'):
+            encoded = tokenizer(text, add_special_tokens=True, return_offsets_mapping=with_offsets)
+        windows = sliding_windows(encoded['input_ids'])
+        window_scores = (classify_ids or self.classify_ids)([ids for _, _, ids in windows])
+
+        offsets = encoded.get('offset_mapping')
+        chunks = []
+        for (start, end, _), scores in zip(windows, window_scores):
+            chunk = {'start_token': start, 'end_token': end}
+            if offsets:
+                # Content token i sits at position i + 1, after the leading special token
+                chunk['start_char'] = offsets[start + 1][0]
+                chunk['end_char'] = offsets[end][1]
+            chunk['scores'] = scores
+            chunks.append(chunk)
+        weights = [end - start for start, end, _ in windows]
+        return pool_scores(window_scores, weights, pooling), chunks
+
+    def classify(self, text):
+        """Classify a single text with one tokenization and one forward pass.
+
+        Returns ``(scores, token_ids, truncated)`` where ``scores`` maps every
+        label to its probability.
+        """
+        token_ids, truncated = self.encode(text)
+        scores = self.classify_ids([token_ids])[0]
+        return scores, token_ids, truncated
+
+    def unload(self, min_idle=0):
+        """Release the models once in-flight inference has finished.
+
+        New users wait until the unload completes; the next request
+        triggers a background reload through the warm-up path. With
+        ``min_idle`` the unload is skipped if the models were used more
+        recently than that many seconds ago.
+        """
+        with self._usage:
+            if self._unloading:
+                return False
+            self._unloading = True
+            while self._active:
+                self._usage.wait()
+            if min_idle and time.monotonic() - self.last_used < min_idle:
+                self._unloading = False
+                self._usage.notify_all()
+                return False
+        try:
+            self.cleanup()
+        finally:
+            with self._usage:
+                self._unloading = False
+                self._usage.notify_all()
+        return True
+
+    def memory_stats(self):
+        with self._usage:
+            active = self._active
+            idle_for = time.monotonic() - self.last_used
+        sharing = process_memory()
+        return {
+            'pid': os.getpid(),
+            'rss_bytes': current_rss_bytes(),
+            'pss_bytes': sharing['pss_bytes'],
+            'shared_bytes': sharing['shared_bytes'],
+            'private_bytes': sharing['private_bytes'],
+            'memory_budget_mb': MEMORY_BUDGET_MB,
+            'idle_timeout': MODEL_IDLE_TIMEOUT,
+            'loaded': self.initialized,
+            'in_flight': active,
+            'idle_seconds': round(idle_for, 1),
+            'load_count': self.load_count,
+            'unload_count': self.unload_count,
+            'pressure_events': self.pressure_events
+        }
+
+    def cleanup(self):
+        """Drop the models immediately; use unload() while requests may be running."""
+        with self._load_lock, self._light_lock:
+            if not self.initialized:
+                return
+            self.ready.clear()
+            self.initialized = False
+            self.unload_count += 1
+            del self.sentiment_analyzer
+            del self.sid
+            del self.word_scorer
+            del self.tokenizer
+            del self.model
+            self.sentiment_analyzer = None
+            self.sid = None
+            self.word_scorer = None
+            self.tokenizer = None
+            self.model = None
+            release_freed_memory()
+            logger.info("Model resources released")
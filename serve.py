@@ -0,0 +1,187 @@
+"""Serve SentiViz from pre-forked worker processes that share the model weights.
+
+The parent process loads the models once and then forks the workers, which
+accept connections on one shared socket. The weights stay in pages the
+workers share copy-on-write instead of being loaded once per worker:
+
+    python serve.py --workers 4 --threads-per-worker 4 --port 5000
+
+Every ``--report-interval`` seconds the parent logs each worker's RSS, PSS
+and private memory; summed PSS is the real footprint of the whole group.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+import uuid
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('serve')
+
+# Set by main() once the thread settings are in the environment
+app = None
+
+
+def configure_threads(threads):
+    """Pin torch/ONNX thread pools before the model is imported."""
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'SENTIVIZ_INTRA_OP_THREADS'):
+        os.environ[variable] = str(threads)
+    os.environ['SENTIVIZ_INTER_OP_THREADS'] = '1'
+
+
+def run_worker(sock):
+    """Serve requests on the inherited socket until SIGTERM; never returns."""
+    from werkzeug.serving import make_server
+
+    code = 0
+    try:
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        signal.signal(signal.SIGINT, lambda *_: sys.exit(0))
+        # Snapshot versions are per process, so ETags must be too
+        app.STATS_ETAG_PREFIX = uuid.uuid4().hex[:8]
+        if app.inference_router.needs_tokens:
+            app.model_manager.start_warmup()
+        app.job_queue.start()
+        host, port = sock.getsockname()[:2]
+        server = make_server(host, port, app.app, threaded=True, fd=sock.fileno())
+        logger.info(f"Worker {os.getpid()} serving on {host}:{port}")
+        server.serve_forever()
+    except SystemExit as e:
+        code = e.code or 0
+    except Exception as e:
+        logger.error(f"Worker {os.getpid()} failed: {e}")
+        code = 1
+    finally:
+        app.job_queue.close()
+        app.write_queue.close()
+        logging.shutdown()
+        # Skip the parent's stack and exit handlers inherited through fork
+        os._exit(code)
+
+
+def spawn(sock):
+    pid = os.fork()
+    if pid == 0:
+        run_worker(sock)
+    return pid
+
+
+def report_memory(workers):
+    from sentiment_model import process_memory
+
+    parent = process_memory()
+    rows = [(pid, process_memory(pid)) for pid in sorted(workers)]
+    total_pss = sum(memory['pss_bytes'] or 0 for _, memory in rows) + (parent['pss_bytes'] or 0)
+    for pid, memory in rows:
+        if memory['rss_bytes'] is None:
+            continue
+        logger.info(f"worker {pid}: rss={memory['rss_bytes'] / 2**20:.0f}MB "
+                    f"pss={memory['pss_bytes'] / 2**20:.0f}MB "
+                    f"private={memory['private_bytes'] / 2**20:.0f}MB "
+                    f"shared={memory['shared_bytes'] / 2**20:.0f}MB")
+    logger.info(f"{len(rows)} workers + parent: total pss={total_pss / 2**20:.0f}MB")
+
+
+def stop_workers(workers, timeout):
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + timeout
+    while workers and time.monotonic() < deadline:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            workers.discard(pid)
+        else:
+            time.sleep(0.1)
+    for pid in workers:
+        logger.warning(f"Killing worker {pid} after {timeout}s")
+        os.kill(pid, signal.SIGKILL)
+
+
+def main(argv=None):
+    global app
+
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=max(1, cores // 4))
+    parser.add_argument('--threads-per-worker', type=int, default=0,
+                        help='torch/ONNX threads per worker (default: cores / workers)')
+    parser.add_argument('--backlog', type=int, default=1024)
+    parser.add_argument('--report-interval', type=float, default=60,
+                        help='seconds between worker memory reports (0 disables)')
+    parser.add_argument('--graceful-timeout', type=float, default=30)
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, 'fork'):
+        sys.exit("serve.py needs os.fork(); use 'python app.py' on this platform")
+
+    threads = args.threads_per_worker or max(1, cores // args.workers)
+    configure_threads(threads)
+    import app as app_module
+    app = app_module
+
+    # Load the weights once, before forking; each worker warms up on its own
+    if app.inference_router.needs_tokens:
+        app.model_manager.initialize()
+    else:
+        app.model_manager.initialize_words()
+    # Forked processes must not share SQLite connections
+    app.DatabaseManager.close_all()
+    gc.collect()
+    # Keep the collector from touching (and so copying) the preloaded objects
+    gc.freeze()
+
+    sock = socket.create_server((args.host, args.port), backlog=args.backlog)
+    logger.info(f"Starting {args.workers} workers with {threads} threads each "
+                f"on {args.host}:{args.port}")
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+
+    workers = {spawn(sock) for _ in range(args.workers)}
+    next_report = time.monotonic() + args.report_interval
+    next_maintenance = time.monotonic() + app.MAINTENANCE_INTERVAL
+    while not stopping:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            workers.discard(pid)
+            logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, "
+                           f"starting a new one")
+            workers.add(spawn(sock))
+            continue
+        if args.report_interval and time.monotonic() >= next_report:
+            report_memory(workers)
+            next_report = time.monotonic() + args.report_interval
+        if app.MAINTENANCE_INTERVAL > 0 and time.monotonic() >= next_maintenance:
+            # Runs here rather than in a thread, so later forks never inherit a held lock
+            try:
+                app.run_db_maintenance()
+            except Exception as e:
+                logger.error(f"Database maintenance error: {e}")
+            app.DatabaseManager.close_all()
+            next_maintenance = time.monotonic() + app.MAINTENANCE_INTERVAL
+        time.sleep(0.5)
+
+    logger.info("Shutting down workers")
+    stop_workers(workers, args.graceful_timeout)
+    sock.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
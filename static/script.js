@@ -10,6 +10,9 @@ const contentTabs = document.querySelectorAll(".content-tab");
 const themeSwitch = document.getElementById("checkbox");
 
 let currentAnalysis = null;
+let trendData = null;
+// Buckets per trend line; the server downsamples longer ranges to fit
+const TREND_POINTS = 120;
 const DEBOUNCE_DELAY = 1000;
 let liveAnalysisHandler = null;
 
@@ -33,9 +36,14 @@ themeSwitch.addEventListener("change", function() {
     document.body.classList.toggle("dark-mode", this.checked);
     localStorage.setItem("theme", this.checked ? "dark" : "light");
     if (currentAnalysis) updateVisualizations(currentAnalysis);
-    if (document.getElementById("dashboard-tab").classList.contains("active")) updateDashboardCharts();
+    if (document.getElementById("dashboard-tab").classList.contains("active")) {
+        updateDashboardCharts();
+        plotTrends();
+    }
 });
 
+document.getElementById("trendRange").addEventListener("change", loadTrends);
+
 // Initialize theme
 function initTheme() {
     if (localStorage.getItem("theme") === "dark") {
@@ -266,6 +274,37 @@ async function loadStats() {
     } catch (error) {
         console.error('Stats error:', error);
     }
+    loadTrends();
+}
+
+async function loadTrends() {
+    const days = Number(document.getElementById('trendRange').value);
+    // "All time" starts at the epoch; the server clamps it to the first analysis
+    const start = days ? Math.floor(Date.now() / 1000) - days * 86400 : 0;
+    try {
+        const response = await fetch(`/stats/timeseries?start=${start}&bucket=auto&max_points=${TREND_POINTS}`);
+        const data = await response.json();
+        if (data.error) throw new Error(data.error);
+        trendData = data;
+        plotTrends();
+    } catch (error) {
+        console.error('Trends error:', error);
+    }
+}
+
+function plotTrends() {
+    const isDark = isDarkMode();
+    const points = trendData ? trendData.points : [];
+    const x = points.map(p => new Date(p.t));
+    const line = (name, key, light, dark) => ({
+        type: 'scatter', mode: points.length > 40 ? 'lines' : 'lines+markers', name,
+        x, y: points.map(p => p[key] || 0), line: { color: isDark ? dark : light }
+    });
+    Plotly.newPlot('sentimentTrends', [
+        line('Positive', 'positive', 'green', '#7f7'),
+        line('Neutral', 'neutral', '#cc7700', '#ff7'),
+        line('Negative', 'negative', 'red', '#f77')
+    ], { ...getPlotlyLayout('sentimentTrends'), height: 300, xaxis: { title: 'Date', type: 'date' }, yaxis: { title: 'Count' }, legend: { orientation: 'h', y: 1.1 } });
 }
 
 function updateDashboardCharts(data = {total: 0, positive: 0, neutral: 0, negative: 0}) {
@@ -276,17 +315,6 @@ function updateDashboardCharts(data = {total: 0, positive: 0, neutral: 0, negati
         y: [data.positive || 0, data.neutral || 0, data.negative || 0],
         marker: { color: isDark ? ['#7f7', '#ff7', '#f77'] : ['green', '#cc7700', 'red'] }
     }], { ...getPlotlyLayout('sentimentDistribution'), height: 300, xaxis: { title: 'Sentiment' }, yaxis: { title: 'Count' } });
-
-    const dates = Array.from({ length: 7 }, (_, i) => {
-        const d = new Date();
-        d.setDate(d.getDate() - i);
-        return d.toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
-    }).reverse();
-    Plotly.newPlot('sentimentTrends', [
-        { type: 'scatter', mode: 'lines+markers', name: 'Positive', x: dates, y: dates.map(() => Math.floor((data.positive || 1) * (0.7 + Math.random() * 0.3))), line: { color: isDark ? '#7f7' : 'green' } },
-        { type: 'scatter', mode: 'lines+markers', name: 'Neutral', x: dates, y: dates.map(() => Math.floor((data.neutral || 1) * (0.7 + Math.random() * 0.3))), line: { color: isDark ? '#ff7' : '#cc7700' } },
-        { type: 'scatter', mode: 'lines+markers', name: 'Negative', x: dates, y: dates.map(() => Math.floor((data.negative || 1) * (0.7 + Math.random() * 0.3))), line: { color: isDark ? '#f77' : 'red' } }
-    ], { ...getPlotlyLayout('sentimentTrends'), height: 300, xaxis: { title: 'Date' }, yaxis: { title: 'Count' }, legend: { orientation: 'h', y: 1.1 } });
 }
 
 function loadHistory() {
@@ -0,0 +1,52 @@
+"""Shared fixtures; the modules under test live at the repository root."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def mock_api():
+    """Start mock Inference API servers: ``mock_api(**options)`` returns its URL."""
+    from benchmarks.mock_hf_api import serve_in_thread
+
+    servers = []
+
+    def start(**options):
+        options.setdefault('latency_ms', 0)
+        options.setdefault('per_item_ms', 0)
+        server, url = serve_in_thread(**options)
+        servers.append(server)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture(scope='session')
+def app_module(mock_api, tmp_path_factory):
+    """app.py in remote mode against the mock API, writing synchronously to a temporary database."""
+    settings = {
+        'SENTIVIZ_INFERENCE_MODE': 'remote',
+        'SENTIVIZ_HF_API_URL': mock_api(),
+        'SENTIVIZ_HF_BATCH_WAIT_MS': '0',
+        'SENTIVIZ_DB_WRITE_MODE': 'sync',
+        'SENTIVIZ_RATE_LIMITS': 'default=0/1,analyze_batch=0/1,analyze_stream=0/1,submit_job=0/1'
+    }
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in settings.items():
+            patch.setenv(name, value)
+        # DatabaseManager.DB_PATH is relative to the working directory
+        patch.chdir(tmp_path_factory.mktemp('app'))
+        import app
+        yield app
+        app.job_queue.close()
+        app.write_queue.close()
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
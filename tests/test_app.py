@@ -0,0 +1,202 @@
+"""End-to-end tests of the HTTP API through Flask's test client.
+
+The app runs in remote mode against the mock Inference API, with
+synchronous database writes, so every response reflects the stored rows.
+"""
+import json
+import sqlite3
+import time
+
+import pytest
+
+from benchmarks.mock_hf_api import mock_scores
+from sentiment_model import label_summary
+
+
+def expected(text):
+    sentiment, score, positive_score = label_summary(
+        {item['label']: item['score'] for item in mock_scores(text)})
+    return {'sentiment': sentiment, 'score': score, 'positive_score': positive_score}
+
+
+def wait_for_job(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f'/jobs/{job_id}').get_json()
+        if job['status'] in ('done', 'cancelled') or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def test_analyze_scores_and_stores_the_text(client):
+    total = client.get('/stats').get_json()['total']
+    response = client.post('/analyze', json={'text': 'What a great day it was'})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert {key: body[key] for key in ('sentiment', 'score', 'positive_score')} == expected(
+        'What a great day it was')
+    assert [item['text'] for item in body['word_sentiments']] == ['What', 'great', 'day', 'was']
+    assert next(item for item in body['word_sentiments'] if item['text'] == 'great')[
+        'sentiment'] == 'positive'
+
+    stats = client.get('/stats').get_json()
+    assert stats['total'] == total + 1
+    assert stats['recent'][0]['text'] == 'What a great day it was'
+
+
+def test_analyze_serves_repeated_texts_from_the_cache(client, app_module):
+    client.post('/analyze', json={'text': 'cached   text'})
+    calls = app_module.hf_client.stats()['calls']
+    hits = app_module.result_cache.stats()['memory_hits']
+
+    response = client.post('/analyze', json={'text': 'cached text'})
+    assert response.get_json()['sentiment'] == expected('cached text')['sentiment']
+    assert app_module.hf_client.stats()['calls'] == calls
+    assert app_module.result_cache.stats()['memory_hits'] == hits + 1
+
+
+@pytest.mark.parametrize('body, error', [
+    ({'text': '   '}, 'No text provided'),
+    ({'text': 'hi', 'mode': 'fast'}, "mode must be 'standard' or 'long'"),
+    ({'text': 'hi', 'mode': 'long'}, "mode 'long' needs local inference"),
+])
+def test_analyze_rejects_bad_input(client, body, error):
+    response = client.post('/analyze', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+
+
+def test_analyze_batch_keeps_input_order(client):
+    texts = ['good', 'bad movie', 'good', 'just fine']
+    response = client.post('/analyze-batch', json={'texts': texts})
+
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['text'] for result in results] == texts
+    assert [result['sentiment'] for result in results] == [
+        expected(text)['sentiment'] for text in texts]
+
+
+def test_analyze_stream_keeps_input_order(client):
+    lines = ['{"id": 1, "text": "good"}', 'not json', '{"id": 3, "text": "bad movie"}',
+             '{"id": 4, "text": " "}', '{"id": 5, "text": "just fine"}']
+    response = client.post('/analyze-stream?chunk_size=4', data='\n'.join(lines) + '\n',
+                           content_type='application/x-ndjson')
+
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    rows = [record for record in records if record['type'] in ('result', 'error')]
+    assert [(row['type'], row['line']) for row in rows] == [
+        ('result', 1), ('error', 2), ('result', 3), ('error', 4), ('result', 5)]
+    assert rows[2]['sentiment'] == expected('bad movie')['sentiment']
+    assert [record['chunk_rows'] for record in records if record['type'] == 'progress'] == [2, 1]
+    assert records[-1] == {**records[-1], 'type': 'summary', 'processed': 3, 'errors': 2,
+                           'chunks': 2}
+
+
+def test_remote_results_are_cached_under_the_api_model_id(app_module):
+    assert app_module.CACHE_MODEL_IDS == {'remote': f"api:{app_module.HF_API_URL}"}
+    assert app_module.result_cache.model_id == app_module.CACHE_MODEL_IDS['remote']
+
+
+def test_jobs_run_in_the_background(client):
+    response = client.post('/jobs', json={'texts': ['good', ' ', 'bad', 'fine'], 'persist': False})
+    assert response.status_code == 202
+    job_id = response.get_json()['id']
+    assert response.headers['Location'].endswith(f'/jobs/{job_id}')
+
+    job = wait_for_job(client, job_id)
+    assert (job['status'], job['total'], job['processed'], job['failed']) == ('done', 4, 4, 1)
+
+    page = client.get(f'/jobs/{job_id}/results?limit=3').get_json()
+    assert [item['status'] for item in page['results']] == ['done', 'failed', 'done']
+    assert page['results'][0]['sentiment'] == expected('good')['sentiment']
+    assert page['next_after'] == 2
+    rest = client.get(f"/jobs/{job_id}/results?after={page['next_after']}").get_json()
+    assert [item['text'] for item in rest['results']] == ['fine']
+    assert rest['next_after'] is None
+
+    assert client.delete(f'/jobs/{job_id}').status_code == 409
+
+
+def test_persisted_jobs_are_stored(client):
+    total = client.get('/stats').get_json()['total']
+    job_id = client.post('/jobs', json={'texts': ['one text', 'another'], 'persist': True}
+                         ).get_json()['id']
+
+    assert wait_for_job(client, job_id)['status'] == 'done'
+    assert client.get('/stats').get_json()['total'] == total + 2
+
+
+@pytest.mark.parametrize('body', [{'texts': 'good'}, {'texts': []}, {'texts': ['a'], 'persist': 1}])
+def test_jobs_reject_bad_input(client, body):
+    assert client.post('/jobs', json=body).status_code == 400
+
+
+def test_unknown_jobs_are_not_found(client):
+    assert client.get('/jobs/nope').status_code == 404
+    assert client.delete('/jobs/nope').status_code == 404
+    assert client.get('/jobs/nope/results').status_code == 404
+
+
+def test_stats_etag_answers_304_until_stats_change(client):
+    first = client.get('/stats')
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    unchanged = client.get('/stats', headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304
+    assert unchanged.data == b''
+    assert unchanged.headers['ETag'] == etag
+
+    client.post('/analyze', json={'text': 'stats change after this'})
+    changed = client.get('/stats', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()['total'] == first.get_json()['total'] + 1
+
+
+def test_stats_recent_keeps_the_newest_five(client):
+    texts = [f'recent text number {i}' for i in range(7)]
+    for text in texts:
+        client.post('/analyze', json={'text': text})
+
+    recent = client.get('/stats').get_json()['recent']
+    assert [entry['text'] for entry in recent] == texts[:1:-1]
+
+
+def test_stats_counts_rows_written_by_other_processes(client, app_module):
+    before = client.get('/stats')
+    conn = sqlite3.connect(app_module.DatabaseManager.DB_PATH)
+    with conn:
+        conn.execute(
+            """INSERT INTO analyses (text, sentiment, score, positive_score, word_sentiments)
+            VALUES ('from another worker', 'negative', 0.8, 0.1, '[]')""")
+        conn.execute(
+            """UPDATE analytics SET analysis_count = analysis_count + 1,
+            negative_count = negative_count + 1
+            WHERE date = (SELECT MAX(date) FROM analytics)""")
+    conn.close()
+
+    after = client.get('/stats', headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200
+    stats = after.get_json()
+    assert stats['total'] == before.get_json()['total'] + 1
+    assert stats['recent'][0]['text'] == 'from another worker'
+
+
+def test_snapshot_errors_do_not_fail_committed_writes(client, app_module, monkeypatch):
+    manager = app_module.DatabaseManager
+    total = client.get('/stats').get_json()['total']
+
+    def broken(*args):
+        raise RuntimeError('snapshot bug')
+    monkeypatch.setattr(manager, '_update_stats', broken)
+    # A False result or an exception would make the write-behind queue retry
+    assert manager.store_analyses([('committed once', 'positive', 0.9, 0.9, [])]) is True
+    monkeypatch.undo()
+
+    stats = client.get('/stats').get_json()
+    assert stats['total'] == total + 1
+    assert stats['recent'][0]['text'] == 'committed once'
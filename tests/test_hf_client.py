@@ -0,0 +1,64 @@
+"""Tests for the Inference API client against the local mock server."""
+import pytest
+
+from benchmarks.mock_hf_api import mock_scores
+from hf_client import HFAPIError, HuggingFaceClient
+
+
+@pytest.fixture
+def make_client():
+    clients = []
+
+    def make(url, **options):
+        options.setdefault('backoff', 0.01)
+        client = HuggingFaceClient(url, **options)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def expected(text):
+    return {item['label']: item['score'] for item in mock_scores(text)}
+
+
+def test_classify_batches_texts_in_order(mock_api, make_client):
+    client = make_client(mock_api(), max_batch_size=2, max_in_flight=2)
+    texts = [f'text {i}' for i in range(5)]
+
+    assert client.classify(texts) == [expected(text) for text in texts]
+    stats = client.stats()
+    assert (stats['calls'], stats['items'], stats['retries']) == (3, 5, 0)
+
+
+def test_loading_model_is_retried(mock_api, make_client):
+    client = make_client(mock_api(cold_start=0.3), max_retries=10)
+
+    assert client.classify(['good']) == [expected('good')]
+    assert client.stats()['retries'] >= 1
+
+
+def test_errors_are_raised_after_the_last_retry(mock_api, make_client):
+    client = make_client(mock_api(failure_rate=1.0), max_retries=2)
+
+    with pytest.raises(HFAPIError, match='HTTP 500'):
+        client.classify(['good'])
+    stats = client.stats()
+    assert (stats['retries'], stats['failures'], stats['calls']) == (2, 1, 0)
+
+
+def test_client_errors_are_not_retried(mock_api, make_client):
+    client = make_client(mock_api(), max_retries=3)
+
+    with pytest.raises(HFAPIError, match='HTTP 400'):
+        client._post([])
+    assert client.stats()['retries'] == 0
+
+
+def test_unreachable_api_raises(make_client):
+    client = make_client('http://127.0.0.1:9/models/mock', max_retries=1, timeout=(0.2, 0.2))
+
+    with pytest.raises(HFAPIError):
+        client.classify(['good'])
@@ -0,0 +1,147 @@
+"""Tests for routing between the local and remote inference backends."""
+import pytest
+
+import inference_router
+from inference_router import InferenceBackend, InferenceRouter, Overloaded
+
+
+class FakeBackend(InferenceBackend):
+    def __init__(self, name, max_pending=0, ready=True):
+        super().__init__(max_pending)
+        self.name = name
+        self.is_ready = ready
+        self.fail = False
+        self.calls = []
+
+    def ready(self):
+        return self.is_ready
+
+    def _classify(self, texts, token_ids):
+        self.calls.append((list(texts), token_ids))
+        if self.fail:
+            raise RuntimeError('API down')
+        return [{'backend': self.name} for _ in texts]
+
+
+@pytest.fixture
+def backends():
+    return FakeBackend('local', max_pending=4), FakeBackend('remote', max_pending=4)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(inference_router.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_needs_a_backend():
+    with pytest.raises(ValueError):
+        InferenceRouter()
+
+
+def test_prefers_local_until_it_is_busy(backends):
+    local, remote = backends
+    router = InferenceRouter(local, remote, spill_depth=2)
+
+    assert router.choose() is local
+    local.pending = 2
+    assert router.choose() is remote
+    remote.pending = 4
+    assert router.choose() is local
+
+
+def test_spills_on_latency_only_while_work_is_pending(backends):
+    local, remote = backends
+    router = InferenceRouter(local, remote, spill_depth=10, spill_latency_ms=50)
+    local.latency_ms = 80
+
+    assert router.choose() is local
+    local.pending = 1
+    assert router.choose() is remote
+
+
+def test_sheds_when_every_backend_is_full(backends):
+    local, remote = backends
+    router = InferenceRouter(local, remote)
+    local.pending = remote.pending = 4
+
+    with pytest.raises(Overloaded):
+        router.classify(['a'], [[1]])
+    assert router.stats()['shed'] == 1
+
+
+def test_unready_local_model_sends_work_remote(backends):
+    local, remote = backends
+    local.is_ready = False
+    router = InferenceRouter(local, remote)
+
+    assert not router.wants_tokens()
+    assert router.route(['a']) == ('remote', [{'backend': 'remote'}])
+    remote.pending = 4
+    # With the API full, the caller tokenizes and waits for the local model
+    assert router.wants_tokens()
+    assert router.choose() is local
+
+
+def test_work_without_tokens_never_goes_local(backends):
+    local, remote = backends
+    router = InferenceRouter(local, remote)
+    remote.pending = 4
+
+    with pytest.raises(Overloaded):
+        router.route(['a'])
+    assert local.calls == []
+
+
+def test_remote_failure_falls_back_and_cools_down(backends, clock):
+    local, remote = backends
+    router = InferenceRouter(local, remote, spill_depth=0, cooldown=30)
+    remote.fail = True
+
+    assert router.route(['a'], [[1]]) == ('local', [{'backend': 'local'}])
+    stats = router.stats()
+    assert (stats['routed'], stats['fallbacks']) == ({'remote': 1}, 1)
+    assert not router.remote_available()
+
+    clock[0] += 31
+    assert router.remote_available()
+    remote.fail = False
+    assert router.route(['b'], [[2]])[0] == 'remote'
+
+
+def test_local_only_work_is_counted_and_shed(backends):
+    local, remote = backends
+    router = InferenceRouter(local, remote, spill_depth=1)
+    local.pending = 3
+
+    assert router.classify_local(['doc', 'doc'], [[1], [2]]) == [{'backend': 'local'}] * 2
+    assert remote.calls == []
+    assert router.stats()['routed'] == {'local': 2}
+    local.pending = 4
+    with pytest.raises(Overloaded):
+        router.classify_local(['doc'], [[1]])
+    assert router.stats()['shed'] == 1
+    with pytest.raises(ValueError):
+        InferenceRouter(remote=remote).classify_local(['doc'], [[1]])
+
+
+def test_remote_failure_without_tokens_is_raised(backends):
+    local, remote = backends
+    local.is_ready = False
+    remote.fail = True
+    router = InferenceRouter(local, remote)
+
+    with pytest.raises(RuntimeError):
+        router.route(['a'])
+    assert local.calls == []
+
+
+def test_remote_only_router_raises_remote_errors():
+    remote = FakeBackend('remote')
+    remote.fail = True
+    router = InferenceRouter(None, remote)
+
+    assert not router.needs_tokens
+    with pytest.raises(RuntimeError):
+        router.classify(['a'])
@@ -0,0 +1,199 @@
+"""Tests for the persistent job queue, driven without worker threads."""
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import job_queue
+from job_queue import JobQueue, PriorityGate
+
+
+class Postponed(Exception):
+    pass
+
+
+def scores(texts, options):
+    return [{'sentiment': 'positive', 'score': 0.9, 'positive_score': 0.9} for _ in texts]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(job_queue.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+
+    @contextmanager
+    def connect():
+        conn = sqlite3.connect(path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    queues = []
+
+    def make(process_fn=scores, **options):
+        options.setdefault('workers', 0)
+        queue = JobQueue(connect, process_fn, **options)
+        queue.init_store()
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.close()
+
+
+def rows(*texts):
+    return [(f'row-{i}', text, None) for i, text in enumerate(texts)]
+
+
+def work_off(queue):
+    while (claimed := queue._claim()) is not None:
+        queue._process(*claimed)
+
+
+def test_claims_chunks_oldest_job_first(make_queue, clock):
+    queue = make_queue(chunk_size=2)
+    first = queue.submit(rows('a', 'b', 'c'), {'persist': False})
+    clock[0] += 1
+    second = queue.submit(rows('d'))
+
+    assert queue._claim() == (first, {'persist': False}, [(0, 'a'), (1, 'b')])
+    assert queue._claim() == (first, {'persist': False}, [(2, 'c')])
+    assert queue._claim() == (second, {}, [(0, 'd')])
+    assert queue._claim() is None
+    assert queue.get(first)['status'] == 'running'
+
+
+def test_completed_job_results_in_input_order(make_queue):
+    queue = make_queue(chunk_size=2)
+    job_id = queue.submit(rows('a', 'b', 'c'))
+    work_off(queue)
+
+    job = queue.get(job_id)
+    assert (job['status'], job['processed'], job['failed'], job['progress']) == ('done', 3, 0, 1.0)
+    results = queue.results(job_id)
+    assert [(item['index'], item['id'], item['status']) for item in results] == [
+        (0, 'row-0', 'done'), (1, 'row-1', 'done'), (2, 'row-2', 'done')]
+    assert [item['index'] for item in queue.results(job_id, after=0, limit=1)] == [1]
+
+
+def test_rows_with_errors_are_stored_as_failed(make_queue):
+    queue = make_queue()
+    job_id = queue.submit([('x', 'good', None), ('y', None, 'Invalid JSON')])
+    work_off(queue)
+
+    job = queue.get(job_id)
+    assert (job['status'], job['processed'], job['failed']) == ('done', 2, 1)
+    assert queue.results(job_id)[1] == {
+        'index': 1, 'id': 'y', 'text': '', 'status': 'failed', 'error': 'Invalid JSON'}
+
+    all_failed = queue.submit([('z', None, 'Missing text')])
+    assert queue.get(all_failed)['status'] == 'done'
+    assert queue._claim() is None
+
+
+def test_stale_claims_are_handed_out_again(make_queue, clock):
+    queue = make_queue(claim_timeout=300)
+    job_id = queue.submit(rows('a', 'b'))
+    stale = queue._claim()
+
+    clock[0] += 299
+    assert queue._claim() is None
+    clock[0] += 2
+    reclaimed = queue._claim()
+    assert reclaimed == stale
+
+    queue._process(*reclaimed)
+    # The first worker finishing late must not count the items twice
+    queue._process(*stale)
+    job = queue.get(job_id)
+    assert (job['status'], job['processed']) == ('done', 2)
+
+
+def test_retryable_errors_release_the_chunk(make_queue):
+    calls = []
+
+    def flaky(texts, options):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise Postponed()
+        return scores(texts, options)
+
+    queue = make_queue(flaky, retryable=(Postponed,))
+    job_id = queue.submit(rows('a'))
+    assert queue._process(*queue._claim()) is False
+    assert queue.stats()['retries'] == 1
+    work_off(queue)
+
+    assert calls == [['a'], ['a']]
+    assert queue.get(job_id)['status'] == 'done'
+
+
+def test_other_errors_fail_the_chunk(make_queue):
+    def broken(texts, options):
+        raise RuntimeError('boom')
+
+    queue = make_queue(broken)
+    job_id = queue.submit(rows('a', 'b'))
+    work_off(queue)
+
+    job = queue.get(job_id)
+    assert (job['status'], job['failed']) == ('done', 2)
+    assert {item['error'] for item in queue.results(job_id)} == {'Analysis failed'}
+
+
+def test_cancel_drops_pending_items_only(make_queue):
+    queue = make_queue(chunk_size=2)
+    job_id = queue.submit(rows('a', 'b', 'c', 'd'))
+    claimed = queue._claim()
+
+    assert queue.cancel(job_id)
+    job = queue.get(job_id)
+    assert (job['status'], job['total']) == ('cancelled', 2)
+    assert queue._claim() is None
+
+    # The chunk already running still reports its results
+    queue._process(*claimed)
+    assert [item['status'] for item in queue.results(job_id)] == ['done', 'done']
+    assert queue.get(job_id)['status'] == 'cancelled'
+    assert not queue.cancel(job_id)
+    assert not queue.cancel('no-such-job')
+
+
+def test_prune_deletes_finished_jobs(make_queue, clock):
+    queue = make_queue()
+    finished = queue.submit(rows('a'))
+    work_off(queue)
+    clock[0] += 10
+    open_job = queue.submit(rows('b'))
+
+    assert queue.prune(20) == 0
+    clock[0] += 15
+    assert queue.prune(20) == 1
+    assert queue.get(finished) is None
+    assert queue.results(finished) == []
+    assert queue.get(open_job)['status'] == 'queued'
+
+
+def test_workers_defer_to_interactive_requests(make_queue):
+    gate = PriorityGate()
+    queue = make_queue(workers=1, poll_interval=0.01, gate=gate, max_defer=0.2)
+    with gate.interactive():
+        job_id = queue.submit(rows('a'))
+        time.sleep(0.05)
+        assert queue.get(job_id)['status'] == 'queued'
+
+    deadline = time.monotonic() + 5
+    while queue.get(job_id)['status'] != 'done' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert queue.get(job_id)['status'] == 'done'
+    assert queue.stats()['deferred_seconds'] > 0
@@ -0,0 +1,77 @@
+"""Tests for the token-bucket rate limiters and their configuration."""
+import pytest
+
+import rate_limiting
+from rate_limiting import SQLiteRateLimiter, TokenBucketLimiter, parse_rate_limits
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiting.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(rate_limiting.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def limiter(request, tmp_path):
+    if request.param == 'memory':
+        return TokenBucketLimiter()
+    return SQLiteRateLimiter(str(tmp_path / 'rate_limits.db'))
+
+
+def test_parse_rate_limits_overrides_defaults():
+    limits = parse_rate_limits(' analyze=10/60, default=0/1 ,', {'analyze': (5, 60), 'stats': (2, 1)})
+    assert limits == {'analyze': (10, 60.0), 'stats': (2, 1), 'default': (0, 1.0)}
+
+
+@pytest.mark.parametrize('spec', ['analyze', 'analyze=10', 'analyze=ten/60', 'a=1/2=3',
+                                  'analyze=10/0', 'analyze=10/-5', 'analyze=-1/60',
+                                  'analyze=10/nan', 'analyze=10/inf'])
+def test_parse_rate_limits_rejects_malformed_entries(spec):
+    with pytest.raises(ValueError, match='expected endpoint=limit/seconds'):
+        parse_rate_limits(spec, {})
+
+
+def test_token_bucket_allows_limit_then_rejects(clock, limiter):
+    assert [limiter.hit('client', 3, 60)[0] for _ in range(3)] == [True] * 3
+    allowed, retry_after = limiter.hit('client', 3, 60)
+    assert not allowed
+    assert retry_after == pytest.approx(20)
+    assert limiter.hit('other', 3, 60) == (True, 0.0)
+    assert limiter.stats()['rejections'] == 1
+
+
+def test_token_bucket_refills_over_the_window(clock, limiter):
+    for _ in range(3):
+        limiter.hit('client', 3, 60)
+
+    clock[0] += 19
+    assert not limiter.hit('client', 3, 60)[0]
+    clock[0] += 1
+    assert limiter.hit('client', 3, 60)[0]
+    assert not limiter.hit('client', 3, 60)[0]
+
+
+def test_token_bucket_evicts_least_recent_clients(clock):
+    limiter = TokenBucketLimiter(max_clients=2, stripes=1)
+    limiter.hit('a', 1, 60)
+    limiter.hit('b', 1, 60)
+    limiter.hit('a', 1, 60)
+    limiter.hit('c', 1, 60)
+
+    stats = limiter.stats()
+    assert stats['clients'] == 2 and stats['evictions'] == 1
+    # 'b' was evicted, so it starts again with a full bucket
+    assert limiter.hit('b', 1, 60)[0]
+    assert not limiter.hit('c', 1, 60)[0]
+
+
+def test_sqlite_limiter_shares_buckets_between_instances(clock, tmp_path):
+    path = str(tmp_path / 'rate_limits.db')
+    first, second = SQLiteRateLimiter(path), SQLiteRateLimiter(path)
+
+    assert first.hit('client', 2, 60)[0]
+    assert second.hit('client', 2, 60)[0]
+    assert not first.hit('client', 2, 60)[0]
+    assert second.stats()['clients'] == 1
@@ -0,0 +1,131 @@
+"""Tests for the two-tier analysis result cache."""
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, normalize_text
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def connect(tmp_path):
+    path = str(tmp_path / 'cache.db')
+
+    @contextmanager
+    def connect():
+        conn = sqlite3.connect(path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    return connect
+
+
+def make_cache(connect, model_id='model:pytorch', **options):
+    cache = ResultCache(model_id, connection_factory=connect, **options)
+    cache.init_store()
+    return cache
+
+
+def row_count(connect):
+    with connect() as conn:
+        return conn.execute('SELECT COUNT(*) FROM analysis_cache').fetchone()[0]
+
+
+def test_keys_depend_on_normalized_text_and_model():
+    cache = ResultCache('model:pytorch')
+    assert cache.key(normalize_text('  good \n day ')) == cache.key('good day')
+    assert cache.key('good day') != ResultCache('model:onnx').key('good day')
+    assert cache.key('good day', 'model:onnx') == ResultCache('model:onnx').key('good day')
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache('model', max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get_many(['a', 'b', 'c']) == {'a': 1, 'c': 3}
+    stats = cache.stats()
+    assert (stats['evictions'], stats['memory_hits'], stats['misses']) == (1, 3, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache('model', ttl=60)
+    cache.set('a', 1)
+    clock[0] += 60
+    assert cache.get('a') == 1
+    clock[0] += 1
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_persistent_tier_survives_a_restart(connect):
+    make_cache(connect).set_many({'a': {'scores': {'positive': 1.0}}, 'b': {'scores': {}}})
+
+    cache = make_cache(connect)
+    assert cache.get_many(['a', 'b', 'c']) == {'a': {'scores': {'positive': 1.0}},
+                                               'b': {'scores': {}}}
+    assert cache.stats()['persistent_hits'] == 2
+    cache.get('a')
+    assert cache.stats()['memory_hits'] == 1
+
+
+def test_init_store_drops_other_models(connect):
+    make_cache(connect, 'model:pytorch').set('a', 1)
+    make_cache(connect, 'model:onnx').set('b', 2)
+    assert row_count(connect) == 1
+
+    kept = make_cache(connect, 'model:pytorch', other_model_ids=['api:url'])
+    kept.set('c', 3, model_id='api:url')
+    make_cache(connect, 'model:pytorch', other_model_ids=['api:url'])
+    assert row_count(connect) == 1
+    make_cache(connect, 'api:url')
+    assert row_count(connect) == 1
+
+
+def test_prune_caps_rows_to_the_newest(connect):
+    cache = make_cache(connect, max_size=3)
+    cache.set_many({f'key-{i}': i for i in range(5)})
+    cache.set('key-0', 'rewritten')
+
+    assert cache.prune() == 2
+    with connect() as conn:
+        keys = {row[0] for row in conn.execute('SELECT key FROM analysis_cache')}
+    assert keys == {'key-3', 'key-4', 'key-0'}
+    assert cache.prune() == 0
+
+
+def test_prune_deletes_expired_rows(connect, clock):
+    cache = make_cache(connect, ttl=60)
+    cache.set('old', 1)
+    clock[0] += 61
+    cache.set('new', 2)
+
+    assert cache.prune() == 1
+    assert row_count(connect) == 1
+
+
+def test_prune_without_persistence_is_a_no_op():
+    assert ResultCache('model').prune() == 0
+
+
+def test_alternate_keys_are_tried_on_a_miss():
+    cache = ResultCache('local', other_model_ids=['api'])
+    local_key, api_key = cache.key('good'), cache.key('good', 'api')
+    cache.set(api_key, 'from api', model_id='api')
+
+    assert cache.get_many([local_key]) == {}
+    assert cache.get_many([local_key], {local_key: api_key}) == {api_key: 'from api'}
+    cache.set(local_key, 'from local')
+    assert cache.get_many([local_key], {local_key: api_key}) == {local_key: 'from local'}
+    assert cache.stats()['misses'] == 1
@@ -0,0 +1,50 @@
+"""Tests for the model-independent helpers in sentiment_model."""
+import pytest
+
+from sentiment_model import pool_scores, sliding_windows
+
+
+def wrapped(length):
+    """Token ids for ``length`` content tokens between two special tokens."""
+    return [-1] + list(range(length)) + [-2]
+
+
+def test_sliding_windows_short_text_is_one_window():
+    token_ids = wrapped(100)
+    assert sliding_windows(token_ids, window=512) == [(0, 100, token_ids)]
+
+
+def test_sliding_windows_cover_the_text_with_overlap():
+    content = 2000
+    windows = sliding_windows(wrapped(content), window=512, overlap=64, max_windows=16)
+    starts = [start for start, _, _ in windows]
+
+    assert starts[0] == 0 and windows[-1][1] == content
+    for start, end, window_ids in windows:
+        assert end - start == 510
+        assert window_ids == [-1] + list(range(start, end)) + [-2]
+    assert all(next_start - end <= -64
+               for (_, end, _), next_start in zip(windows, starts[1:]))
+
+
+def test_sliding_windows_sample_evenly_past_the_cap():
+    content = 20000
+    windows = sliding_windows(wrapped(content), window=512, overlap=64, max_windows=4)
+    starts = [start for start, _, _ in windows]
+
+    assert len(windows) == 4
+    assert starts[0] == 0 and windows[-1][1] == content
+    gaps = {next_start - start for start, next_start in zip(starts, starts[1:])}
+    assert max(gaps) - min(gaps) <= 1
+
+
+def test_pool_scores_mean_weights_windows_by_length():
+    pooled = pool_scores([{'positive': 0.9, 'negative': 0.1},
+                          {'positive': 0.3, 'negative': 0.7}], [3, 1], 'mean')
+    assert pooled == pytest.approx({'positive': 0.75, 'negative': 0.25})
+
+
+def test_pool_scores_max_renormalizes():
+    pooled = pool_scores([{'positive': 0.9, 'negative': 0.1},
+                          {'positive': 0.3, 'negative': 0.7}], [1, 1], 'max')
+    assert pooled == pytest.approx({'positive': 0.5625, 'negative': 0.4375})
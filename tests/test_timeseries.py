@@ -0,0 +1,103 @@
+"""Tests for /stats/timeseries and how it plans its buckets."""
+import random
+import time
+
+import pytest
+
+
+@pytest.fixture
+def plan(app_module):
+    return app_module.plan_timeseries
+
+
+def point_count(start, end, width):
+    return len(range(start - start % width, end, width))
+
+
+def test_plan_picks_the_finest_bucket_that_fits(plan):
+    assert plan(0, 3 * 3600, 'auto', 200) == (60, 60)
+    assert plan(0, 86400, 'auto', 200) == (3600, 3600)
+    assert plan(0, 365 * 86400, 'auto', 200) == (86400, 2 * 86400)
+
+
+def test_plan_widens_explicit_buckets_to_max_points(plan):
+    assert plan(0, 86400, 'minute', 200) == (60, 480)
+    assert plan(0, 86400, 'day', 200) == (86400, 86400)
+
+
+def test_plan_uses_hourly_rollups_before_the_minute_horizon(plan):
+    assert plan(0, 3600, 'minute', 200, minute_horizon=1800) == (3600, 3600)
+    assert plan(1800, 3600, 'minute', 200, minute_horizon=1800) == (60, 60)
+
+
+def test_plan_counts_the_bucket_added_by_alignment(plan):
+    granularity, width = plan(1000, 13000, 'minute', 200)
+    assert point_count(1000, 13000, width) <= 200
+    assert width % granularity == 0
+
+
+def test_plan_never_exceeds_max_points(plan):
+    rng = random.Random(23)
+    for _ in range(2000):
+        start = rng.randrange(0, 10 ** 9)
+        end = start + rng.randrange(1, 10 ** rng.randrange(2, 9))
+        max_points = rng.randrange(1, 1001)
+        bucket = rng.choice(['auto', 'minute', 'hour', 'day'])
+        granularity, width = plan(start, end, bucket, max_points)
+        assert point_count(start, end, width) <= max_points, (start, end, bucket, max_points)
+        assert width % granularity == 0
+
+
+def totals(points):
+    return sum(point['count'] for point in points)
+
+
+def test_timeseries_buckets_stored_analyses(client, app_module):
+    now = int(time.time())
+    query = f'/stats/timeseries?start={now - 3600}&end={now + 3600}&bucket=minute'
+    before = client.get(query).get_json()
+    app_module.DatabaseManager.store_analyses([
+        ('timeseries one', 'positive', 0.8, 0.8, []),
+        ('timeseries two', 'negative', 0.6, 0.2, []),
+    ])
+
+    body = client.get(query).get_json()
+    assert body['granularity'] == 'minute'
+    assert totals(body['points']) == totals(before['points']) + 2
+    width = body['bucket_seconds']
+    assert len(body['points']) <= 200
+    point = next(point for point in body['points'] if point['count'])
+    assert point['positive'] + point['neutral'] + point['negative'] == point['count']
+    assert point['avg_score'] is not None
+
+    negative = client.get(query + '&sentiment=negative').get_json()
+    assert all(set(point) == {'t', 'negative', 'count', 'avg_score', 'avg_positive_score'}
+               for point in negative['points'])
+    assert width == negative['bucket_seconds']
+
+
+def test_timeseries_downsamples_to_max_points(client, app_module):
+    app_module.DatabaseManager.store_analyses([('timeseries three', 'neutral', 0.5, 0.5, [])])
+    now = int(time.time())
+    body = client.get(f'/stats/timeseries?end={now + 86400 + 1000}'
+                      f'&bucket=minute&max_points=50').get_json()
+
+    assert body['downsampled']
+    assert 0 < len(body['points']) <= 50
+    width = body['bucket_seconds']
+    assert width % 60 == 0 and width > 60
+    assert all(point['t'].endswith(':00Z') for point in body['points'])
+
+
+def test_timeseries_is_empty_before_the_first_analysis(client):
+    body = client.get('/stats/timeseries?start=2000-01-01T00:00:00Z&end=2000-02-01T00:00:00Z'
+                      ).get_json()
+    assert body['points'] == []
+
+
+@pytest.mark.parametrize('query', [
+    'start=10&end=5', 'start=nope', 'end=inf', 'start=-1', 'bucket=week',
+    'sentiment=happy'
+])
+def test_timeseries_rejects_bad_parameters(client, query):
+    assert client.get(f'/stats/timeseries?{query}').status_code == 400
@@ -0,0 +1,100 @@
+"""Tests for word-level VADER scoring and the packed word_sentiments format."""
+import json
+import sqlite3
+
+import pytest
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+from sentiment_model import ensure_vader_lexicon
+from word_scoring import (PACKED_FORMAT_VERSION, WordScorer, pack_word_sentiments,
+                          unpack_word_sentiments)
+
+TEXT = "I don't LOVE it :) but the food was kinda great, not bad at all!!! 10/10 a b"
+
+
+@pytest.fixture(scope='module')
+def sid():
+    ensure_vader_lexicon()
+    return SentimentIntensityAnalyzer()
+
+
+@pytest.fixture(scope='module')
+def scorer(sid):
+    return WordScorer(sid)
+
+
+def vader_word_sentiments(sid, text, min_length=3):
+    """The per-word VADER loop that WordScorer replaces."""
+    results = []
+    for word in text.split():
+        if len(word) >= min_length:
+            score = sid.polarity_scores(word)['compound']
+            results.append({
+                'text': word,
+                'sentiment': 'positive' if score > 0 else 'negative' if score < 0 else 'neutral',
+                'score': abs(score)
+            })
+    return results
+
+
+def test_word_scorer_matches_vader(sid, scorer):
+    assert scorer.score_text(TEXT) == vader_word_sentiments(sid, TEXT)
+
+
+def test_word_scorer_matches_vader_across_lexicon(sid, scorer):
+    words = [word for word in sid.lexicon if word.isalpha()]
+    words += [word.upper() for word in words[::50]]
+    words += list(sid.constants.BOOSTER_DICT) + ["can't", ':-(', '<3', 'x', 'NO!']
+    mismatches = [word for word in words
+                  if scorer.score_token(word) != sid.polarity_scores(word)['compound']]
+    assert mismatches == []
+
+
+def test_word_scorer_memoizes_other_tokens(scorer):
+    scorer.clear_memo()
+    scorer.score_text(':-) :-) :-)')
+    stats = scorer.memo_stats()
+    assert (stats['memo_misses'], stats['memo_hits']) == (1, 2)
+
+
+def test_pack_round_trip(scorer):
+    word_sentiments = scorer.score_text(TEXT)
+    packed = pack_word_sentiments(TEXT, word_sentiments)
+
+    assert isinstance(packed, bytes)
+    assert packed[:2] == bytes([PACKED_FORMAT_VERSION, 3])
+    assert len(packed) == 2 + 2 * len(word_sentiments)
+    assert unpack_word_sentiments(TEXT, packed) == word_sentiments
+
+
+def test_pack_round_trip_empty():
+    assert unpack_word_sentiments('a b', pack_word_sentiments('a b', [])) == []
+
+
+def test_pack_falls_back_to_json_when_words_do_not_match_text(scorer):
+    word_sentiments = scorer.score_text('really good stuff')
+    packed = pack_word_sentiments('something else entirely', word_sentiments)
+
+    assert isinstance(packed, str)
+    assert json.loads(packed) == word_sentiments
+    assert unpack_word_sentiments('something else entirely', packed) == word_sentiments
+
+
+def test_unpack_legacy_json_rows(scorer):
+    word_sentiments = scorer.score_text(TEXT)
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE analyses (text TEXT, word_sentiments TEXT)')
+    conn.executemany('INSERT INTO analyses VALUES (?, ?)', [
+        (TEXT, json.dumps(word_sentiments)),  # written before values were packed
+        (TEXT, pack_word_sentiments(TEXT, word_sentiments))
+    ])
+    rows = conn.execute('SELECT text, word_sentiments FROM analyses').fetchall()
+
+    assert [type(stored) for _, stored in rows] == [str, bytes]
+    for text, stored in rows:
+        assert unpack_word_sentiments(text, stored) == word_sentiments
+
+
+def test_unpack_rejects_unknown_version():
+    with pytest.raises(ValueError):
+        unpack_word_sentiments('good', bytes([PACKED_FORMAT_VERSION + 1, 3, 0, 0]))
@@ -0,0 +1,124 @@
+"""Tests for the write-behind queue in both write modes."""
+import threading
+
+import pytest
+
+from write_behind import WriteBehindQueue
+
+
+class Writer:
+    """flush_fn stand-in that fails its first ``failures`` calls."""
+
+    def __init__(self, failures=0, raises=False):
+        self.failures = failures
+        self.raises = raises
+        self.calls = []
+        self.written = []
+
+    def __call__(self, batch):
+        self.calls.append(list(batch))
+        if len(self.calls) <= self.failures:
+            if self.raises:
+                raise RuntimeError('database is locked')
+            return False
+        self.written.extend(batch)
+        return True
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr('write_behind.time.sleep', lambda seconds: None)
+
+
+def test_sync_mode_writes_inline_once():
+    writer = Writer(failures=1)
+    queue = WriteBehindQueue(writer, synchronous=True, max_retries=3)
+
+    assert queue.submit('a') is False
+    assert queue.submit('b') is True
+    assert writer.calls == [['a'], ['b']]
+    stats = queue.stats()
+    assert (stats['mode'], stats['written'], stats['failed'], stats['retries']) == (
+        'sync', 1, 1, 0)
+
+
+def blocked_writer(writer):
+    """Wrap ``writer`` so its first call waits for ``release``; returns (fn, started, release)."""
+    started, release = threading.Event(), threading.Event()
+
+    def flush(batch):
+        started.set()
+        release.wait(5)
+        return writer(batch)
+    return flush, started, release
+
+
+def test_async_mode_batches_queued_items():
+    writer = Writer()
+    flush, started, release = blocked_writer(writer)
+    queue = WriteBehindQueue(flush, max_batch_size=10)
+    queue.submit(0)
+    assert started.wait(5)
+    for item in range(1, 6):
+        queue.submit(item)
+    release.set()
+    assert queue.flush(timeout=5)
+
+    assert writer.calls == [[0], [1, 2, 3, 4, 5]]
+    stats = queue.stats()
+    assert (stats['batches'], stats['written'], stats['largest_batch']) == (2, 6, 5)
+    queue.close()
+
+
+def test_failed_batches_are_retried(caplog):
+    writer = Writer(failures=2, raises=True)
+    queue = WriteBehindQueue(writer, max_retries=3, retry_backoff=0)
+    queue.submit('a')
+    assert queue.flush(timeout=5)
+
+    assert writer.written == ['a']
+    stats = queue.stats()
+    assert (stats['written'], stats['failed'], stats['retries']) == (1, 0, 2)
+    assert 'Dropped write' not in caplog.text
+    queue.close()
+
+
+def test_batches_are_dropped_and_logged_after_the_last_retry(caplog):
+    writer = Writer(failures=10)
+    queue = WriteBehindQueue(writer, max_retries=2, retry_backoff=0)
+    queue.submit(('text one', 'positive'))
+    assert queue.flush(timeout=5)
+
+    assert len(writer.calls) == 3
+    stats = queue.stats()
+    assert (stats['written'], stats['failed'], stats['retries']) == (0, 1, 2)
+    assert "Dropped write after 3 attempts: ('text one', 'positive')" in caplog.text
+    queue.close()
+
+
+def test_full_queue_rejects_writes():
+    writer = Writer()
+    flush, started, release = blocked_writer(writer)
+    queue = WriteBehindQueue(flush, max_queue_size=1, put_timeout=0.01)
+    assert queue.submit('a')
+    assert started.wait(5)
+    # The writer holds 'a' and 'b' fills the queue, so 'c' is turned away
+    assert queue.submit('b')
+    assert not queue.submit('c')
+    release.set()
+
+    assert queue.flush(timeout=5)
+    assert writer.written == ['a', 'b']
+    assert queue.stats()['rejected'] == 1
+    queue.close()
+
+
+def test_close_drains_the_queue_and_refuses_new_writes():
+    writer = Writer()
+    queue = WriteBehindQueue(writer)
+    for item in range(3):
+        queue.submit(item)
+    queue.close()
+
+    assert writer.written == [0, 1, 2]
+    assert queue.submit(3) is False
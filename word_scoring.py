@@ -0,0 +1,111 @@
+import array
+import json
+import sys
+from functools import lru_cache
+
+PACKED_FORMAT_VERSION = 1
+
+
+class WordScorer:
+    """Word-level VADER scoring without running the sentence pipeline per word.
+
+    For a purely alphabetic token VADER's compound score depends only on
+    its lexicon valence (boosters score 0), so those scores are precomputed
+    into a lookup table. Every other token (punctuation, digits,
+    contractions, emoticons) goes through ``polarity_scores`` once and is
+    memoized in a bounded LRU, so the output matches per-word VADER calls
+    exactly.
+    """
+
+    def __init__(self, sid, memo_size=65536):
+        self.sid = sid
+        boosters = sid.constants.BOOSTER_DICT
+        normalize = sid.constants.normalize
+        self.table = {
+            word: round(normalize(valence), 4)
+            for word, valence in sid.lexicon.items()
+            if word not in boosters
+        }
+        self._score_other = lru_cache(maxsize=memo_size)(self._vader_compound)
+
+    def _vader_compound(self, token):
+        return self.sid.polarity_scores(token)['compound']
+
+    def score_token(self, token):
+        # VADER ignores single characters, so those go the slow (exact) way too
+        if token.isalpha() and len(token) > 1:
+            return self.table.get(token.lower(), 0.0)
+        return self._score_other(token)
+
+    def score_text(self, text, min_length=3):
+        """Score every whitespace-separated word of at least ``min_length`` characters.
+
+        Returns the ``word_sentiments`` structure served by ``/analyze``.
+        """
+        score_token = self.score_token
+        return [
+            {
+                'text': word,
+                'sentiment': 'positive' if (score := score_token(word)) > 0
+                else 'negative' if score < 0 else 'neutral',
+                'score': abs(score)
+            }
+            for word in text.split() if len(word) >= min_length
+        ]
+
+    def clear_memo(self):
+        self._score_other.cache_clear()
+
+    def memo_stats(self):
+        info = self._score_other.cache_info()
+        return {
+            'table_size': len(self.table),
+            'memo_hits': info.hits,
+            'memo_misses': info.misses,
+            'memo_size': info.currsize,
+            'memo_max_size': info.maxsize
+        }
+
+
+def pack_word_sentiments(text, word_sentiments, min_length=3):
+    """Encode ``score_text`` output compactly for storage.
+
+    The words are re-derived from ``text`` when unpacking, so only a
+    two-byte header (format version, ``min_length``) and one signed 16-bit
+    integer per word are kept: the score in 1/10000ths (VADER's precision)
+    with the sign carrying the sentiment. Results that don't line up with
+    ``text`` are stored as JSON instead.
+    """
+    words = [word for word in text.split() if len(word) >= min_length]
+    if words != [item['text'] for item in word_sentiments]:
+        return json.dumps(word_sentiments)
+    scores = array.array('h', (
+        -round(item['score'] * 10000) if item['sentiment'] == 'negative'
+        else round(item['score'] * 10000)
+        for item in word_sentiments
+    ))
+    if sys.byteorder == 'big':
+        scores.byteswap()
+    return bytes([PACKED_FORMAT_VERSION, min_length]) + scores.tobytes()
+
+
+def unpack_word_sentiments(text, stored):
+    """Decode a stored value (packed bytes or legacy JSON) back to the served structure."""
+    if isinstance(stored, str):
+        return json.loads(stored)
+    version, min_length = stored[0], stored[1]
+    if version != PACKED_FORMAT_VERSION:
+        raise ValueError(f"Unknown word_sentiments format version {version}")
+    scores = array.array('h')
+    scores.frombytes(stored[2:])
+    if sys.byteorder == 'big':
+        scores.byteswap()
+    words = [word for word in text.split() if len(word) >= min_length]
+    return [
+        {
+            'text': word,
+            'sentiment': 'positive' if score > 0 else 'negative' if score < 0 else 'neutral',
+            'score': abs(score) / 10000
+        }
+        for word, score in zip(words, scores)
+    ]
@@ -0,0 +1,155 @@
+import logging
+import queue
+import time
+from threading import Lock, Thread
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Moves persistence off the request path.
+
+    Items are queued and drained by one writer thread that hands everything
+    waiting (up to ``max_batch_size`` items) to ``flush_fn`` in a single
+    call, so many writes share one transaction. When the queue is full,
+    ``submit`` blocks for up to ``put_timeout`` seconds before giving up.
+    A queued batch that fails (``flush_fn`` returns False or raises) is
+    retried up to ``max_retries`` times, ``retry_backoff`` seconds apart
+    and doubling; only then are its items dropped, each one logged. With
+    ``synchronous=True`` items are flushed inline, once, and the failure
+    is returned to the caller, which keeps tests deterministic.
+    """
+
+    def __init__(self, flush_fn, max_queue_size=10000, max_batch_size=500,
+                 put_timeout=1.0, synchronous=False, max_retries=3, retry_backoff=0.5):
+        self.flush_fn = flush_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.put_timeout = put_timeout
+        self.synchronous = synchronous
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._worker = None
+        self._start_lock = Lock()
+        self._stats_lock = Lock()
+        self._closed = False
+        self._batches = 0
+        self._written = 0
+        self._failed = 0
+        self._retries = 0
+        self._rejected = 0
+        self._largest_batch = 0
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._start_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = Thread(
+                        target=self._run, name='db-writer', daemon=True)
+                    self._worker.start()
+
+    def submit(self, item):
+        """Queue ``item`` for writing. Returns False if it could not be accepted."""
+        if self.synchronous:
+            return self._flush([item])
+        if self._closed:
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put(item, timeout=self.put_timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            logger.warning("Write queue full, rejecting write")
+            return False
+        return True
+
+    def _flush(self, batch, retries=0):
+        attempt = 0
+        while True:
+            try:
+                success = self.flush_fn(batch)
+            except Exception as e:
+                logger.error(f"Write-behind flush error: {e}")
+                success = False
+            if success or attempt >= retries:
+                break
+            delay = self.retry_backoff * 2 ** attempt
+            attempt += 1
+            with self._stats_lock:
+                self._retries += 1
+            logger.warning(f"Writing {len(batch)} items failed, retry {attempt}/{retries} "
+                           f"in {delay:.1f}s")
+            time.sleep(delay)
+        with self._stats_lock:
+            self._batches += 1
+            self._largest_batch = max(self._largest_batch, len(batch))
+            if success:
+                self._written += len(batch)
+            else:
+                self._failed += len(batch)
+        if not success and retries:
+            # These were accepted with a success response; leave a trace of each
+            for item in batch:
+                logger.error(f"Dropped write after {attempt + 1} attempts: {str(item)[:200]}")
+        return success
+
+    def _run(self):
+        stopping = False
+        while True:
+            try:
+                items = [self._queue.get(block=not stopping)]
+            except queue.Empty:
+                return
+            while len(items) < self.max_batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            batch = [item for item in items if item is not _STOP]
+            stopping = stopping or len(batch) < len(items)
+            if batch:
+                self._flush(batch, self.max_retries)
+            for _ in items:
+                self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been written."""
+        if self.synchronous or self._worker is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout=10.0):
+        """Stop accepting writes and drain the queue."""
+        if self._closed:
+            return
+        self._closed = True
+        if self.synchronous or self._worker is None or not self._worker.is_alive():
+            return
+        pending = self._queue.qsize()
+        if pending:
+            logger.info(f"Flushing {pending} queued writes before shutdown")
+        self._queue.put(_STOP)
+        self._worker.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'mode': 'sync' if self.synchronous else 'async',
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'written': self._written,
+                'failed': self._failed,
+                'retries': self._retries,
+                'rejected': self._rejected,
+                'largest_batch': self._largest_batch,
+                'avg_batch_size': (self._written + self._failed) / self._batches
+                if self._batches else 0
+            }